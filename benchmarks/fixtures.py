@@ -0,0 +1,75 @@
+import random
+from datetime import datetime, timezone, timedelta
+from xml.sax.saxutils import escape
+
+WORDS = (
+    "model learning neural network transformer attention policy reward agent vision "
+    "language robot benchmark dataset training inference scaling graph diffusion "
+    "retrieval reasoning optimization gradient sparse efficient robust"
+).split()
+INSTITUTIONS = ["MIT", "Stanford", "Berkeley", "Oxford", "Cambridge", "Google", "Microsoft", "DeepMind"]
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    if rng.random() < 0.3:
+        text += f" Work done at {rng.choice(INSTITUTIONS)}."
+    return text.capitalize()
+
+
+def synthetic_entries(count: int, seed: int = 0):
+    """Yield (title, link, description, published) tuples spread over the last 36 hours."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    for i in range(count):
+        yield (
+            _sentence(rng, 8),
+            f"https://arxiv.org/abs/2401.{i:05d}",
+            " ".join(_sentence(rng, 20) for _ in range(rng.randint(2, 10))),
+            now - timedelta(minutes=rng.randint(0, 36 * 60)),
+        )
+
+
+def generate_rss(count: int, seed: int = 0) -> bytes:
+    items = "".join(
+        f"<item><title>{escape(title)}</title><link>{link}</link>"
+        f"<description>{escape(description)}</description>"
+        f"<pubDate>{published.strftime('%a, %d %b %Y %H:%M:%S %z')}</pubDate></item>"
+        for title, link, description, published in synthetic_entries(count, seed)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<rss version="2.0"><channel><title>Synthetic</title>{items}</channel></rss>'
+    ).encode('utf-8')
+
+
+def generate_atom(count: int, seed: int = 0) -> bytes:
+    entries = "".join(
+        f'<entry><title>{escape(title)}</title><link rel="alternate" href="{link}"/>'
+        f"<summary>{escape(description)}</summary>"
+        f"<updated>{published.strftime('%Y-%m-%dT%H:%M:%SZ')}</updated></entry>"
+        for title, link, description, published in synthetic_entries(count, seed)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<feed xmlns="http://www.w3.org/2005/Atom"><title>Synthetic</title>{entries}</feed>'
+    ).encode('utf-8')
+
+
+def generate_oai(count: int, seed: int = 0, categories=("cs.LG",)) -> bytes:
+    """One complete OAI-PMH ListRecords page in the arXiv metadata format, categories taken in turn."""
+    today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    records = "".join(
+        f"<record><header><identifier>oai:arXiv.org:{link.rsplit('/', 1)[-1]}</identifier>"
+        f"<datestamp>{today}</datestamp></header><metadata>"
+        f'<arXiv xmlns="http://arxiv.org/OAI/arXiv/"><id>{link.rsplit("/", 1)[-1]}</id>'
+        f"<created>{published.strftime('%Y-%m-%d')}</created>"
+        f"<authors><author><keyname>Author{i}</keyname><forenames>A.</forenames></author></authors>"
+        f"<title>{escape(title)}</title><categories>{categories[i % len(categories)]}</categories>"
+        f"<abstract>{escape(description)}</abstract></arXiv></metadata></record>"
+        for i, (title, link, description, published) in enumerate(synthetic_entries(count, seed))
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/"><ListRecords>{records}</ListRecords></OAI-PMH>'
+    ).encode('utf-8')
@@ -0,0 +1,356 @@
+"""Offline micro-benchmarks for the scrape -> rank -> summarize -> notify hot paths.
+
+    python -m benchmarks.run                                  # run and write benchmarks/results.json
+    python -m benchmarks.run --save-baseline                  # also store the results as the baseline
+    python -m benchmarks.run --baseline benchmarks/baseline.json --threshold 0.25
+
+No network access is needed: feeds are synthetic fixtures and the LLM and Twilio
+clients are stubs. The process exits with status 1 if any benchmark's p50 latency
+regressed by more than the threshold against the baseline.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+from unittest.mock import patch
+
+from src.arxiv_oai import ArxivHarvester
+from src.feed_parser import FeedStream
+from src.models import Article
+from src.scraper import NewsScraper
+from .fixtures import generate_atom, generate_oai, generate_rss, synthetic_entries
+from .stubs import StubAnthropic, StubTwilio
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 50000]
+RESULTS_PATH = os.path.join(os.path.dirname(__file__), 'results.json')
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(name: str, func: Callable[[], object], items: int, repeat: int) -> Dict[str, float]:
+    """Time `func` `repeat` times and measure its peak traced memory on one extra run."""
+    func()  # warm-up: imports, regex compilation, caches
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    p50 = statistics.median(latencies)
+    result = {
+        'items': items,
+        'repeat': repeat,
+        'p50_ms': round(p50 * 1000, 3),
+        'p95_ms': round(_percentile(latencies, 0.95) * 1000, 3),
+        'throughput_per_s': round(items / p50, 1) if p50 > 0 else None,
+        'peak_kb': round(peak / 1024, 1),
+    }
+    print(f"{name:<40} p50 {result['p50_ms']:>10.3f} ms  p95 {result['p95_ms']:>10.3f} ms  "
+          f"{result['throughput_per_s'] or 0:>12.1f} items/s  peak {result['peak_kb']:>10.1f} KiB")
+    return result
+
+
+def _repeat_for(size: int, budget: int = 20000) -> int:
+    return max(3, min(50, budget // max(size, 1)))
+
+
+def bench_parse_feed(sizes: List[int]) -> Dict[str, dict]:
+    results = {}
+    for size in sizes:
+        for label, generate in (('rss', generate_rss), ('atom', generate_atom)):
+            content = generate(size)
+            results[f'parse_feed[{label},{size}]'] = measure(
+                f'parse_feed[{label},{size}]',
+                lambda: NewsScraper().parse_feed(content, 'ml'),
+                size,
+                _repeat_for(size)
+            )
+        # The streaming path over chunked input, as used for live responses
+        content = generate_rss(size)
+        chunks = [content[i:i + 16384] for i in range(0, len(content), 16384)]
+        scraper = NewsScraper()
+        results[f'iter_articles[rss,{size}]'] = measure(
+            f'iter_articles[rss,{size}]',
+            lambda: sum(1 for _ in scraper.iter_articles(FeedStream(chunks), 'ml')),
+            size,
+            _repeat_for(size)
+        )
+    return results
+
+
+def _articles(count: int) -> List[Article]:
+    return [
+        Article(title=title, url=link, topic='ml', content=description,
+                summary=description[:200], published_date=published)
+        for title, link, description, published in synthetic_entries(count)
+    ]
+
+
+def bench_relevance(sizes: List[int]) -> Dict[str, dict]:
+    results = {}
+    scraper = NewsScraper()
+    for size in sizes:
+        articles = _articles(size)
+        results[f'calculate_relevance_score[{size}]'] = measure(
+            f'calculate_relevance_score[{size}]',
+            lambda: [scraper.calculate_relevance_score(a) for a in articles],
+            size,
+            _repeat_for(size)
+        )
+        results[f'score_articles[{size}]'] = measure(
+            f'score_articles[{size}]',
+            lambda: scraper.score_articles(list(articles)),
+            size,
+            _repeat_for(size)
+        )
+    return results
+
+
+def bench_near_duplicates(sizes: List[int]) -> Dict[str, dict]:
+    from src.near_duplicates import NearDuplicateDetector
+
+    results = {}
+    for size in sizes:
+        articles = _articles(size)
+        results[f'collapse_near_duplicates[{size}]'] = measure(
+            f'collapse_near_duplicates[{size}]',
+            # A fresh detector each time, so signatures are computed rather than cached
+            lambda: NearDuplicateDetector().collapse(articles),
+            size,
+            _repeat_for(size, budget=5000)
+        )
+    return results
+
+
+def _bench_env() -> Dict[str, str]:
+    return {
+        'LLM_PROVIDER': 'anthropic',
+        'LLM_API_KEY': 'bench',
+        'TWILIO_ACCOUNT_SID': 'ACbench',
+        'TWILIO_AUTH_TOKEN': 'bench',
+        'TWILIO_FROM_PHONE': '+15550000000',
+        'TWILIO_TO_PHONE': '+15550000001',
+        'TOPICS': 'computer vision,robotics,llms,nlp,ml,blockchain,cryptocurrency,'
+                  'computational finance,reinforcement learning',
+        'MAX_ARTICLES': '9',
+        'SCHEDULE_TIMES': '09:00',
+        'FEED_CACHE_DIR': '',
+        'FEED_POLL_STATE_PATH': '',
+        'ARXIV_STATE_PATH': '',
+        'SEEN_DB_PATH': '',
+        'SUMMARY_CACHE_PATH': '',
+        'OUTBOX_PATH': '',
+        'ARCHIVE_PATH': '',
+        'LLM_REQUESTS_PER_MINUTE': '1000000',
+        'LLM_TOKENS_PER_MINUTE': '1000000000',
+        'SMS_PER_SECOND': '1000000',
+    }
+
+
+# Cold start of a process that builds the configured summarizer and notifier, then
+# reports which provider SDKs it ended up importing
+STARTUP_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from src.config import load_config
+from src.providers import NOTIFIER_TRANSPORTS
+from src.summarizer import Summarizer
+config = load_config()
+Summarizer(config)
+NOTIFIER_TRANSPORTS.create(config.notifier_transport, config)
+elapsed = time.perf_counter() - start
+print(json.dumps({'seconds': elapsed, 'modules': [m for m in %r if m in sys.modules]}))
+"""
+PROVIDER_SDKS = ('openai', 'anthropic', 'twilio')
+
+# Cold start of `main.py --check`, which should load the configuration and nothing else
+CHECK_PROBE = """
+import contextlib, io, json, sys, time
+start = time.perf_counter()
+from src.main import main
+with contextlib.redirect_stdout(io.StringIO()):
+    main(['--check'])
+elapsed = time.perf_counter() - start
+print(json.dumps({'seconds': elapsed, 'modules': [m for m in %r if m in sys.modules]}))
+"""
+# Only a run needs these; a config check must not import them
+RUN_ONLY_MODULES = PROVIDER_SDKS + ('requests', 'lxml')
+
+
+def bench_startup(repeat: int = 5) -> Dict[str, dict]:
+    results = {}
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    probes = [(f'startup[{provider},{transport}]', STARTUP_PROBE % (PROVIDER_SDKS,), provider, transport)
+              for provider, transport in (('anthropic', 'twilio'), ('openai', 'twilio'), ('anthropic', 'console'))]
+    probes.append(('startup[--check]', CHECK_PROBE % (RUN_ONLY_MODULES,), 'anthropic', 'twilio'))
+    for name, probe_code, provider, transport in probes:
+        env = dict(os.environ, **_bench_env())
+        env.update(LLM_PROVIDER=provider, NOTIFIER_TRANSPORT=transport)
+        latencies = []
+        modules = []
+        for _ in range(repeat):
+            output = subprocess.run(
+                [sys.executable, '-c', probe_code],
+                cwd=root, env=env, capture_output=True, text=True, check=True
+            ).stdout
+            probe = json.loads(output.strip().splitlines()[-1])
+            latencies.append(probe['seconds'])
+            modules = probe['modules']
+        p50 = statistics.median(latencies)
+        results[name] = {
+            'items': 1,
+            'repeat': repeat,
+            'p50_ms': round(p50 * 1000, 3),
+            'p95_ms': round(_percentile(latencies, 0.95) * 1000, 3),
+            'throughput_per_s': None,
+            'peak_kb': None,
+            'modules': modules,
+        }
+        print(f"{name:<40} p50 {results[name]['p50_ms']:>10.3f} ms  loaded {', '.join(modules) or '-'}")
+    return results
+
+
+def bench_format_message(sizes: List[int]) -> Dict[str, dict]:
+    from src.config import Config
+    from src.notifier import SMSNotifier
+
+    results = {}
+    config = Config(
+        llm_provider='anthropic', llm_api_key='', twilio_account_sid='AC', twilio_auth_token='',
+        twilio_from_phone='', twilio_to_phone='', topics=[], schedule_times=[], max_articles=3
+    )
+    with patch('twilio.rest.Client', StubTwilio):
+        notifier = SMSNotifier(config)
+    for size in sizes:
+        articles = _articles(min(size, 10000))
+        results[f'format_message[{len(articles)}]'] = measure(
+            f'format_message[{len(articles)}]',
+            lambda: notifier.format_message(articles),
+            len(articles),
+            _repeat_for(len(articles))
+        )
+    return results
+
+
+def bench_pipeline(feed_items: int, llm_latency: float, sms_latency: float) -> Dict[str, dict]:
+    from src import main
+
+    feeds = {}
+
+    def open_feed(self, url):
+        if url not in feeds:
+            feeds[url] = generate_rss(feed_items, seed=len(feeds))
+        return FeedStream([feeds[url]]), True
+
+    def harvest(self, params):
+        # One page per set, covering that set's categories in the bundled registry
+        spec = params['set']
+        if spec not in feeds:
+            categories = ('cs.CV', 'cs.RO', 'cs.CL', 'cs.LG', 'cs.CR') if spec == 'cs' else ('q-fin.CP',)
+            feeds[spec] = generate_oai(feed_items * len(categories), seed=len(feeds), categories=categories)
+        return feeds[spec]
+
+    with patch.dict(os.environ, _bench_env()), \
+            patch.object(NewsScraper, 'open_feed', open_feed), \
+            patch.object(ArxivHarvester, '_get', harvest), \
+            patch('anthropic.Anthropic', lambda *a, **k: StubAnthropic(latency=llm_latency)), \
+            patch('twilio.rest.Client', lambda *a, **k: StubTwilio(latency=sms_latency)):
+        result = measure(
+            f'scrape_summarize_notify[{feed_items}/feed]',
+            main.scrape_summarize_notify,
+            feed_items,
+            5
+        )
+    return {f'scrape_summarize_notify[{feed_items}/feed]': result}
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous or not previous.get('p50_ms'):
+            continue
+        ratio = result['p50_ms'] / previous['p50_ms']
+        if ratio > 1 + threshold:
+            regressions.append(f"{name}: p50 {previous['p50_ms']} ms -> {result['p50_ms']} ms ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='comma-separated fixture sizes (items per feed)')
+    parser.add_argument('--only', default='', help='comma-separated subset: parse,relevance,dedup,format,pipeline,startup')
+    parser.add_argument('--pipeline-items', type=int, default=200, help='items per synthetic feed in the pipeline run')
+    parser.add_argument('--llm-latency', type=float, default=0.0, help='simulated seconds per LLM call')
+    parser.add_argument('--sms-latency', type=float, default=0.0, help='simulated seconds per SMS')
+    parser.add_argument('--output', default=RESULTS_PATH)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed p50 slowdown before flagging')
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    only = {s.strip() for s in args.only.split(',') if s.strip()}
+
+    results: Dict[str, dict] = {}
+    if not only or 'parse' in only:
+        results.update(bench_parse_feed(sizes))
+    if not only or 'relevance' in only:
+        results.update(bench_relevance(sizes))
+    if not only or 'dedup' in only:
+        results.update(bench_near_duplicates(sizes))
+    if not only or 'format' in only:
+        results.update(bench_format_message(sizes))
+    if not only or 'pipeline' in only:
+        results.update(bench_pipeline(args.pipeline_items, args.llm_latency, args.sms_latency))
+    if not only or 'startup' in only:
+        results.update(bench_startup())
+
+    report = {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get('results', {})
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,32 @@
+import time
+from unittest.mock import Mock
+
+
+class StubAnthropic:
+    """Stands in for anthropic.Anthropic; answers every request after `latency` seconds."""
+
+    def __init__(self, *args, latency: float = 0.0, **kwargs):
+        self.latency = latency
+        self.calls = 0
+        self.messages = self
+
+    def create(self, **kwargs):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return Mock(content=[Mock(text="A short synthetic summary of the article.")])
+
+
+class StubTwilio:
+    """Stands in for twilio.rest.Client and records message bodies."""
+
+    def __init__(self, *args, latency: float = 0.0, **kwargs):
+        self.latency = latency
+        self.sent = []
+        self.messages = self
+
+    def create(self, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        self.sent.append(kwargs.get('body'))
+        return Mock(sid=f"SM{len(self.sent):032d}")
@@ -3,4 +3,5 @@ from setuptools import setup, find_packages
 setup(
     name="news-summarizer",
     packages=find_packages(),
+    package_data={'src': ['feeds.json']},
 )
\ No newline at end of file
@@ -0,0 +1,227 @@
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from .models import Article
+from .ranking import source_of
+from .relevance import title_terms
+from .seen_store import LOOKUP_CHUNK, normalize_url
+
+DAY = 24 * 3600
+QUERY_TOKEN = re.compile(r'\w+')
+
+@dataclass
+class ArchivedArticle:
+    url: str
+    title: str
+    topic: str
+    summary: Optional[str]
+    published_date: Optional[datetime]
+    relevance_score: float
+    archived_at: float
+    delivered_at: Optional[float] = None
+
+class ArticleArchive:
+    """Every article a run has seen, with its score, summary and delivery status, in SQLite.
+
+    Titles and summaries are indexed with FTS5 for `search`. Per-day counts of title
+    terms are kept alongside as articles are recorded, so `trending` compares this
+    week with the weeks before from a few thousand aggregate rows instead of
+    rescanning history. Raw feed content is kept for `content_retention` seconds and
+    then dropped by `prune`; the rest of the row stays.
+    """
+
+    def __init__(self, path: str, content_retention: float = 7 * DAY):
+        self.content_retention = content_retention
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS articles (
+                id INTEGER PRIMARY KEY,
+                key BLOB NOT NULL UNIQUE,
+                url TEXT NOT NULL,
+                title TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                source TEXT NOT NULL,
+                published REAL,
+                archived_at REAL NOT NULL,
+                score REAL NOT NULL,
+                summary TEXT,
+                content TEXT,
+                delivered_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS articles_archived_idx ON articles (archived_at);
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                title, summary, content='articles', content_rowid='id', tokenize='porter unicode61'
+            );
+            CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+                INSERT INTO articles_fts (rowid, title, summary) VALUES (new.id, new.title, coalesce(new.summary, ''));
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE OF title, summary ON articles BEGIN
+                INSERT INTO articles_fts (articles_fts, rowid, title, summary)
+                    VALUES ('delete', old.id, old.title, coalesce(old.summary, ''));
+                INSERT INTO articles_fts (rowid, title, summary) VALUES (new.id, new.title, coalesce(new.summary, ''));
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+                INSERT INTO articles_fts (articles_fts, rowid, title, summary)
+                    VALUES ('delete', old.id, old.title, coalesce(old.summary, ''));
+            END;
+            CREATE TABLE IF NOT EXISTS term_days (
+                day INTEGER NOT NULL, term TEXT NOT NULL, count INTEGER NOT NULL, PRIMARY KEY (day, term)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS article_days (day INTEGER PRIMARY KEY, count INTEGER NOT NULL);
+        ''')
+        self._conn.commit()
+
+    @staticmethod
+    def _key(url: str) -> bytes:
+        return hashlib.blake2b(normalize_url(url).encode('utf-8'), digest_size=16).digest()
+
+    def record(self, articles: Iterable[Article], now: Optional[float] = None) -> int:
+        """Add new articles and update the score and summary of known ones in one transaction.
+
+        Returns how many were new. Only new articles count towards term statistics.
+        """
+        now = time.time() if now is None else now
+        day = int(now // DAY)
+        batch: Dict[bytes, Article] = {}
+        for article in articles:
+            batch[self._key(article.url)] = article
+        if not batch:
+            return 0
+
+        with self._lock, self._conn:
+            known = self._known_keys(list(batch))
+            new = [(key, a) for key, a in batch.items() if key not in known]
+            self._conn.executemany(
+                'INSERT INTO articles (key, url, title, topic, source, published, archived_at, score, summary, content) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [(key, a.url, a.title, a.topic, source_of(a),
+                  a.published_date.timestamp() if a.published_date else None,
+                  now, a.relevance_score, a.summary, a.content) for key, a in new]
+            )
+            self._conn.executemany(
+                'UPDATE articles SET score = ?, summary = coalesce(?, summary) WHERE key = ?',
+                [(a.relevance_score, a.summary, key) for key, a in batch.items() if key in known]
+            )
+            if new:
+                terms = Counter(term for _, a in new for term in title_terms(a.title))
+                self._conn.executemany(
+                    'INSERT INTO term_days (day, term, count) VALUES (?, ?, ?) '
+                    'ON CONFLICT (day, term) DO UPDATE SET count = count + excluded.count',
+                    [(day, term, count) for term, count in terms.items()]
+                )
+                self._conn.execute(
+                    'INSERT INTO article_days (day, count) VALUES (?, ?) '
+                    'ON CONFLICT (day) DO UPDATE SET count = count + excluded.count',
+                    (day, len(new))
+                )
+        return len(new)
+
+    def mark_delivered(self, articles: Iterable[Article], at: Optional[float] = None) -> None:
+        at = time.time() if at is None else at
+        rows = [(at, self._key(a.url)) for a in articles]
+        with self._lock, self._conn:
+            self._conn.executemany('UPDATE articles SET delivered_at = ? WHERE key = ? AND delivered_at IS NULL', rows)
+
+    def search(self, query: str, limit: int = 10, delivered_only: bool = False) -> List[ArchivedArticle]:
+        """Best matches for all words of `query` in titles and summaries (stemmed, so "agents" finds "agent")."""
+        tokens = QUERY_TOKEN.findall(query)
+        if not tokens:
+            return []
+        # Quoted tokens keep FTS5 operators and punctuation in user input from being interpreted
+        match = ' '.join(f'"{token}"' for token in tokens)
+        sql = ('SELECT a.url, a.title, a.topic, a.summary, a.published, a.score, a.archived_at, a.delivered_at '
+               'FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid WHERE articles_fts MATCH ?')
+        if delivered_only:
+            sql += ' AND a.delivered_at IS NOT NULL'
+        sql += ' ORDER BY articles_fts.rank LIMIT ?'
+        with self._lock:
+            rows = self._conn.execute(sql, (match, limit)).fetchall()
+        return [
+            ArchivedArticle(url, title, topic, summary,
+                            datetime.fromtimestamp(published, timezone.utc) if published is not None else None,
+                            score, archived_at, delivered_at)
+            for url, title, topic, summary, published, score, archived_at, delivered_at in rows
+        ]
+
+    def trending(self, days: int = 7, baseline_days: int = 28, limit: int = 20, min_count: int = 3,
+                 now: Optional[float] = None) -> List[Tuple[str, float]]:
+        """Title terms appearing in a larger share of articles in the last `days` than in the
+        `baseline_days` before, as (term, lift) pairs, biggest lift first.
+
+        Lift is the term's share of recent articles over its (add-one smoothed) share of
+        baseline articles. Terms seen in fewer than `min_count` recent articles are ignored.
+        """
+        today = int((time.time() if now is None else now) // DAY)
+        recent_start = today - days + 1
+        baseline_start = recent_start - baseline_days
+        with self._lock:
+            recent_total, baseline_total = self._conn.execute(
+                'SELECT coalesce(sum(CASE WHEN day >= ? THEN count END), 0), '
+                'coalesce(sum(CASE WHEN day < ? THEN count END), 0) '
+                'FROM article_days WHERE day BETWEEN ? AND ?',
+                (recent_start, recent_start, baseline_start, today)
+            ).fetchone()
+            if not recent_total or not baseline_total:
+                return []
+            rows = self._conn.execute(
+                'SELECT term, sum(CASE WHEN day >= ? THEN count ELSE 0 END) AS recent, '
+                'sum(CASE WHEN day < ? THEN count ELSE 0 END) AS baseline '
+                'FROM term_days WHERE day BETWEEN ? AND ? GROUP BY term HAVING recent >= ?',
+                (recent_start, recent_start, baseline_start, today, min_count)
+            ).fetchall()
+        lifts = [
+            (term, (recent / recent_total) / ((baseline + 1) / (baseline_total + 1)))
+            for term, recent, baseline in rows
+        ]
+        lifts = [(term, round(lift, 2)) for term, lift in lifts if lift > 1]
+        lifts.sort(key=lambda item: (-item[1], item[0]))
+        return lifts[:limit]
+
+    def trend_boosts(self, days: int = 7, baseline_days: int = 28, limit: int = 50,
+                     now: Optional[float] = None) -> Dict[str, float]:
+        """`trending` as relevance points per term for `RelevanceScorer`: 1 point at an 8x lift, less below."""
+        return {
+            term: round(min(1.0, math.log2(lift) / 3), 2)
+            for term, lift in self.trending(days, baseline_days, limit, now=now)
+        }
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Drop raw content older than `content_retention`; returns how many articles were compacted."""
+        cutoff = (time.time() if now is None else now) - self.content_retention
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                'UPDATE articles SET content = NULL WHERE archived_at < ? AND content IS NOT NULL', (cutoff,)
+            )
+        return cursor.rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _known_keys(self, keys: List[bytes]) -> set:
+        known = set()
+        for start in range(0, len(keys), LOOKUP_CHUNK):
+            chunk = keys[start:start + LOOKUP_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            known.update(row[0] for row in self._conn.execute(
+                f'SELECT key FROM articles WHERE key IN ({placeholders})', chunk
+            ))
+        return known
@@ -0,0 +1,293 @@
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+import requests
+from lxml import etree
+from .metrics import NULL_METRICS
+from .models import Article
+
+DEFAULT_OAI_URL = 'https://oaipmh.arxiv.org/oai'
+OAI = '{http://www.openarchives.org/OAI/2.0/}'
+ARXIV = '{http://arxiv.org/OAI/arXiv/}'
+# Archives that arXiv's OAI-PMH interface groups under the `physics` set
+PHYSICS_ARCHIVES = {'astro-ph', 'cond-mat', 'gr-qc', 'hep-ex', 'hep-lat', 'hep-ph', 'hep-th', 'math-ph',
+                    'nlin', 'nucl-ex', 'nucl-th', 'physics', 'quant-ph'}
+
+class ArxivHarvestError(Exception):
+    pass
+
+@dataclass
+class ArxivRecord:
+    id: str
+    # Day the record last changed in the repository (OAI-PMH datestamp, YYYY-MM-DD)
+    datestamp: str
+    categories: List[str] = field(default_factory=list)
+    title: str = ''
+    abstract: str = ''
+    authors: List[str] = field(default_factory=list)
+    affiliations: List[str] = field(default_factory=list)
+    created: Optional[str] = None
+    # Set when the record is a later version of an earlier paper
+    updated: Optional[str] = None
+    deleted: bool = False
+
+    def to_article(self, topic: str) -> Article:
+        # A new paper is dated by when it appeared; a revision keeps its original date and ranks as old news
+        day = self.created if self.updated and self.created else self.datestamp
+        return Article(
+            title=self.title,
+            url=f"https://arxiv.org/abs/{self.id}",
+            topic=topic,
+            content=self.abstract,
+            published_date=datetime.strptime(day, '%Y-%m-%d').replace(tzinfo=timezone.utc),
+            authors=list(self.authors),
+            affiliations=list(self.affiliations)
+        )
+
+def arxiv_category(url: str) -> str:
+    """The category a registry URL stands for, e.g. `https://arxiv.org/rss/cs.CL` -> `cs.CL`."""
+    return urlsplit(url).path.rstrip('/').rsplit('/', 1)[-1]
+
+def set_spec(category: str) -> str:
+    archive = category.split('.', 1)[0]
+    return f"physics:{archive}" if archive in PHYSICS_ARCHIVES else archive
+
+def _text(element, path: str) -> str:
+    found = element.find(path)
+    return ' '.join(found.text.split()) if found is not None and found.text else ''
+
+def parse_list_records(content: bytes) -> Tuple[List[ArxivRecord], Optional[str]]:
+    """Records and resumption token of one ListRecords response in the `arXiv` metadata format."""
+    parser = etree.XMLParser(resolve_entities=False, no_network=True, huge_tree=True)
+    try:
+        root = etree.fromstring(content, parser)
+    except etree.XMLSyntaxError as e:
+        raise ArxivHarvestError(f"Malformed OAI-PMH response: {str(e)}") from e
+
+    error = root.find(f'{OAI}error')
+    if error is not None:
+        if error.get('code') == 'noRecordsMatch':
+            return [], None
+        raise ArxivHarvestError(f"OAI-PMH error {error.get('code')}: {(error.text or '').strip()}")
+
+    records = []
+    for record in root.iterfind(f'{OAI}ListRecords/{OAI}record'):
+        header = record.find(f'{OAI}header')
+        identifier = _text(header, f'{OAI}identifier')
+        entry = ArxivRecord(id=identifier.rsplit(':', 1)[-1], datestamp=_text(header, f'{OAI}datestamp'))
+        if header.get('status') == 'deleted':
+            entry.deleted = True
+            records.append(entry)
+            continue
+        meta = record.find(f'{OAI}metadata/{ARXIV}arXiv')
+        if meta is None:
+            continue
+        entry.id = _text(meta, f'{ARXIV}id') or entry.id
+        entry.title = _text(meta, f'{ARXIV}title')
+        entry.abstract = _text(meta, f'{ARXIV}abstract')
+        entry.categories = _text(meta, f'{ARXIV}categories').split()
+        entry.created = _text(meta, f'{ARXIV}created') or None
+        entry.updated = _text(meta, f'{ARXIV}updated') or None
+        for author in meta.iterfind(f'{ARXIV}authors/{ARXIV}author'):
+            name = ' '.join(filter(None, (_text(author, f'{ARXIV}forenames'), _text(author, f'{ARXIV}keyname'),
+                                          _text(author, f'{ARXIV}suffix'))))
+            if name:
+                entry.authors.append(name)
+            for affiliation in author.iterfind(f'{ARXIV}affiliation'):
+                text = ' '.join((affiliation.text or '').split())
+                if text and text not in entry.affiliations:
+                    entry.affiliations.append(text)
+        records.append(entry)
+
+    token = root.find(f'{OAI}ListRecords/{OAI}resumptionToken')
+    return records, (token.text.strip() if token is not None and token.text and token.text.strip() else None)
+
+def _newer(current: Optional[dict], update: dict) -> dict:
+    """The later of two watermarks for one category; on the same day, the ids seen by either."""
+    if not current or update['watermark'] > current['watermark']:
+        return update
+    if update['watermark'] < current['watermark']:
+        return current
+    return {'watermark': update['watermark'], 'boundary': sorted(set(current['boundary']) | set(update['boundary']))}
+
+@dataclass
+class _SetHarvest:
+    # First day covered by `records` (inclusive)
+    since: str
+    records: List[ArxivRecord]
+
+class ArxivHarvester:
+    """Incremental arXiv harvesting over OAI-PMH, one archive set (e.g. `cs`) at a time.
+
+    Each category keeps a watermark: the newest datestamp it has been given, plus the
+    ids it already got on that day (OAI-PMH datestamps are whole days, so the next
+    harvest starts on that day again and skips them). A run harvests each set once,
+    following resumption tokens through every page, from the oldest watermark of the
+    categories asked for; categories then take their share from that one harvest. So
+    a run only transfers records that changed since the last one, and a run after
+    downtime picks up exactly where the previous one stopped.
+
+    New watermarks stay pending until `commit()`, which the caller makes once the run's
+    papers have been delivered; a run that fails before then is harvested again. They
+    are merged into the JSON at `state_path`, so processes sharing the file only move
+    the categories they harvested. A harvester is meant for one run.
+    """
+
+    def __init__(self, session: Optional[requests.Session] = None, url: str = DEFAULT_OAI_URL,
+                 state_path: Optional[str] = None, initial_days: int = 1, include_updates: bool = False,
+                 timeout: float = 30, max_retries: int = 3, metrics=None,
+                 clock: Callable[[], float] = time.time, sleep: Callable[[float], None] = time.sleep):
+        # A session passed in (e.g. the scraper's) is closed by its owner
+        self._own_session = session is None
+        self.session = session or requests.Session()
+        self.url = url
+        self.state_path = state_path
+        self.initial_days = initial_days
+        self.include_updates = include_updates
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.metrics = metrics or NULL_METRICS
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._set_locks: Dict[str, threading.Lock] = {}
+        # Harvested during this run, per set
+        self._harvests: Dict[str, _SetHarvest] = {}
+        # Watermarks this run will move to, per category, once committed
+        self._pending: Dict[str, dict] = {}
+        self._state: Dict[str, dict] = self._load()
+
+    @property
+    def pending(self) -> Dict[str, dict]:
+        """Watermarks harvested this run but not committed yet, per category."""
+        with self._lock:
+            return dict(self._pending)
+
+    def stage(self, watermarks: Dict[str, dict]) -> None:
+        """Add watermarks harvested elsewhere (e.g. by a shard worker) to this run's pending ones."""
+        with self._lock:
+            for category, state in watermarks.items():
+                self._pending[category] = _newer(self._pending.get(category), state)
+
+    def commit(self) -> None:
+        """Persist this run's pending watermarks; the next run starts after them."""
+        with self._lock:
+            if self._pending:
+                self._save(self._pending)
+                self._pending.clear()
+
+    def close(self) -> None:
+        if self._own_session:
+            self.session.close()
+
+    def _load(self) -> Dict[str, dict]:
+        if not self.state_path or not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable arXiv harvest state {self.state_path}: {str(e)}")
+            return {}
+
+    def _save(self, updates: Dict[str, dict]) -> None:
+        # Re-read the file so categories another process moved meanwhile are kept
+        state = self._load() if self.state_path else dict(self._state)
+        for category, update in updates.items():
+            state[category] = _newer(state.get(category), update)
+        self._state = state
+        if not self.state_path:
+            return
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.state_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def watermark(self, category: str) -> Tuple[str, List[str]]:
+        """The day the next harvest for `category` starts from, and the ids already seen on it."""
+        with self._lock:
+            state = self._state.get(category)
+        if state:
+            return state['watermark'], state['boundary']
+        start = datetime.fromtimestamp(self._clock(), timezone.utc) - timedelta(days=self.initial_days)
+        return start.strftime('%Y-%m-%d'), []
+
+    def articles(self, url: str, topic: str) -> List[Article]:
+        """New papers in the category behind registry `url`, as articles for `topic`."""
+        return [record.to_article(topic) for record in self.new_records(arxiv_category(url))]
+
+    def new_records(self, category: str) -> List[ArxivRecord]:
+        since, boundary = self.watermark(category)
+        spec = set_spec(category)
+        with self._lock:
+            set_lock = self._set_locks.setdefault(spec, threading.Lock())
+        # Categories of one set share a harvest; the second one in waits for the first
+        with set_lock:
+            harvest = self._harvest_since(spec, since)
+
+        skip = set(boundary)
+        records = [
+            r for r in harvest.records
+            if r.datestamp >= since and not (r.datestamp == since and r.id in skip) and category in r.categories
+        ]
+        newest = max((r.datestamp for r in harvest.records), default=None)
+        if newest is not None and newest >= since:
+            seen_today = {r.id for r in harvest.records if r.datestamp == newest and category in r.categories}
+            if newest == since:
+                seen_today |= skip
+            with self._lock:
+                self._pending[category] = {'watermark': newest, 'boundary': sorted(seen_today)}
+        return [r for r in records if not r.deleted and (self.include_updates or not r.updated)]
+
+    def _harvest_since(self, spec: str, since: str) -> _SetHarvest:
+        harvest = self._harvests.get(spec)
+        if harvest is None:
+            harvest = self._harvests[spec] = _SetHarvest(since, self._list_records(spec, since))
+        elif since < harvest.since:
+            # An earlier watermark than this run has covered: fetch only the missing days
+            until = (datetime.strptime(harvest.since, '%Y-%m-%d') - timedelta(days=1)).strftime('%Y-%m-%d')
+            harvest.records = self._list_records(spec, since, until) + harvest.records
+            harvest.since = since
+        return harvest
+
+    def _list_records(self, spec: str, since: str, until: Optional[str] = None) -> List[ArxivRecord]:
+        params = {'verb': 'ListRecords', 'metadataPrefix': 'arXiv', 'set': spec, 'from': since}
+        if until:
+            params['until'] = until
+        records: List[ArxivRecord] = []
+        while True:
+            page, token = parse_list_records(self._get(params))
+            records.extend(page)
+            self.metrics.incr('arxiv_pages', set=spec)
+            if not token:
+                break
+            # Follow-up pages are requested by token alone
+            params = {'verb': 'ListRecords', 'resumptionToken': token}
+        self.metrics.incr('arxiv_records', len(records), set=spec)
+        return records
+
+    def _get(self, params: Dict[str, str]) -> bytes:
+        attempt = 0
+        while True:
+            try:
+                response = self.session.get(self.url, params=params, timeout=self.timeout)
+            except requests.RequestException as e:
+                raise ArxivHarvestError(f"Failed to harvest {self.url}: {str(e)}") from e
+            # arXiv asks harvesters to slow down with 503 and Retry-After
+            if response.status_code == 503 and attempt < self.max_retries:
+                attempt += 1
+                retry_after = response.headers.get('Retry-After', '')
+                self._sleep(min(float(retry_after) if retry_after.isdigit() else 10.0, 60.0))
+                continue
+            if response.status_code != 200:
+                raise ArxivHarvestError(f"Failed to harvest {self.url}: HTTP {response.status_code}")
+            self.metrics.incr('feed_bytes', len(response.content), feed=self.url)
+            return response.content
@@ -1,8 +1,10 @@
 import os
-from typing import List
+from typing import Dict, List, Optional
 from dataclasses import dataclass
 from dotenv import load_dotenv
 from datetime import datetime
+from .relevance import parse_keywords
+from .feed_registry import FeedRegistry
 
 @dataclass
 class Config:
@@ -15,17 +17,85 @@ class Config:
     topics: List[str]
     schedule_times: List[str]
     max_articles: int
+    max_per_topic: Optional[int] = None
+    max_per_source: int = 0
+    schedule_timezone: Optional[str] = None
+    schedule_state_path: Optional[str] = '.cache/scheduler.json'
+    schedule_overlap: str = 'skip'
+    run_timeout_seconds: float = 0
+    fetch_workers: int = 8
+    feed_registry_path: Optional[str] = None
+    feed_poll_state_path: Optional[str] = '.cache/feed_polls.json'
+    feed_max_poll_interval_hours: float = 24
+    arxiv_oai_url: str = 'https://oaipmh.arxiv.org/oai'
+    arxiv_state_path: Optional[str] = '.cache/arxiv_oai.json'
+    arxiv_initial_days: int = 1
+    arxiv_include_updates: bool = False
+    feed_cache_dir: Optional[str] = '.cache/feeds'
+    feed_cache_max_mb: float = 50
+    feed_cache_max_age_hours: float = 72
+    feed_max_bytes: int = 10 * 1024 * 1024
+    feed_stop_at_stale: bool = False
+    seen_db_path: Optional[str] = '.cache/seen.db'
+    seen_ttl_days: float = 30
+    summary_cache_path: Optional[str] = '.cache/summaries.db'
+    summary_cache_max_entries: int = 100_000
+    summary_cache_max_age_days: float = 90
+    llm_concurrency: int = 4
+    llm_requests_per_minute: float = 50
+    llm_tokens_per_minute: float = 40000
+    llm_max_retries: int = 3
+    llm_pack_size: int = 1
+    llm_pack_max_chars: int = 1200
+    llm_input_token_budget: int = 400
+    # Several providers enable routing between them (first is preferred until measured)
+    llm_providers: Optional[List[str]] = None
+    llm_api_keys: Optional[Dict[str, str]] = None
+    llm_hedge_after_seconds: float = 0
+    enrich_enabled: bool = False
+    enrich_cache_path: Optional[str] = '.cache/extracted.db'
+    enrich_cache_max_age_days: float = 30
+    enrich_workers: int = 4
+    enrich_per_host: int = 2
+    enrich_max_bytes: int = 2 * 1024 * 1024
+    enrich_timeout_seconds: float = 10
+    enrich_budget_seconds: float = 30
+    enrich_min_chars: int = 600
+    relevance_keywords: Optional[Dict[str, float]] = None
+    archive_path: Optional[str] = '.cache/archive.db'
+    archive_content_retention_days: float = 7
+    trend_points: float = 1.0
+    trend_window_days: int = 7
+    trend_baseline_days: int = 28
+    near_duplicate_threshold: float = 0.7
+    pipeline_queue_size: int = 32
+    work_queue_path: Optional[str] = None
+    shard_processes: int = 4
+    shard_lease_seconds: float = 120
+    shard_timeout_seconds: float = 600
+    run_deadline_seconds: float = 0
+    subscribers_db_path: Optional[str] = None
+    outbox_path: Optional[str] = '.cache/outbox.db'
+    outbox_batch_size: int = 50
+    outbox_max_attempts: int = 5
+    outbox_retention_days: float = 7
+    notifier_transport: str = 'twilio'
+    sms_concurrency: int = 4
+    sms_per_second: float = 1
+    sms_max_retries: int = 3
+    sms_max_segments: int = 10
+    sms_timeout_seconds: float = 30
+    metrics_enabled: bool = False
+    metrics_report_dir: Optional[str] = '.cache/metrics'
+    metrics_prometheus_file: Optional[str] = None
 
 def load_config() -> Config:
     load_dotenv()
     
     # Get and validate topics
     topics = [t.strip().lower() for t in os.getenv('TOPICS', '').split(',') if t.strip()]
-    valid_topics = [
-        "computer vision", "robotics", "llms", "nlp", "ml",
-        "blockchain", "cryptocurrency", "computational finance",
-        "reinforcement learning"
-    ]
+    feed_registry_path = os.getenv('FEED_REGISTRY_PATH') or None
+    valid_topics = FeedRegistry.load(feed_registry_path).topics()
     
     invalid_topics = [t for t in topics if t not in valid_topics]
     if invalid_topics:
@@ -52,8 +122,12 @@ def load_config() -> Config:
         # Default to 9 AM if no valid times provided
         schedule_times = ['09:00']
     
+    # LLM_PROVIDERS=openai,anthropic routes between both, each with its own <NAME>_API_KEY
+    llm_providers = [p.strip().lower() for p in os.getenv('LLM_PROVIDERS', '').split(',') if p.strip()]
+    llm_api_keys = {name: os.getenv(f'{name.upper()}_API_KEY') or os.getenv('LLM_API_KEY') for name in llm_providers}
+
     return Config(
-        llm_provider=os.getenv('LLM_PROVIDER', 'openai'),
+        llm_provider=llm_providers[0] if llm_providers else os.getenv('LLM_PROVIDER', 'openai'),
         llm_api_key=os.getenv('LLM_API_KEY'),
         twilio_account_sid=os.getenv('TWILIO_ACCOUNT_SID'),
         twilio_auth_token=os.getenv('TWILIO_AUTH_TOKEN'),
@@ -61,5 +135,75 @@ def load_config() -> Config:
         twilio_to_phone=os.getenv('TWILIO_TO_PHONE'),
         topics=topics,
         schedule_times=schedule_times,
-        max_articles=int(os.getenv('MAX_ARTICLES', '3'))
+        max_articles=int(os.getenv('MAX_ARTICLES', '3')),
+        max_per_topic=int(os.getenv('MAX_PER_TOPIC')) if os.getenv('MAX_PER_TOPIC') else None,
+        max_per_source=int(os.getenv('MAX_PER_SOURCE', '0')),
+        schedule_timezone=os.getenv('SCHEDULE_TIMEZONE') or None,
+        schedule_state_path=os.getenv('SCHEDULE_STATE_PATH', '.cache/scheduler.json') or None,
+        schedule_overlap=os.getenv('SCHEDULE_OVERLAP', 'skip').lower(),
+        run_timeout_seconds=float(os.getenv('RUN_TIMEOUT_SECONDS', '0')),
+        fetch_workers=int(os.getenv('FETCH_WORKERS', '8')),
+        feed_registry_path=feed_registry_path,
+        feed_poll_state_path=os.getenv('FEED_POLL_STATE_PATH', '.cache/feed_polls.json') or None,
+        feed_max_poll_interval_hours=float(os.getenv('FEED_MAX_POLL_INTERVAL_HOURS', '24')),
+        arxiv_oai_url=os.getenv('ARXIV_OAI_URL', 'https://oaipmh.arxiv.org/oai'),
+        arxiv_state_path=os.getenv('ARXIV_STATE_PATH', '.cache/arxiv_oai.json') or None,
+        arxiv_initial_days=int(os.getenv('ARXIV_INITIAL_DAYS', '1')),
+        arxiv_include_updates=os.getenv('ARXIV_INCLUDE_UPDATES', 'false').lower() in ('1', 'true', 'yes'),
+        feed_cache_dir=os.getenv('FEED_CACHE_DIR', '.cache/feeds') or None,
+        feed_cache_max_mb=float(os.getenv('FEED_CACHE_MAX_MB', '50')),
+        feed_cache_max_age_hours=float(os.getenv('FEED_CACHE_MAX_AGE_HOURS', '72')),
+        feed_max_bytes=int(os.getenv('FEED_MAX_BYTES', str(10 * 1024 * 1024))),
+        feed_stop_at_stale=os.getenv('FEED_STOP_AT_STALE', 'false').lower() in ('1', 'true', 'yes'),
+        seen_db_path=os.getenv('SEEN_DB_PATH', '.cache/seen.db') or None,
+        seen_ttl_days=float(os.getenv('SEEN_TTL_DAYS', '30')),
+        summary_cache_path=os.getenv('SUMMARY_CACHE_PATH', '.cache/summaries.db') or None,
+        summary_cache_max_entries=int(os.getenv('SUMMARY_CACHE_MAX_ENTRIES', '100000')),
+        summary_cache_max_age_days=float(os.getenv('SUMMARY_CACHE_MAX_AGE_DAYS', '90')),
+        llm_concurrency=int(os.getenv('LLM_CONCURRENCY', '4')),
+        llm_requests_per_minute=float(os.getenv('LLM_REQUESTS_PER_MINUTE', '50')),
+        llm_tokens_per_minute=float(os.getenv('LLM_TOKENS_PER_MINUTE', '40000')),
+        llm_max_retries=int(os.getenv('LLM_MAX_RETRIES', '3')),
+        llm_pack_size=int(os.getenv('LLM_PACK_SIZE', '1')),
+        llm_pack_max_chars=int(os.getenv('LLM_PACK_MAX_CHARS', '1200')),
+        llm_input_token_budget=int(os.getenv('LLM_INPUT_TOKEN_BUDGET', '400')),
+        llm_providers=llm_providers or None,
+        llm_api_keys=llm_api_keys or None,
+        llm_hedge_after_seconds=float(os.getenv('LLM_HEDGE_AFTER_SECONDS', '0')),
+        enrich_enabled=os.getenv('ENRICH_ENABLED', 'false').lower() in ('1', 'true', 'yes'),
+        enrich_cache_path=os.getenv('ENRICH_CACHE_PATH', '.cache/extracted.db') or None,
+        enrich_cache_max_age_days=float(os.getenv('ENRICH_CACHE_MAX_AGE_DAYS', '30')),
+        enrich_workers=int(os.getenv('ENRICH_WORKERS', '4')),
+        enrich_per_host=int(os.getenv('ENRICH_PER_HOST', '2')),
+        enrich_max_bytes=int(os.getenv('ENRICH_MAX_BYTES', str(2 * 1024 * 1024))),
+        enrich_timeout_seconds=float(os.getenv('ENRICH_TIMEOUT_SECONDS', '10')),
+        enrich_budget_seconds=float(os.getenv('ENRICH_BUDGET_SECONDS', '30')),
+        enrich_min_chars=int(os.getenv('ENRICH_MIN_CHARS', '600')),
+        relevance_keywords=parse_keywords(os.getenv('RELEVANCE_KEYWORDS', '')),
+        archive_path=os.getenv('ARCHIVE_PATH', '.cache/archive.db') or None,
+        archive_content_retention_days=float(os.getenv('ARCHIVE_CONTENT_RETENTION_DAYS', '7')),
+        trend_points=float(os.getenv('TREND_POINTS', '1')),
+        trend_window_days=int(os.getenv('TREND_WINDOW_DAYS', '7')),
+        trend_baseline_days=int(os.getenv('TREND_BASELINE_DAYS', '28')),
+        near_duplicate_threshold=float(os.getenv('NEAR_DUPLICATE_THRESHOLD', '0.7')),
+        pipeline_queue_size=int(os.getenv('PIPELINE_QUEUE_SIZE', '32')),
+        work_queue_path=os.getenv('WORK_QUEUE_PATH') or None,
+        shard_processes=int(os.getenv('SHARD_PROCESSES', '4')),
+        shard_lease_seconds=float(os.getenv('SHARD_LEASE_SECONDS', '120')),
+        shard_timeout_seconds=float(os.getenv('SHARD_TIMEOUT_SECONDS', '600')),
+        run_deadline_seconds=float(os.getenv('RUN_DEADLINE_SECONDS', '0')),
+        subscribers_db_path=os.getenv('SUBSCRIBERS_DB_PATH') or None,
+        outbox_path=os.getenv('OUTBOX_PATH', '.cache/outbox.db') or None,
+        outbox_batch_size=int(os.getenv('OUTBOX_BATCH_SIZE', '50')),
+        outbox_max_attempts=int(os.getenv('OUTBOX_MAX_ATTEMPTS', '5')),
+        outbox_retention_days=float(os.getenv('OUTBOX_RETENTION_DAYS', '7')),
+        notifier_transport=os.getenv('NOTIFIER_TRANSPORT', 'twilio').lower(),
+        sms_concurrency=int(os.getenv('SMS_CONCURRENCY', '4')),
+        sms_per_second=float(os.getenv('SMS_PER_SECOND', '1')),
+        sms_max_retries=int(os.getenv('SMS_MAX_RETRIES', '3')),
+        sms_max_segments=int(os.getenv('SMS_MAX_SEGMENTS', '10')),
+        sms_timeout_seconds=float(os.getenv('SMS_TIMEOUT_SECONDS', '30')),
+        metrics_enabled=os.getenv('METRICS_ENABLED', 'false').lower() in ('1', 'true', 'yes'),
+        metrics_report_dir=os.getenv('METRICS_REPORT_DIR', '.cache/metrics') or None,
+        metrics_prometheus_file=os.getenv('METRICS_PROMETHEUS_FILE') or None
     ) 
\ No newline at end of file
@@ -0,0 +1,69 @@
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from .metrics import NULL_METRICS
+
+def _rfc2822(text: str) -> datetime:
+    return parsedate_to_datetime(text)
+
+def _iso8601(text: str) -> datetime:
+    return datetime.fromisoformat(text)
+
+def _strptime(date_format: str) -> Callable[[str], datetime]:
+    return lambda text: datetime.strptime(text, date_format)
+
+# RSS pubDate is RFC 2822, Atom and dc:date are ISO 8601; the strptime formats
+# cover the remaining variants the original parser accepted
+STRATEGIES: List[Tuple[str, Callable[[str], datetime]]] = [
+    ('rfc2822', _rfc2822),
+    ('iso8601', _iso8601),
+    ('rss-gmt', _strptime('%a, %d %b %Y %H:%M:%S GMT')),
+    ('rss-naive', _strptime('%a, %d %b %Y %H:%M:%S')),
+]
+
+class DateParser:
+    """Feed date parser that remembers which strategy worked for each feed.
+
+    Items in one feed nearly always share a format, so after the first item the
+    remembered strategy succeeds on the first attempt. Repeated timestamp strings
+    (common in daily arXiv listings) are served from a small cache. Dates that no
+    strategy parses are counted as `dates_unparseable` in `metrics`.
+    """
+
+    def __init__(self, cache_size: int = 4096, metrics=None):
+        self.cache_size = cache_size
+        self.metrics = metrics or NULL_METRICS
+        self.attempts = 0
+        self.unparseable = 0
+        self._preferred: Dict[Optional[str], int] = {}
+        self._cache: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+
+    def parse(self, text: str, feed: Optional[str] = None) -> Optional[datetime]:
+        text = text.strip()
+        cached = self._cache.get(text)
+        if cached is not None:
+            return cached
+
+        preferred = self._preferred.get(feed, 0)
+        order = [preferred] + [i for i in range(len(STRATEGIES)) if i != preferred]
+        for index in order:
+            self.attempts += 1
+            try:
+                parsed = STRATEGIES[index][1](text)
+            except (TypeError, ValueError, IndexError):
+                continue
+            if not parsed.tzinfo:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            with self._lock:
+                self._preferred[feed] = index
+                if len(self._cache) >= self.cache_size:
+                    self._cache.clear()
+                self._cache[text] = parsed
+            return parsed
+
+        with self._lock:
+            self.unparseable += 1
+        self.metrics.incr('dates_unparseable')
+        return None
@@ -0,0 +1,292 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urlsplit
+import requests
+from lxml import etree
+from requests.adapters import HTTPAdapter
+from .metrics import NULL_METRICS
+from .models import Article
+from .prompts import html_to_text
+from .seen_store import LOOKUP_CHUNK, normalize_url
+
+# Elements whose text is article body, and elements that never are
+TEXT_TAGS = {'p', 'h1', 'h2', 'h3', 'h4', 'li', 'blockquote', 'pre', 'figcaption'}
+SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'nav', 'header', 'footer', 'aside', 'form',
+             'button', 'svg', 'iframe', 'select'}
+CONTAINER_TAGS = {'article', 'main'}
+# Outside <article>/<main>, shorter blocks are mostly menus, bylines and share buttons
+MIN_BLOCK_CHARS = 40
+# Below this much text in <article>/<main>, fall back to the whole page
+MIN_CONTAINER_CHARS = 200
+USER_AGENT = 'Mozilla/5.0 (compatible; news-summarizer/1.0)'
+
+def extract_main_text(chunks: Iterable[bytes], encoding: Optional[str] = None, max_chars: int = 20000) -> str:
+    """Main text of an HTML page, parsed incrementally as the chunks arrive.
+
+    Paragraph-like blocks are collected, preferring those inside `<article>` or
+    `<main>`, while navigation, scripts and other chrome are skipped. Each block is
+    cleared once read, so memory stays flat, and parsing stops after `max_chars`.
+    """
+    parser = etree.HTMLPullParser(events=('start', 'end'), encoding=encoding, recover=True,
+                                  remove_comments=True, no_network=True)
+    skipping = inside = 0
+    contained: List[str] = []
+    loose: List[str] = []
+    total = 0
+    for chunk in chunks:
+        parser.feed(chunk)
+        for event, element in parser.read_events():
+            tag = element.tag.lower() if isinstance(element.tag, str) else ''
+            if event == 'start':
+                if tag in SKIP_TAGS:
+                    skipping += 1
+                elif tag in CONTAINER_TAGS:
+                    inside += 1
+                continue
+            if tag in SKIP_TAGS:
+                skipping -= 1
+                element.clear(keep_tail=True)
+            elif tag in CONTAINER_TAGS:
+                inside -= 1
+            elif tag in TEXT_TAGS and not skipping:
+                text = ' '.join(''.join(element.itertext()).split())
+                if text:
+                    (contained if inside else loose).append(text)
+                    total += len(text)
+                # Nested blocks were already collected; clearing also frees the subtree
+                element.clear(keep_tail=True)
+        if total >= max_chars:
+            break
+    try:
+        parser.close()
+    except etree.LxmlError:
+        pass
+
+    if sum(len(t) for t in contained) >= MIN_CONTAINER_CHARS:
+        blocks = contained
+    else:
+        blocks = [t for t in contained + loose if len(t) >= MIN_BLOCK_CHARS]
+    return '\n\n'.join(blocks)[:max_chars]
+
+class ExtractionCache:
+    """Extracted article text by normalized URL, so a page is downloaded at most once.
+
+    Pages that yield no text are cached as an empty string for the same reason.
+    """
+
+    def __init__(self, path: str, max_age: float = 30 * 24 * 3600):
+        self.max_age = max_age
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS pages (key BLOB PRIMARY KEY, text TEXT NOT NULL, fetched_at REAL NOT NULL) '
+            'WITHOUT ROWID'
+        )
+        self._conn.commit()
+        self.evict()
+
+    @staticmethod
+    def _key(url: str) -> bytes:
+        return hashlib.sha256(normalize_url(url).encode('utf-8')).digest()[:16]
+
+    def get_many(self, urls: Iterable[str]) -> Dict[str, str]:
+        urls = list(dict.fromkeys(urls))
+        keys = {self._key(url): url for url in urls}
+        found = {}
+        cutoff = time.time() - self.max_age
+        key_list = list(keys)
+        with self._lock:
+            for start in range(0, len(key_list), LOOKUP_CHUNK):
+                chunk = key_list[start:start + LOOKUP_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f'SELECT key, text FROM pages WHERE key IN ({placeholders}) AND fetched_at >= ?',
+                    (*chunk, cutoff)
+                ).fetchall()
+                found.update((keys[key], text) for key, text in rows)
+        return found
+
+    def put(self, url: str, text: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO pages (key, text, fetched_at) VALUES (?, ?, ?)',
+                (self._key(url), text, time.time())
+            )
+            self._conn.commit()
+
+    def evict(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM pages WHERE fetched_at < ?', (time.time() - self.max_age,))
+            self._conn.commit()
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+class _CappedBody:
+    """A response's chunks up to `max_bytes`, ending early once the run's budget is spent.
+
+    `truncated` is set to why (`max_bytes` or `budget`) if the page was cut short.
+    """
+
+    def __init__(self, response, max_bytes: int, remaining: Callable[[], float]):
+        self.response = response
+        self.max_bytes = max_bytes
+        self.remaining = remaining
+        self.truncated: Optional[str] = None
+
+    def __iter__(self) -> Iterator[bytes]:
+        received = 0
+        for chunk in self.response.iter_content(chunk_size=16 * 1024):
+            received += len(chunk)
+            if received > self.max_bytes:
+                self.truncated = 'max_bytes'
+                yield chunk[:len(chunk) - (received - self.max_bytes)]
+                return
+            yield chunk
+            if self.remaining() <= 0:
+                self.truncated = 'budget'
+                return
+
+class Enricher:
+    """Replaces teaser `content` with the full article text for the articles it is given.
+
+    Pages are fetched on a pool of `workers` threads, with at most `per_host`
+    concurrent requests per site, `timeout` seconds per request and `max_bytes` per
+    page. All enrichment in a run shares one `budget` of seconds, counted from the
+    first call. Pages still pending when it runs out are skipped and their articles
+    keep their feed text. Articles whose content already has `min_chars` characters of
+    text (e.g. arXiv abstracts) are left alone.
+    """
+
+    def __init__(self, cache: Optional[ExtractionCache] = None, workers: int = 4, per_host: int = 2,
+                 max_bytes: int = 2 * 1024 * 1024, timeout: float = 10, budget: float = 30,
+                 min_chars: int = 600, metrics=None, clock: Callable[[], float] = time.monotonic):
+        self.cache = cache
+        self.workers = max(1, workers)
+        self.per_host = max(1, per_host)
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.budget = budget
+        self.min_chars = min_chars
+        self.metrics = metrics or NULL_METRICS
+        self._clock = clock
+        self._deadline: Optional[float] = None
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, threading.BoundedSemaphore] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': USER_AGENT, 'Accept': 'text/html,application/xhtml+xml'})
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.per_host)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def remaining(self) -> float:
+        with self._lock:
+            if self._deadline is None:
+                self._deadline = self._clock() + self.budget
+            return self._deadline - self._clock()
+
+    def needs_text(self, article: Article) -> bool:
+        return len(html_to_text(article.content)) < self.min_chars
+
+    def enrich(self, articles: List[Article]) -> int:
+        """Fill in full text where a teaser is all the feed had; returns how many articles changed."""
+        wanted = [a for a in articles if a.url and self.needs_text(a)]
+        if not wanted:
+            return 0
+        cached = self.cache.get_many(a.url for a in wanted) if self.cache is not None else {}
+        self.metrics.incr('enrich_cache_hits', len(cached))
+
+        enriched = sum(1 for a in wanted if a.url in cached and self._apply(a, cached[a.url]))
+        to_fetch: Dict[str, List[Article]] = {}
+        for article in wanted:
+            if article.url not in cached:
+                to_fetch.setdefault(article.url, []).append(article)
+        if not to_fetch:
+            return enriched
+
+        remaining = self.remaining()
+        if remaining <= 0:
+            self.metrics.incr('enrich_skipped', len(to_fetch), reason='budget')
+            return enriched
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='enrich')
+            executor = self._executor
+        futures = {executor.submit(self._fetch_text, url): url for url in to_fetch}
+        done, not_done = wait(futures, timeout=remaining)
+        for future in not_done:
+            future.cancel()
+        if not_done:
+            self.metrics.incr('enrich_skipped', len(not_done), reason='budget')
+            print(f"Warning: Enrichment budget of {self.budget}s used up; {len(not_done)} pages skipped")
+        for future in done:
+            text = future.result()
+            if text:
+                enriched += sum(1 for a in to_fetch[futures[future]] if self._apply(a, text))
+        return enriched
+
+    def _apply(self, article: Article, text: str) -> bool:
+        if len(text) <= len(html_to_text(article.content)):
+            return False
+        article.content = text
+        self.metrics.incr('articles_enriched')
+        return True
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).hostname or ''
+        with self._lock:
+            slot = self._hosts.get(host)
+            if slot is None:
+                slot = self._hosts[host] = threading.BoundedSemaphore(self.per_host)
+            return slot
+
+    def _fetch_text(self, url: str) -> Optional[str]:
+        """Download and extract one page; None on transient failures, which are not cached."""
+        with self._host_slot(url):
+            timeout = min(self.timeout, self.remaining())
+            if timeout <= 0:
+                return None
+            try:
+                with self.metrics.timer('enrich_fetch_seconds'):
+                    response = self.session.get(url, timeout=timeout, stream=True)
+                    with response:
+                        if response.status_code >= 500 or response.status_code == 429:
+                            self.metrics.incr('enrich_errors', reason='http')
+                            return None
+                        if response.status_code >= 400:
+                            text = ''
+                        else:
+                            # Without a declared charset, let the parser read the page's <meta> tag
+                            declared = 'charset' in response.headers.get('Content-Type', '').lower()
+                            body = _CappedBody(response, self.max_bytes, self.remaining)
+                            text = extract_main_text(body, encoding=response.encoding if declared else None)
+                            if body.truncated:
+                                self.metrics.incr('enrich_truncated', reason=body.truncated)
+                                # Good enough for this run, but a later one may get the whole page
+                                return text
+            except (requests.RequestException, etree.LxmlError) as e:
+                self.metrics.incr('enrich_errors', reason='fetch')
+                print(f"Error fetching full text of {url}: {str(e)}")
+                return None
+        if self.cache is not None:
+            self.cache.put(url, text)
+        return text
+
+    def close(self) -> None:
+        if self._executor is not None:
+            # Anything still running is abandoned; its result would only have gone to the cache
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+# Suffix of entries staged by a run that has not committed yet
+PENDING = '.pending'
+
+@dataclass
+class CachedFeed:
+    url: str
+    body: bytes
+    encoding: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        return self.body.decode(self.encoding or 'utf-8', errors='replace')
+
+class FeedCache:
+    """On-disk store of feed bodies plus the validators needed for conditional GETs.
+
+    Each URL is kept as a `<key>.json` metadata file next to a `<key>.body` file.
+    The body's mtime records when the entry was last validated against the server,
+    which drives both age expiry and least-recently-validated eviction.
+
+    A run `stage()`s what it downloads next to the entry (as `.pending` files) and
+    `commit()`s it once the run has delivered. Until then the old validators stay in
+    place, so a run that fails is sent the feed again instead of a 304.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 50 * 1024 * 1024, max_age: float = 72 * 3600):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _key(self, url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()[:32]
+
+    def _paths(self, key: str):
+        base = os.path.join(self.cache_dir, key)
+        return base + '.json', base + '.body'
+
+    def get(self, url: str) -> Optional[CachedFeed]:
+        meta_path, body_path = self._paths(self._key(url))
+        with self._lock:
+            try:
+                if time.time() - os.path.getmtime(body_path) > self.max_age:
+                    self._remove(meta_path, body_path)
+                    return None
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                with open(body_path, 'rb') as f:
+                    body = f.read()
+            except (OSError, ValueError):
+                return None
+        if meta.get('url') != url:
+            return None
+        return CachedFeed(
+            url=url,
+            body=body,
+            encoding=meta.get('encoding'),
+            etag=meta.get('etag'),
+            last_modified=meta.get('last_modified')
+        )
+
+    def put(self, entry: CachedFeed) -> None:
+        meta_path, body_path = self._paths(self._key(entry.url))
+        with self._lock:
+            # Write to temp files and rename so a crash never leaves a torn entry
+            self._write_atomic(body_path, entry.body)
+            self._write_atomic(meta_path, self._meta(entry))
+            self._evict()
+
+    def stage(self, entry: CachedFeed) -> None:
+        """Write `entry` aside; it replaces the cached copy only once committed."""
+        meta_path, body_path = self._paths(self._key(entry.url))
+        with self._lock:
+            self._write_atomic(body_path + PENDING, entry.body)
+            self._write_atomic(meta_path + PENDING, self._meta(entry))
+
+    def commit(self, urls) -> None:
+        """Make the staged entries of `urls` the cached ones."""
+        with self._lock:
+            for url in urls:
+                meta_path, body_path = self._paths(self._key(url))
+                if not os.path.exists(meta_path + PENDING):
+                    continue
+                try:
+                    # Without metadata the entry reads as missing, never as the new body with old validators
+                    self._remove(meta_path)
+                    os.replace(body_path + PENDING, body_path)
+                    os.replace(meta_path + PENDING, meta_path)
+                except OSError:
+                    continue
+            self._evict()
+
+    def _meta(self, entry: CachedFeed) -> bytes:
+        return json.dumps({
+            'url': entry.url,
+            'encoding': entry.encoding,
+            'etag': entry.etag,
+            'last_modified': entry.last_modified
+        }).encode('utf-8')
+
+    def touch(self, url: str) -> None:
+        """Mark an entry as freshly validated (e.g. after a 304 Not Modified)."""
+        _, body_path = self._paths(self._key(url))
+        with self._lock:
+            try:
+                os.utime(body_path, None)
+            except OSError:
+                pass
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        # Worker processes share the directory, and thread ids are only unique within a process
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _remove(self, *paths: str) -> None:
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _evict(self) -> None:
+        now = time.time()
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(PENDING):
+                # Left behind by a run that never committed
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    if now - os.path.getmtime(path) > self.max_age:
+                        self._remove(path)
+                except OSError:
+                    pass
+                continue
+            if not name.endswith('.body'):
+                continue
+            body_path = os.path.join(self.cache_dir, name)
+            meta_path = body_path[:-len('.body')] + '.json'
+            try:
+                stat = os.stat(body_path)
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.max_age:
+                self._remove(meta_path, body_path)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, meta_path, body_path))
+            total += stat.st_size
+
+        # Drop least recently validated entries until we fit the size budget
+        entries.sort()
+        for _, size, meta_path, body_path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(meta_path, body_path)
+            total -= size
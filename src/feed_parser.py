@@ -0,0 +1,155 @@
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Optional
+from lxml import etree
+
+# RSS 2.0 uses <item>, Atom uses <entry>; both may be namespaced
+ITEM_TAGS = {'item', 'entry'}
+# In order of preference when an item carries more than one date
+DATE_TAGS = ('pubDate', 'published', 'updated', 'date')
+
+@dataclass
+class FeedItem:
+    title: Optional[str]
+    link: Optional[str]
+    description: Optional[str]
+    date: Optional[str]
+    date_tag: Optional[str] = None
+
+class FeedStream:
+    """File-like reader over response chunks that stops after `max_bytes`.
+
+    If `on_complete` is given, the chunks are also kept and handed to it once the
+    body has been read in full (used to populate the feed cache). A stream closed
+    before the end (parsing stopped at `max_items` or a stale item) reads the rest
+    first, so the cache still gets the whole body.
+    """
+
+    def __init__(self, chunks: Iterable[bytes], max_bytes: Optional[int] = None,
+                 on_complete: Optional[Callable[[bytes], None]] = None, encoding: Optional[str] = None):
+        self._chunks = iter(chunks)
+        self._buffer = b''
+        self.max_bytes = max_bytes
+        self.on_complete = on_complete
+        self.encoding = encoding
+        self.bytes_read = 0
+        self.truncated = False
+        self.exhausted = False
+        # Set once a read() has returned b'', i.e. the parser has seen end-of-input
+        self.eof = False
+        self._kept: Optional[List[bytes]] = [] if on_complete else None
+
+    def read(self, size: int = -1) -> bytes:
+        while not self.exhausted and (size < 0 or len(self._buffer) < size):
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._finish()
+                break
+            if self.max_bytes is not None and self.bytes_read + len(chunk) > self.max_bytes:
+                chunk = chunk[:self.max_bytes - self.bytes_read]
+                self.truncated = True
+            self.bytes_read += len(chunk)
+            self._buffer += chunk
+            if self._kept is not None:
+                self._kept.append(chunk)
+            if self.truncated:
+                self.exhausted = True
+                self.close()
+        if size < 0 or size >= len(self._buffer):
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        if not data:
+            self.eof = True
+        return data
+
+    def _finish(self) -> None:
+        self.exhausted = True
+        if self.on_complete and not self.truncated:
+            self.on_complete(b''.join(self._kept))
+        self._kept = None
+
+    def _drain(self) -> None:
+        for chunk in self._chunks:
+            if self.max_bytes is not None and self.bytes_read + len(chunk) > self.max_bytes:
+                # Too big to cache in full; a partial body must never be served as the feed
+                self.truncated = True
+                break
+            self.bytes_read += len(chunk)
+            self._kept.append(chunk)
+        self._finish()
+
+    def close(self) -> None:
+        if self._kept is not None and not self.exhausted:
+            self._drain()
+        close = getattr(self._chunks, 'close', None)
+        if close:
+            close()
+
+def _local_name(tag) -> str:
+    # Comments and processing instructions have non-string tags
+    if not isinstance(tag, str):
+        return ''
+    return tag.rsplit('}', 1)[-1]
+
+def _text(element) -> str:
+    return ''.join(element.itertext()).strip()
+
+def _link(element) -> Optional[str]:
+    href = element.get('href')
+    if href is None:
+        return _text(element) or None
+    # Atom entries can carry several links; only rel="alternate" points at the article
+    if element.get('rel', 'alternate') != 'alternate':
+        return None
+    return href.strip() or None
+
+def _to_item(element) -> FeedItem:
+    fields = {}
+    for child in element:
+        name = _local_name(child.tag)
+        if name == 'link':
+            if 'link' not in fields:
+                link = _link(child)
+                if link:
+                    fields['link'] = link
+        elif name not in fields:
+            fields[name] = child
+
+    date_tag = next((tag for tag in DATE_TAGS if tag in fields), None)
+    description = fields.get('description')
+    if description is None:
+        description = fields.get('summary', fields.get('content'))
+
+    return FeedItem(
+        title=_text(fields['title']) if 'title' in fields else None,
+        link=fields.get('link'),
+        description=_text(description) if description is not None else None,
+        date=_text(fields[date_tag]) if date_tag else None,
+        date_tag=date_tag
+    )
+
+def iter_items(source: BinaryIO, encoding: Optional[str] = None) -> Iterator[FeedItem]:
+    """Incrementally parse an RSS or Atom document, yielding one item at a time.
+
+    Elements are cleared as soon as they have been converted, so memory use does not
+    grow with the number of items in the feed.
+    """
+    context = etree.iterparse(
+        source,
+        events=('end',),
+        encoding=encoding,
+        recover=True,
+        resolve_entities=False,
+        huge_tree=True
+    )
+    for _, element in context:
+        if _local_name(element.tag) not in ITEM_TAGS:
+            continue
+        # After a byte-capped read, anything closed at EOF is a half-received item
+        if getattr(source, 'truncated', False) and getattr(source, 'eof', False):
+            break
+        item = _to_item(element)
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+        yield item
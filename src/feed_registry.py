@@ -0,0 +1,163 @@
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+DEFAULT_REGISTRY_PATH = os.path.join(os.path.dirname(__file__), 'feeds.json')
+# `arxiv` feeds are harvested incrementally over OAI-PMH (see `arxiv_oai`); the URL names the category
+FEED_FORMATS = ('rss', 'atom', 'arxiv')
+ACCEPT_HEADERS = {
+    'rss': 'application/rss+xml, application/xml;q=0.9, */*;q=0.8',
+    'atom': 'application/atom+xml, application/xml;q=0.9, */*;q=0.8',
+    'arxiv': 'application/xml',
+}
+
+class FeedRegistryError(Exception):
+    pass
+
+@dataclass
+class Feed:
+    url: str
+    topics: List[str]
+    # Higher is fetched first
+    priority: int = 0
+    # Expected time between updates, used until the real cadence has been observed
+    cadence_hours: float = 1
+    max_items: Optional[int] = None
+    format: str = 'rss'
+
+class FeedRegistry:
+    """The feeds behind each topic, loaded from a JSON file (`src/feeds.json` by default)."""
+
+    def __init__(self, feeds: Iterable[Feed]):
+        self.feeds: Dict[str, Feed] = {}
+        for feed in feeds:
+            if feed.format not in FEED_FORMATS:
+                raise FeedRegistryError(f"Feed {feed.url}: unknown format '{feed.format}', expected one of {', '.join(FEED_FORMATS)}")
+            if not feed.topics:
+                raise FeedRegistryError(f"Feed {feed.url} has no topics")
+            self.feeds[feed.url] = feed
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> 'FeedRegistry':
+        path = path or DEFAULT_REGISTRY_PATH
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)['feeds']
+            return cls(
+                Feed(**dict(entry, topics=[t.strip().lower() for t in entry.get('topics', [])]))
+                for entry in entries
+            )
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            raise FeedRegistryError(f"Could not load feed registry {path}: {str(e)}") from e
+
+    def get(self, url: str) -> Feed:
+        # Feeds added outside the registry (e.g. in tests) get the defaults
+        return self.feeds.get(url) or Feed(url, [])
+
+    def topics(self) -> List[str]:
+        return list(dict.fromkeys(topic for feed in self.feeds.values() for topic in feed.topics))
+
+    def topic_feeds(self) -> Dict[str, List[str]]:
+        mapping: Dict[str, List[str]] = {}
+        for feed in self.feeds.values():
+            for topic in feed.topics:
+                mapping.setdefault(topic, []).append(feed.url)
+        return mapping
+
+@dataclass
+class FeedPollState:
+    last_polled: Optional[float] = None
+    # Publication time of the newest item seen so far
+    last_item: Optional[float] = None
+    # Learned seconds between updates (exponentially weighted)
+    interval: Optional[float] = None
+    updates: int = 0
+
+class PollSchedule:
+    """Learns how often each feed really updates and decides whether polling it now is worthwhile.
+
+    Every poll reports the publication times of the items it returned. Distinct times
+    newer than the last one seen are updates; their average spacing feeds an
+    exponentially weighted interval (a daily arXiv batch counts once, a busy Medium
+    tag many times). A feed is due once its next update is expected. If that moment
+    had already passed at the last poll without anything new, it is rechecked after a
+    quarter interval. No feed goes longer than `max_interval` seconds unpolled.
+    State is persisted to `path` as JSON.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_interval: float = 24 * 3600, smoothing: float = 0.3,
+                 clock: Callable[[], float] = time.time):
+        self.path = path
+        self.max_interval = max_interval
+        self.smoothing = smoothing
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._states: Dict[str, FeedPollState] = self._load()
+
+    def _load(self) -> Dict[str, FeedPollState]:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return {url: FeedPollState(**state) for url, state in json.load(f).items()}
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            print(f"Warning: Ignoring unreadable feed poll state {self.path}: {str(e)}")
+            return {}
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({url: asdict(state) for url, state in self._states.items()}, f)
+        os.replace(tmp_path, self.path)
+
+    def state(self, url: str) -> FeedPollState:
+        return self._states.get(url) or FeedPollState()
+
+    def interval(self, feed: Feed) -> float:
+        learned = self.state(feed.url).interval
+        return learned if learned else feed.cadence_hours * 3600
+
+    def next_poll(self, feed: Feed) -> float:
+        state = self.state(feed.url)
+        if state.last_polled is None:
+            return 0.0
+        interval = self.interval(feed)
+        anchor = state.last_item if state.last_item is not None else state.last_polled
+        expected = anchor + interval
+        if expected <= state.last_polled:
+            # The update was due by the last poll but had not arrived yet
+            expected = state.last_polled + interval / 4
+        return min(expected, state.last_polled + self.max_interval)
+
+    def is_due(self, feed: Feed, now: Optional[float] = None) -> bool:
+        return (self._clock() if now is None else now) >= self.next_poll(feed)
+
+    def observe(self, url: str, published: Iterable[datetime], polled_at: Optional[float] = None) -> None:
+        """Record a successful poll and the publication times of the items it returned."""
+        times = sorted({d.timestamp() for d in published if d is not None})
+        with self._lock:
+            state = self._states.setdefault(url, FeedPollState())
+            state.last_polled = self._clock() if polled_at is None else polled_at
+            if times:
+                if state.last_item is None:
+                    state.last_item = times[-1]
+                else:
+                    new = [t for t in times if t > state.last_item]
+                    if new:
+                        gap = (new[-1] - state.last_item) / len(new)
+                        if state.interval is None:
+                            state.interval = gap
+                        else:
+                            state.interval = self.smoothing * gap + (1 - self.smoothing) * state.interval
+                        state.last_item = new[-1]
+                        state.updates += len(new)
+            self._save()
@@ -0,0 +1,67 @@
+from dataclasses import dataclass
+from typing import Optional
+
+@dataclass
+class Completion:
+    text: str
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    # Which backend answered, when a router chose between several
+    provider: Optional[str] = None
+
+def _tokens(usage, field: str) -> Optional[int]:
+    value = getattr(usage, field, None)
+    return value if isinstance(value, int) else None
+
+class OpenAIBackend:
+    label = "OpenAI"
+    model = "gpt-3.5-turbo"
+
+    def __init__(self, api_key: str):
+        # Imported here so that runs using another provider never load the SDK
+        import openai
+        openai.api_key = api_key
+        self._openai = openai
+
+    def complete(self, system: str, prompt: str, max_tokens: int) -> Completion:
+        response = self._openai.ChatCompletion.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=max_tokens,
+            temperature=0.7
+        )
+        usage = getattr(response, 'usage', None)
+        return Completion(
+            response.choices[0].message.content.strip(),
+            _tokens(usage, 'prompt_tokens'),
+            _tokens(usage, 'completion_tokens')
+        )
+
+class AnthropicBackend:
+    label = "Anthropic"
+    model = "claude-3-haiku-20240307"
+
+    def __init__(self, api_key: str):
+        import anthropic
+        self.client = anthropic.Anthropic(api_key=api_key)
+
+    def complete(self, system: str, prompt: str, max_tokens: int) -> Completion:
+        response = self.client.messages.create(
+            model=self.model,
+            max_tokens=max_tokens,
+            temperature=0.7,
+            system=system,
+            messages=[{
+                "role": "user",
+                "content": prompt
+            }]
+        )
+        usage = getattr(response, 'usage', None)
+        return Completion(
+            response.content[0].text.strip(),
+            _tokens(usage, 'input_tokens'),
+            _tokens(usage, 'output_tokens')
+        )
@@ -0,0 +1,159 @@
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+from .llm_backends import Completion
+from .metrics import NULL_METRICS
+
+class ProviderHealth:
+    """Recent latencies and outcomes of one provider, over the last `window` requests."""
+
+    def __init__(self, window: int = 50, min_samples: int = 5):
+        self.min_samples = min_samples
+        self._latencies: deque = deque(maxlen=window)
+        self._outcomes: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self._outcomes.append(ok)
+            if ok:
+                self._latencies.append(seconds)
+
+    def p95(self, default: float) -> float:
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return default
+            ordered = sorted(self._latencies)
+        return ordered[math.ceil(0.95 * len(ordered)) - 1]
+
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            if not self._outcomes:
+                return 0.0
+            return 1 - sum(self._outcomes) / len(self._outcomes)
+
+class _Attempt:
+    def __init__(self, name: str, started: float):
+        self.name = name
+        self.started = started
+        # Set once the request has lost a hedge race; its late result is ignored
+        self.abandoned = False
+
+class LLMRouter:
+    """Sends each completion to the healthiest of several backends, hedging slow requests.
+
+    Backends are ranked by moving p95 latency divided by their recent success rate. The
+    request goes to the best one; if it has not answered within `hedge_after` seconds
+    (by default that backend's own p95), a duplicate goes to the next one and the first
+    reply wins. The loser is abandoned: its result is discarded and it is scored by how
+    long it had taken so far, so a backend that stalls drops in the ranking right away.
+    A failed request falls over to the next backend; only if all fail is the last
+    error raised. Looks like a single backend to `Summarizer`.
+    """
+
+    def __init__(self, backends: Dict[str, object], hedge_after: Optional[float] = None,
+                 default_latency: float = 5.0, window: int = 50, workers: int = 8, metrics=None,
+                 clock: Callable[[], float] = time.monotonic):
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend")
+        self.backends = dict(backends)
+        self.hedge_after = hedge_after
+        self.default_latency = default_latency
+        self.metrics = metrics or NULL_METRICS
+        self.health = {name: ProviderHealth(window) for name in self.backends}
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=max(2, workers), thread_name_prefix='llm')
+        self.label = ' / '.join(getattr(b, 'label', name) for name, b in self.backends.items())
+        # Part of the summary cache key, so changing the provider set starts a fresh cache
+        self.model = '|'.join(f"{name}:{getattr(b, 'model', '')}" for name, b in self.backends.items())
+
+    def ranked(self) -> List[str]:
+        """Backend names, healthiest first; ties keep the configured order."""
+        def cost(name: str) -> float:
+            health = self.health[name]
+            return health.p95(self.default_latency) / max(0.05, 1 - health.error_rate)
+        return sorted(self.backends, key=cost)
+
+    def hedge_delay(self, name: str) -> float:
+        if self.hedge_after:
+            return self.hedge_after
+        return self.health[name].p95(self.default_latency)
+
+    def complete(self, system: str, prompt: str, max_tokens: int) -> Completion:
+        candidates = iter(self.ranked())
+        futures: Dict[Future, _Attempt] = {}
+        errors: List[Exception] = []
+
+        def launch() -> Optional[str]:
+            name = next(candidates, None)
+            if name is not None:
+                attempt = _Attempt(name, self._clock())
+                futures[self._executor.submit(self._call, attempt, system, prompt, max_tokens)] = attempt
+            return name
+
+        primary = launch()
+        deadline = self._clock() + self.hedge_delay(primary)
+        hedged = len(self.backends) < 2
+        pending = set(futures)
+        while pending:
+            timeout = None if hedged else max(0.0, deadline - self._clock())
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                hedged = True
+                name = launch()
+                if name is not None:
+                    self.metrics.incr('llm_hedges', provider=name)
+                    pending = set(f for f in futures if not f.done())
+                continue
+            for future in done:
+                attempt = futures[future]
+                try:
+                    completion = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                self._abandon(pending, futures)
+                if attempt.name != primary:
+                    self.metrics.incr('llm_backup_wins', provider=attempt.name)
+                completion.provider = attempt.name
+                return completion
+            if not pending:
+                # Everything in flight failed; fall over to the next backend, if any
+                name = launch()
+                if name is not None:
+                    self.metrics.incr('llm_failovers', provider=name)
+                    hedged = True
+                    pending = set(f for f in futures if not f.done())
+        raise errors[-1]
+
+    def _call(self, attempt: _Attempt, system: str, prompt: str, max_tokens: int) -> Completion:
+        backend = self.backends[attempt.name]
+        try:
+            completion = backend.complete(system, prompt, max_tokens)
+        except Exception:
+            if not attempt.abandoned:
+                self.health[attempt.name].record(self._clock() - attempt.started, ok=False)
+            raise
+        elapsed = self._clock() - attempt.started
+        if not attempt.abandoned:
+            self.health[attempt.name].record(elapsed, ok=True)
+            self.metrics.observe('llm_provider_latency_seconds', elapsed, provider=attempt.name)
+        return completion
+
+    def _abandon(self, pending, futures: Dict[Future, _Attempt]) -> None:
+        now = self._clock()
+        for future in pending:
+            loser = futures[future]
+            # A request that has not started yet is dropped; a running one is left to finish unobserved
+            future.cancel()
+            loser.abandoned = True
+            if not future.done():
+                self.health[loser.name].record(now - loser.started, ok=True)
+            self.metrics.incr('llm_hedge_losses', provider=loser.name)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
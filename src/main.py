@@ -1,36 +1,352 @@
+import argparse
+import sys
+from typing import List, Optional
 from src.config import load_config
-from src.scraper import NewsScraper
-from src.summarizer import Summarizer
-from src.notifier import SMSNotifier
-from src.scheduler import Scheduler
+from src.scheduler import Scheduler, parse_timezone
+from src.metrics import Metrics, NULL_METRICS
+from src.providers import LLM_BACKENDS, NOTIFIER_TRANSPORTS
 
-def scrape_summarize_notify():
+# Everything that needs requests, lxml or a store is imported where a run needs it,
+# so `--check` and the scheduler's startup only load the configuration
+
+def scrape_summarize_notify(totals: Optional[Metrics] = None, slot_time: Optional[str] = None):
+    """Run once; `slot_time` (HH:MM) limits a subscriber registry run to the subscribers due then."""
     config = load_config()
-    scraper = NewsScraper()
-    summarizer = Summarizer(config)
-    notifier = SMSNotifier(config)
-
-    all_articles = []
-
-    for topic in config.topics:
-        # Get articles sorted by relevance
-        articles = scraper.get_articles_for_topic(topic)
-        # Take top N most relevant articles
-        articles = articles[:config.max_articles // len(config.topics)]
-        
-        for article in articles:
+    metrics = Metrics() if config.metrics_enabled else NULL_METRICS
+    try:
+        _run(config, metrics, slot_time)
+    finally:
+        if metrics.enabled:
+            _export_metrics(config, metrics, totals)
+
+def _export_metrics(config, metrics: Metrics, totals: Optional[Metrics]) -> None:
+    try:
+        if config.metrics_report_dir:
+            metrics.write_json(config.metrics_report_dir)
+        if config.metrics_prometheus_file:
+            # Prometheus counters must be monotonic, so export process totals when we have them
+            if totals is not None:
+                totals.merge(metrics)
+            (totals or metrics).write_prometheus(config.metrics_prometheus_file)
+    except OSError as e:
+        print(f"Error writing metrics: {str(e)}")
+
+def _run(config, metrics, slot_time: Optional[str] = None) -> None:
+    from src.archive import ArticleArchive
+    from src.enrichment import Enricher, ExtractionCache
+    from src.work_queue import WorkQueue
+
+    enricher = None
+    if config.enrich_enabled:
+        extraction_cache = None
+        if config.enrich_cache_path:
+            extraction_cache = ExtractionCache(
+                config.enrich_cache_path,
+                max_age=config.enrich_cache_max_age_days * 24 * 3600
+            )
+        enricher = Enricher(
+            extraction_cache,
+            workers=config.enrich_workers,
+            per_host=config.enrich_per_host,
+            max_bytes=config.enrich_max_bytes,
+            timeout=config.enrich_timeout_seconds,
+            budget=config.enrich_budget_seconds,
+            min_chars=config.enrich_min_chars,
+            metrics=metrics
+        )
+    archive = None
+    if config.archive_path:
+        archive = ArticleArchive(config.archive_path, content_retention=config.archive_content_retention_days * 24 * 3600)
+        archive.prune()
+    work_queue = None
+    if config.work_queue_path:
+        work_queue = WorkQueue(config.work_queue_path, lease=config.shard_lease_seconds)
+        work_queue.purge(24 * 3600)
+    try:
+        _run_with(config, metrics, enricher, archive, work_queue, slot_time)
+    finally:
+        if work_queue is not None:
+            work_queue.close()
+        if archive is not None:
+            archive.close()
+        if enricher is not None:
+            enricher.close()
+            if enricher.cache is not None:
+                enricher.cache.close()
+
+def _run_with(config, metrics, enricher, archive, work_queue, slot_time: Optional[str] = None) -> None:
+    from src.feed_registry import PollSchedule
+    from src.outbox import Outbox, OutboxWorker
+    from src.pipeline import Pipeline
+    from src.seen_store import SeenStore
+    from src.subscribers import DigestFanOut, SubscriberRegistry
+    from src.summarizer import Summarizer
+    from src.summary_cache import SummaryCache
+    from src.work_queue import ShardCoordinator
+
+    registry = None
+    if config.subscribers_db_path:
+        registry = SubscriberRegistry(config.subscribers_db_path)
+        if not len(registry):
+            registry.close()
+            registry = None
+
+    seen_store = summary_cache = outbox = scraper = summarizer = None
+    try:
+        if config.seen_db_path:
+            seen_store = SeenStore(config.seen_db_path, ttl=config.seen_ttl_days * 24 * 3600)
+        # Trending terms are read once per run from the archive's daily aggregates
+        trends = None
+        if archive is not None and config.trend_points:
+            trends = archive.trend_boosts(config.trend_window_days, config.trend_baseline_days)
+            if trends:
+                print(f"Trending: {', '.join(list(trends)[:5])}")
+        poll_schedule = None
+        if config.feed_poll_state_path:
+            poll_schedule = PollSchedule(
+                config.feed_poll_state_path,
+                max_interval=config.feed_max_poll_interval_hours * 3600
+            )
+        scraper = _build_scraper(
+            config,
+            metrics,
+            # With subscribers, dedup happens per recipient in DigestFanOut instead
+            seen_store=seen_store if registry is None else None,
+            trends=trends,
+            poll_schedule=poll_schedule
+        )
+        coordinator = None
+        if work_queue is not None:
+            coordinator = ShardCoordinator(
+                work_queue,
+                scraper.feeds,
+                poll_schedule=poll_schedule,
+                processes=config.shard_processes,
+                worker_target=run_worker,
+                timeout=config.shard_timeout_seconds,
+                trends=trends,
+                scraper=scraper,
+                metrics=metrics
+            )
+        if config.summary_cache_path:
+            summary_cache = SummaryCache(
+                config.summary_cache_path,
+                max_entries=config.summary_cache_max_entries,
+                max_age=config.summary_cache_max_age_days * 24 * 3600
+            )
+        summarizer = Summarizer(config, cache=summary_cache, metrics=metrics)
+        notifier = NOTIFIER_TRANSPORTS.create(config.notifier_transport, config, metrics=metrics)
+        outbox_worker = None
+        if config.outbox_path:
+            outbox = Outbox(config.outbox_path, max_attempts=config.outbox_max_attempts)
+            outbox.purge(config.outbox_retention_days * 24 * 3600)
+            outbox_worker = OutboxWorker(outbox, notifier, batch_size=config.outbox_batch_size, metrics=metrics)
+
+        if registry is not None:
             try:
-                article.summary = summarizer.summarize(article)
-                all_articles.append(article)
-            except Exception as e:
-                print(f"Error summarizing article {article.title}: {str(e)}")
+                subscribers = registry.due(slot_time, config.schedule_times)
+            finally:
+                registry.close()
+            fan_out = DigestFanOut(scraper, summarizer, notifier, seen_store=seen_store, metrics=metrics,
+                                   outbox_worker=outbox_worker, enricher=enricher, archive=archive,
+                                   fetcher=coordinator)
+            result = fan_out.run(subscribers)
+            # Feeds and papers of a digest that failed are read again next run; the seen store drops the delivered ones
+            if not result.failed:
+                scraper.commit()
+            metrics.incr('articles_summarized', result.summarized)
+            metrics.incr('articles_delivered', sum(result.delivered.values()))
+            print(f"Delivered digests to {len(result.delivered)} of {len(subscribers)} subscribers "
+                  f"({result.topics} topics, {result.summarized} summaries)")
+            return
+
+        # Fetch, selection, summarization and SMS delivery overlap: picks start summarizing
+        # once no pending feed can displace them, and each SMS goes out once it is full
+        per_topic = config.max_per_topic
+        if per_topic is None:
+            # An even share, rounded up so a quiet topic's slots can go to busier ones
+            per_topic = -(-config.max_articles // max(1, len(config.topics)))
+        pipeline = Pipeline(
+            scraper,
+            summarizer,
+            notifier,
+            config.topics,
+            per_topic=per_topic or None,
+            max_articles=config.max_articles,
+            per_source=config.max_per_source or None,
+            fetch_workers=config.fetch_workers,
+            summarize_workers=config.llm_concurrency,
+            queue_size=config.pipeline_queue_size,
+            deadline=config.run_deadline_seconds or None,
+            metrics=metrics,
+            outbox_worker=outbox_worker,
+            enricher=enricher,
+            archive=archive,
+            fetcher=coordinator
+        )
+        with metrics.timer('stage_seconds', stage='pipeline'):
+            result = pipeline.run()
+        # A run cut short may have dropped picks, so its feeds and arXiv papers are read again next time
+        if not result.cancelled:
+            scraper.commit()
+        metrics.incr('articles_summarized', result.summarized)
+        metrics.incr('articles_delivered', len(result.delivered))
+
+        if summary_cache is not None:
+            stats = summary_cache.stats()
+            print(f"Summary cache: {stats['hits']} hits, {stats['misses']} misses")
+        prompt_stats = summarizer.prompts.stats
+        if prompt_stats.articles:
+            print(f"Prompts: {prompt_stats.prompt_tokens} input tokens for {prompt_stats.articles} articles "
+                  f"({prompt_stats.tokens_saved} saved by the input budget)")
+    finally:
+        if summarizer is not None:
+            summarizer.close()
+        if scraper is not None:
+            scraper.close()
+        if outbox is not None:
+            outbox.close()
+        if summary_cache is not None:
+            summary_cache.close()
+        if seen_store is not None:
+            seen_store.close()
+        if registry is not None:
+            registry.close()
 
+def _build_scraper(config, metrics, seen_store=None, trends=None, poll_schedule=None):
+    from src.arxiv_oai import ArxivHarvester
+    from src.feed_cache import FeedCache
+    from src.feed_registry import FeedRegistry
+    from src.near_duplicates import NearDuplicateDetector
+    from src.relevance import RelevanceScorer
+    from src.scraper import NewsScraper
+
+    feed_cache = None
+    if config.feed_cache_dir:
+        feed_cache = FeedCache(
+            config.feed_cache_dir,
+            max_bytes=int(config.feed_cache_max_mb * 1024 * 1024),
+            max_age=config.feed_cache_max_age_hours * 3600
+        )
+    return NewsScraper(
+        max_workers=config.fetch_workers,
+        cache=feed_cache,
+        max_feed_bytes=config.feed_max_bytes,
+        stop_at_stale=config.feed_stop_at_stale,
+        seen_store=seen_store,
+        scorer=RelevanceScorer(config.relevance_keywords, trends=trends, max_trend_score=config.trend_points),
+        metrics=metrics,
+        near_duplicates=NearDuplicateDetector(config.near_duplicate_threshold) if config.near_duplicate_threshold else None,
+        feeds=FeedRegistry.load(config.feed_registry_path),
+        poll_schedule=poll_schedule,
+        arxiv=ArxivHarvester(
+            url=config.arxiv_oai_url,
+            state_path=config.arxiv_state_path,
+            initial_days=config.arxiv_initial_days,
+            include_updates=config.arxiv_include_updates,
+            metrics=metrics
+        )
+    )
+
+def run_worker(run_id: Optional[str] = None) -> bool:
+    """Work on feed units from WORK_QUEUE_PATH until interrupted or, with `run_id`, until that run has none left."""
+    from src.work_queue import ShardWorker, WorkQueue
+
+    config = load_config()
+    if not config.work_queue_path:
+        print("Error: WORK_QUEUE_PATH is not set")
+        return False
+    work_queue = WorkQueue(config.work_queue_path, lease=config.shard_lease_seconds)
+    try:
+        ShardWorker(work_queue, lambda metrics: _build_scraper(config, metrics)).run(run_id)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        work_queue.close()
+    return True
+
+def check_config(config) -> bool:
+    """Print what a run would use; provider SDKs are resolved by name but not imported."""
+    ok = True
+    providers = [(LLM_BACKENDS, name) for name in config.llm_providers or [config.llm_provider]]
+    for registry, name in providers + [(NOTIFIER_TRANSPORTS, config.notifier_transport)]:
+        if name in registry:
+            print(f"{registry.kind[0].upper()}{registry.kind[1:]}: {name} ({registry.target(name)})")
+        else:
+            print(f"Error: Unknown {registry.kind} '{name}', expected one of {', '.join(registry.names())}")
+            ok = False
+    print(f"Topics: {', '.join(config.topics) or '(none)'}")
+    print(f"Schedule: {', '.join(config.schedule_times)} ({config.schedule_timezone or 'local time'})")
+    return ok
+
+def search_archive(config, query: Optional[str] = None) -> bool:
+    """Print archived articles matching `query`, or the trending terms when there is no query."""
+    from src.archive import ArticleArchive
+
+    if not config.archive_path:
+        print("Error: ARCHIVE_PATH is not set")
+        return False
+    archive = ArticleArchive(config.archive_path)
     try:
-        notifier.send_notifications(all_articles)
-    except Exception as e:
-        print(f"Error sending notifications: {str(e)}")
+        if query is None:
+            for term, lift in archive.trending(config.trend_window_days, config.trend_baseline_days):
+                print(f"{lift:6.2f}x  {term}")
+            return True
+        for article in archive.search(query):
+            delivered = ' (sent)' if article.delivered_at else ''
+            print(f"[{article.topic}] {article.title}{delivered}\n  {article.url}")
+            if article.summary:
+                print(f"  {article.summary}")
+        return True
+    finally:
+        archive.close()
+
+def run_scheduler(config) -> None:
+    totals = Metrics() if config.metrics_enabled else None
+    schedule_times = list(config.schedule_times)
+    if config.subscribers_db_path:
+        from src.subscribers import SubscriberRegistry
+        registry = SubscriberRegistry(config.subscribers_db_path)
+        schedule_times = sorted(set(schedule_times) | set(registry.schedule_times()))
+        registry.close()
+
+    def task():
+        slot = scheduler.current_slot
+        scrape_summarize_notify(totals, slot_time=slot.strftime('%H:%M') if slot else None)
+
+    scheduler = Scheduler(
+        schedule_times,
+        task,
+        metrics=totals,
+        tz=parse_timezone(config.schedule_timezone),
+        timeout=config.run_timeout_seconds or None,
+        overlap=config.schedule_overlap,
+        state_path=config.schedule_state_path
+    )
+    scheduler.start()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Scrape, summarize and text AI news on a schedule.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--once', action='store_true', help='run a single pass now and exit (for cron/containers)')
+    mode.add_argument('--check', action='store_true', help='validate the configuration and exit')
+    mode.add_argument('--worker', action='store_true', help='process feed work units from WORK_QUEUE_PATH until interrupted')
+    mode.add_argument('--search', metavar='QUERY', help='search archived articles and exit')
+    mode.add_argument('--trending', action='store_true', help='list terms trending in the archive and exit')
+    parser.add_argument('--slot', help='with --once, the HH:MM slot whose subscribers are due')
+    args = parser.parse_args(argv)
+
+    if args.check:
+        return 0 if check_config(load_config()) else 1
+    if args.worker:
+        return 0 if run_worker() else 1
+    if args.search is not None or args.trending:
+        return 0 if search_archive(load_config(), args.search) else 1
+    if args.once:
+        scrape_summarize_notify(slot_time=args.slot)
+        return 0
+    run_scheduler(load_config())
+    return 0
 
 if __name__ == "__main__":
-    config = load_config()
-    scheduler = Scheduler(config.schedule_times, scrape_summarize_notify)
-    scheduler.start() 
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,182 @@
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+# Quantiles come from the most recent samples; count and sum stay exact
+MAX_SAMPLES = 1024
+
+def _key(name: str, labels: Dict[str, object]) -> LabelKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _format_key(key: LabelKey) -> str:
+    name, labels = key
+    if not labels:
+        return name
+    return name + '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}'
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+class _Timing:
+    __slots__ = ('count', 'total', 'samples')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.samples: List[float] = []
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.samples.append(seconds)
+        if len(self.samples) > 2 * MAX_SAMPLES:
+            del self.samples[:-MAX_SAMPLES]
+
+class Metrics:
+    """Thread-safe counters and timings for a pipeline run (or, merged, for a process)."""
+
+    enabled = True
+
+    def __init__(self):
+        self.started_at = datetime.now(timezone.utc)
+        self._counters: Dict[LabelKey, float] = {}
+        self._timings: Dict[LabelKey, _Timing] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, value: float = 1, **labels) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            timing = self._timings.get(key)
+            if timing is None:
+                timing = self._timings[key] = _Timing()
+            timing.add(seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def counter(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(_key(name, labels), 0)
+
+    def counters(self) -> List[Tuple[str, Dict[str, str], float]]:
+        """Every counter as (name, labels, value), e.g. to ship a worker's counts to the coordinator."""
+        with self._lock:
+            return [(name, dict(labels), value) for (name, labels), value in sorted(self._counters.items())]
+
+    def merge(self, other: 'Metrics') -> None:
+        """Fold another run's metrics in, e.g. to keep process-lifetime Prometheus counters."""
+        with other._lock:
+            counters = list(other._counters.items())
+            timings = [(k, list(t.samples), t.count, t.total) for k, t in other._timings.items()]
+        with self._lock:
+            for key, value in counters:
+                self._counters[key] = self._counters.get(key, 0) + value
+            for key, samples, count, total in timings:
+                timing = self._timings.get(key)
+                if timing is None:
+                    timing = self._timings[key] = _Timing()
+                timing.count += count
+                timing.total += total
+                timing.samples.extend(samples)
+                del timing.samples[:-MAX_SAMPLES]
+
+    def report(self) -> dict:
+        with self._lock:
+            counters = {_format_key(k): v for k, v in sorted(self._counters.items())}
+            timings = {
+                _format_key(k): {
+                    'count': t.count,
+                    'total_s': round(t.total, 6),
+                    'p50_s': round(_percentile(t.samples, 0.5), 6),
+                    'p95_s': round(_percentile(t.samples, 0.95), 6),
+                    'max_s': round(max(t.samples), 6)
+                }
+                for k, t in sorted(self._timings.items()) if t.samples
+            }
+        return {
+            'started_at': self.started_at.isoformat(),
+            'finished_at': datetime.now(timezone.utc).isoformat(),
+            'counters': counters,
+            'timings': timings
+        }
+
+    def write_json(self, directory: str) -> str:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"run-{self.started_at.strftime('%Y%m%dT%H%M%SZ')}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+        return path
+
+    def to_prometheus(self, prefix: str = 'textalert_') -> str:
+        """Render the run in Prometheus text exposition format (counters and summaries)."""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            timings = [(k, list(t.samples), t.count, t.total) for k, t in sorted(self._timings.items()) if t.samples]
+
+        declared = set()
+        for (name, labels), value in counters:
+            metric = prefix + re.sub(r'[^a-zA-Z0-9_]', '_', name)
+            if metric not in declared:
+                lines.append(f'# TYPE {metric} counter')
+                declared.add(metric)
+            lines.append(f'{_format_key((metric, labels))} {value}')
+
+        for (name, labels), samples, count, total in timings:
+            metric = prefix + re.sub(r'[^a-zA-Z0-9_]', '_', name)
+            if metric not in declared:
+                lines.append(f'# TYPE {metric} summary')
+                declared.add(metric)
+            for quantile in (0.5, 0.95):
+                quantile_labels = labels + (('quantile', str(quantile)),)
+                lines.append(f'{_format_key((metric, quantile_labels))} {_percentile(samples, quantile)}')
+            lines.append(f'{_format_key((metric + "_sum", labels))} {total}')
+            lines.append(f'{_format_key((metric + "_count", labels))} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write-then-rename so a scraping node_exporter never reads a partial file
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+class NullMetrics:
+    """Drop-in for Metrics when instrumentation is disabled; every hook is a no-op."""
+
+    enabled = False
+    _timer = nullcontext()
+
+    def incr(self, name: str, value: float = 1, **labels) -> None:
+        pass
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        pass
+
+    def timer(self, name: str, **labels):
+        return self._timer
+
+    def counter(self, name: str, **labels) -> float:
+        return 0
+
+NULL_METRICS = NullMetrics()
@@ -1,6 +1,6 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 @dataclass
 class Article:
@@ -10,4 +10,9 @@ class Article:
     content: str
     summary: Optional[str] = None
     published_date: Optional[datetime] = None
-    relevance_score: float = 0.0  # Higher score means more relevant/trending 
\ No newline at end of file
+    relevance_score: float = 0.0  # Higher score means more relevant/trending
+    # URLs of near-duplicate copies (reposts, cross-lists) this article stands for
+    alternates: List[str] = field(default_factory=list)
+    # Structured metadata where the source has it (arXiv)
+    authors: List[str] = field(default_factory=list)
+    affiliations: List[str] = field(default_factory=list)
@@ -0,0 +1,204 @@
+import re
+import threading
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from .models import Article
+from .seen_store import normalize_url
+
+TAG = re.compile(r'<[^>]+>')
+TOKEN = re.compile(r'[a-z0-9]+')
+HASH_BITS = 64
+HASH_MASK = (1 << HASH_BITS) - 1
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+
+Signature = Tuple[int, ...]
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """Word `size`-grams of the lowercased text with markup and punctuation stripped."""
+    tokens = TOKEN.findall(TAG.sub(' ', text).lower())
+    if len(tokens) <= size:
+        return {' '.join(tokens)} if tokens else set()
+    return {' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+class MinHasher:
+    """MinHash signatures by one-permutation hashing with rotation densification.
+
+    Classic MinHash evaluates `num_perm` hash functions per shingle. Here each shingle
+    is hashed once: the hash picks one of `num_perm` bins and the bin keeps its
+    smallest value. Empty bins borrow the next non-empty bin's value (offset by the
+    distance), which preserves the collision probability LSH relies on.
+    """
+
+    def __init__(self, num_perm: int = 64):
+        self.num_perm = num_perm
+        self._span = (1 << HASH_BITS) // num_perm + 1
+
+    def signature(self, features: Iterable[str]) -> Signature:
+        k = self.num_perm
+        bins = [None] * k
+        for feature in features:
+            # CRC32 is fast but weak in the low bits; a multiplicative (Fibonacci) mix spreads it over 64 bits
+            h = (zlib.crc32(feature.encode('utf-8')) * GOLDEN_GAMMA) & HASH_MASK
+            slot, value = h % k, h // k
+            current = bins[slot]
+            if current is None or value < current:
+                bins[slot] = value
+        if all(value is None for value in bins):
+            return ()
+        signature = []
+        for i in range(k):
+            distance = 0
+            value = bins[i]
+            while value is None:
+                distance += 1
+                value = bins[(i + distance) % k]
+            signature.append(value + distance * self._span)
+        return tuple(signature)
+
+def similarity(left: Signature, right: Signature) -> float:
+    """Estimated Jaccard similarity of the two feature sets."""
+    if not left or not right:
+        return 0.0
+    return sum(1 for x, y in zip(left, right) if x == y) / len(left)
+
+class LSHIndex:
+    """Banded locality-sensitive hashing over MinHash signatures.
+
+    Signatures are cut into `bands` bands of equal width; two signatures become
+    candidates when any band matches exactly. A lookup touches one bucket per band,
+    so its cost depends on the number of near matches, not on the index size.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.rows = num_perm // bands
+        self._buckets: List[Dict[Signature, List[int]]] = [{} for _ in range(bands)]
+
+    def _bands(self, signature: Signature) -> Iterable[Tuple[int, Signature]]:
+        for band in range(len(self._buckets)):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def add(self, key: int, signature: Signature) -> None:
+        for band, chunk in self._bands(signature):
+            self._buckets[band].setdefault(chunk, []).append(key)
+
+    def candidates(self, signature: Signature) -> List[int]:
+        found = []
+        seen = set()
+        for band, chunk in self._bands(signature):
+            for key in self._buckets[band].get(chunk, ()):
+                if key not in seen:
+                    seen.add(key)
+                    found.append(key)
+        return found
+
+class NearDuplicateDetector:
+    """Collapses near-duplicate articles (reposts, cross-lists) into their best-scored copy.
+
+    Similarity is MinHash-estimated Jaccard over word shingles of title + content. With
+    the default 64 permutations in 16 bands, pairs above ~0.5 similarity are very likely
+    to be compared and only those reaching `threshold` are merged. Signatures are cached
+    by normalized URL, so an article that appears under several topics is hashed once.
+    """
+
+    def __init__(self, threshold: float = 0.7, num_perm: int = 64, bands: int = 16, shingle_size: int = 3):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.hasher = MinHasher(num_perm)
+        self._signatures: Dict[str, Signature] = {}
+        self._lock = threading.Lock()
+
+    def signature(self, article: Article) -> Signature:
+        key = normalize_url(article.url)
+        cached = self._signatures.get(key)
+        if cached is None:
+            cached = self.hasher.signature(shingles(f"{article.title}\n{article.content}", self.shingle_size))
+            with self._lock:
+                self._signatures[key] = cached
+        return cached
+
+    def collapse(self, articles: Sequence[Article]) -> List[Article]:
+        """Return one representative per cluster (the highest `relevance_score`), in input order.
+
+        Each representative's `alternates` lists the URLs of the copies it stands for.
+        """
+        index = LSHIndex(self.num_perm, self.bands)
+        clusters: List[List[Article]] = []
+        signatures: List[Signature] = []
+        # Best first, so every cluster's first member is its representative
+        for article in sorted(articles, key=lambda a: a.relevance_score, reverse=True):
+            signature = self.signature(article)
+            match = None
+            if signature:
+                for cluster_id in index.candidates(signature):
+                    if similarity(signature, signatures[cluster_id]) >= self.threshold:
+                        match = cluster_id
+                        break
+            if match is None:
+                clusters.append([article])
+                signatures.append(signature)
+                if signature:
+                    index.add(len(clusters) - 1, signature)
+            else:
+                clusters[match].append(article)
+
+        representatives = set()
+        for cluster in clusters:
+            representative = cluster[0]
+            representatives.add(id(representative))
+            if len(cluster) > 1:
+                _merge_alternates(representative, cluster[1:])
+        return [a for a in articles if id(a) in representatives]
+
+class StreamingCollapser:
+    """Incremental `NearDuplicateDetector.collapse` for articles that arrive one at a time.
+
+    The caller decides what happens on a match: `absorb` folds a copy into its cluster's
+    representative, `promote` makes a better-scored copy the new representative.
+    """
+
+    def __init__(self, detector: NearDuplicateDetector):
+        self.detector = detector
+        self._index = LSHIndex(detector.num_perm, detector.bands)
+        self._representatives: List[Article] = []
+        self._signatures: List[Signature] = []
+        self._clusters: Dict[int, int] = {}
+
+    def match(self, article: Article) -> Optional[Article]:
+        """The representative of the cluster `article` belongs to, if any."""
+        signature = self.detector.signature(article)
+        if not signature:
+            return None
+        for cluster_id in self._index.candidates(signature):
+            if similarity(signature, self._signatures[cluster_id]) >= self.detector.threshold:
+                return self._representatives[cluster_id]
+        return None
+
+    def add(self, article: Article) -> None:
+        """Start a new cluster with `article` as its representative."""
+        signature = self.detector.signature(article)
+        cluster_id = len(self._representatives)
+        self._representatives.append(article)
+        self._signatures.append(signature)
+        self._clusters[id(article)] = cluster_id
+        if signature:
+            self._index.add(cluster_id, signature)
+
+    def absorb(self, representative: Article, copy: Article) -> None:
+        _merge_alternates(representative, [copy])
+
+    def promote(self, representative: Article, copy: Article) -> None:
+        cluster_id = self._clusters.pop(id(representative))
+        _merge_alternates(copy, [representative])
+        self._representatives[cluster_id] = copy
+        self._clusters[id(copy)] = cluster_id
+
+def _merge_alternates(representative: Article, copies: Sequence[Article]) -> None:
+    # A new list: topic copies made with dataclasses.replace share the old one
+    urls = [url for a in copies for url in [a.url, *a.alternates] if url != representative.url]
+    representative.alternates = representative.alternates + [
+        url for url in dict.fromkeys(urls) if url not in representative.alternates
+    ]
@@ -1,60 +1,173 @@
-from typing import List
-from twilio.rest import Client
-from twilio.base.exceptions import TwilioRestException
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import List, Optional, Sequence, Tuple
+import requests
+from requests.adapters import HTTPAdapter
 from .models import Article
 from .config import Config
+from .metrics import NULL_METRICS
+from .rate_limit import TokenBucket
+from .sms import encoding, normalize_gsm7, pack, segment_count
 
 class NotifierError(Exception):
     pass
 
+@dataclass
+class SMSMessage:
+    body: str
+    articles: List[Article] = field(default_factory=list)
+
+    @property
+    def encoding(self) -> str:
+        return encoding(self.body)
+
+    @property
+    def segments(self) -> int:
+        return segment_count(self.body)
+
+@dataclass
+class DeliveryResult:
+    message: SMSMessage
+    to: str
+    sid: Optional[str] = None
+    attempts: int = 0
+    error: Optional[str] = None
+    retryable: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+def is_retryable(error: Exception) -> bool:
+    """Twilio rate limits (429), server errors (5xx) and network failures are worth retrying."""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    status = getattr(error, 'status', None)
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
 class SMSNotifier:
-    def __init__(self, config: Config):
+    """Sends messages through Twilio (the `twilio` notifier transport)."""
+
+    # Failures of a single send; anything else is a bug and propagates
+    send_errors = (requests.RequestException,)
+
+    def __init__(self, config: Config, metrics=None):
         self.config = config
-        self.client = Client(
-            config.twilio_account_sid,
-            config.twilio_auth_token
+        self.metrics = metrics or NULL_METRICS
+        self.workers = max(1, config.sms_concurrency)
+        self.client = self._make_client()
+        self.rate_limiter = TokenBucket(config.sms_per_second) if config.sms_per_second else None
+        self.retry_base_delay = 1.0
+
+    def _make_client(self):
+        # Imported here so that a config check or another transport never loads the SDK
+        from twilio.rest import Client
+        from twilio.base.exceptions import TwilioRestException
+        from twilio.http.http_client import TwilioHttpClient
+        self.send_errors = (TwilioRestException, requests.RequestException)
+        # One pooled HTTP session shared by all sender threads
+        http_client = TwilioHttpClient(pool_connections=True, timeout=self.config.sms_timeout_seconds or None)
+        if getattr(http_client, 'session', None) is not None:
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+            http_client.session.mount('https://', adapter)
+        return Client(
+            self.config.twilio_account_sid,
+            self.config.twilio_auth_token,
+            http_client=http_client
+        )
+
+    def _article_text(self, article: Article) -> str:
+        text = (
+            f"[{article.topic}]\n"
+            f"Title: {article.title}\n"
+            f"Summary: {article.summary}\n"
+            f"Link: {article.url}\n\n"
         )
+        return normalize_gsm7(text)
+
+    def pack(self, articles: List[Article]) -> List[SMSMessage]:
+        """Pack articles into as few billed segments as possible (see `sms.pack`)."""
+        texts = [self._article_text(a) for a in articles]
+        return [
+            SMSMessage(''.join(texts[i] for i in group).rstrip(), [articles[i] for i in group])
+            for group in pack(texts, self.config.sms_max_segments)
+        ]
 
     def format_message(self, articles: List[Article]) -> List[str]:
         """Split articles into SMS-sized chunks."""
-        messages = []
-        current_message = []
-        current_length = 0
-        
-        for article in articles:
-            article_text = (
-                f"[{article.topic}]\n"
-                f"Title: {article.title}\n"
-                f"Summary: {article.summary}\n"
-                f"Link: {article.url}\n\n"
-            )
-            
-            # SMS length limit is roughly 1600 characters
-            if current_length + len(article_text) > 1500:
-                messages.append("".join(current_message))
-                current_message = [article_text]
-                current_length = len(article_text)
-            else:
-                current_message.append(article_text)
-                current_length += len(article_text)
-        
-        if current_message:
-            messages.append("".join(current_message))
-            
-        return messages
-
-    def send_notifications(self, articles: List[Article]) -> None:
+        return [message.body for message in self.pack(articles)]
+
+    def send_notifications(self, articles: List[Article], to: Optional[str] = None) -> List[DeliveryResult]:
         if not articles:
-            return
+            return []
+
+        results = self.deliver(self.pack(articles), to=to)
+        if not any(r.ok for r in results):
+            raise NotifierError(f"Failed to send SMS: {results[0].error}")
+        return results
+
+    def deliver(self, messages: Sequence[SMSMessage], to: Optional[str] = None) -> List[DeliveryResult]:
+        return self.deliver_many([(to, message) for message in messages])
 
-        messages = self.format_message(articles)
-        
-        for message in messages:
+    def deliver_many(self, outbox: Sequence[Tuple[Optional[str], SMSMessage]]) -> List[DeliveryResult]:
+        """Send (recipient, message) pairs concurrently under the rate limit; one result per pair, in order."""
+        if not outbox:
+            return []
+        workers = min(self.workers, len(outbox))
+        if workers == 1:
+            return [self._send(to, message) for to, message in outbox]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda item: self._send(*item), outbox))
+
+    def _send(self, to: Optional[str], message: SMSMessage) -> DeliveryResult:
+        result = DeliveryResult(message, to or self.config.twilio_to_phone)
+        while True:
+            if self.rate_limiter is not None:
+                with self.metrics.timer('sms_rate_limit_wait_seconds'):
+                    self.rate_limiter.acquire()
+            result.attempts += 1
             try:
-                self.client.messages.create(
-                    from_=self.config.twilio_from_phone,
-                    to=self.config.twilio_to_phone,
-                    body=message
-                )
-            except TwilioRestException as e:
-                raise NotifierError(f"Failed to send SMS: {str(e)}") 
\ No newline at end of file
+                with self.metrics.timer('sms_send_seconds'):
+                    response = self.client.messages.create(
+                        from_=self.config.twilio_from_phone,
+                        to=result.to,
+                        body=message.body
+                    )
+            except self.send_errors as e:
+                retryable = is_retryable(e)
+                self.metrics.incr('sms_errors', retryable=retryable)
+                if result.attempts > self.config.sms_max_retries or not retryable:
+                    result.error = str(e)
+                    result.retryable = retryable
+                    print(f"Error sending SMS to {result.to}: {str(e)}")
+                    return result
+                self.metrics.incr('sms_retries')
+                # Exponential backoff with jitter; only this sender thread waits
+                delay = self.retry_base_delay * (2 ** (result.attempts - 1))
+                time.sleep(delay + random.uniform(0, delay / 2))
+                continue
+            result.sid = getattr(response, 'sid', None)
+            self.metrics.incr('sms_messages_sent')
+            self.metrics.incr('sms_segments', message.segments, encoding=message.encoding)
+            return result
+
+class _ConsoleMessages:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sent = 0
+
+    def create(self, from_: str, to: str, body: str):
+        with self._lock:
+            self.sent += 1
+            print(f"--- SMS to {to} ---\n{body}")
+            return SimpleNamespace(sid=f"console-{self.sent}")
+
+class ConsoleNotifier(SMSNotifier):
+    """Prints messages instead of sending them (the `console` notifier transport), for dry runs."""
+
+    def _make_client(self):
+        return SimpleNamespace(messages=_ConsoleMessages())
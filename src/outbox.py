@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Sequence, Tuple
+from .metrics import NULL_METRICS
+from .notifier import DeliveryResult, SMSMessage
+
+@dataclass
+class OutboxEntry:
+    key: str
+    to: str
+    body: str
+    article_urls: List[str] = field(default_factory=list)
+    attempts: int = 0
+
+class Outbox:
+    """Persistent queue of formatted SMS messages, so a crash or Twilio outage never loses or repeats a digest.
+
+    Rows move pending -> sending -> sent (or failed). The idempotency key is a hash of
+    recipient and body, so enqueueing the same message twice is a no-op, unless the
+    earlier copy ended up `failed`: that row goes back to `pending` with fresh
+    attempts, since its articles were already marked seen. A row left in
+    `sending` by a crash is handed out again once its lease expires, which bounds a
+    possible duplicate to the messages in flight at the time of the crash.
+    """
+
+    def __init__(self, path: str, lease: float = 300, max_attempts: int = 5, retry_delay: float = 60,
+                 clock: Callable[[], float] = time.time):
+        self.path = path
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._clock = clock
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS outbox ('
+            'key TEXT PRIMARY KEY, recipient TEXT NOT NULL, body TEXT NOT NULL, article_urls TEXT NOT NULL, '
+            'status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, available_at REAL NOT NULL, '
+            'created_at REAL NOT NULL, updated_at REAL NOT NULL, sid TEXT, error TEXT)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS outbox_status_idx ON outbox (status, available_at)')
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(to: str, body: str) -> str:
+        return hashlib.sha256(f"{to}\0{body}".encode('utf-8')).hexdigest()
+
+    def enqueue(self, items: Sequence[Tuple[str, SMSMessage]]) -> List[str]:
+        """Persist (recipient, message) pairs in one transaction; returns their keys in order."""
+        now = self._clock()
+        keys = []
+        rows = []
+        for to, message in items:
+            key = self.make_key(to, message.body)
+            keys.append(key)
+            urls = json.dumps([a.url for a in message.articles])
+            rows.append((key, to, message.body, urls, 'pending', now, now, now))
+        with self._lock:
+            self._conn.executemany(
+                'INSERT INTO outbox (key, recipient, body, article_urls, status, available_at, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?) '
+                "ON CONFLICT(key) DO UPDATE SET status = 'pending', attempts = 0, error = NULL, "
+                "available_at = excluded.available_at, updated_at = excluded.updated_at WHERE status = 'failed'",
+                rows
+            )
+            self._conn.commit()
+        return keys
+
+    def claim(self, limit: int) -> List[OutboxEntry]:
+        """Lease up to `limit` deliverable rows, oldest first."""
+        now = self._clock()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, recipient, body, article_urls, attempts FROM outbox "
+                "WHERE status IN ('pending', 'sending') AND available_at <= ? "
+                "ORDER BY created_at, rowid LIMIT ?",
+                (now, limit)
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE outbox SET status = 'sending', available_at = ?, updated_at = ? WHERE key = ?",
+                [(now + self.lease, now, row[0]) for row in rows]
+            )
+            self._conn.commit()
+        return [
+            OutboxEntry(key, to, body, json.loads(urls), attempts)
+            for key, to, body, urls, attempts in rows
+        ]
+
+    def mark_sent(self, key: str, sid: Optional[str] = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET status = 'sent', sid = ?, error = NULL, attempts = attempts + 1, updated_at = ? "
+                "WHERE key = ?",
+                (sid, self._clock(), key)
+            )
+            self._conn.commit()
+
+    def mark_failed(self, key: str, error: str, retryable: bool = False) -> None:
+        """Record a failed delivery; transient failures are retried later until `max_attempts`."""
+        now = self._clock()
+        with self._lock:
+            row = self._conn.execute('SELECT attempts FROM outbox WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return
+            attempts = row[0] + 1
+            status = 'pending' if retryable and attempts < self.max_attempts else 'failed'
+            self._conn.execute(
+                'UPDATE outbox SET status = ?, error = ?, attempts = ?, available_at = ?, updated_at = ? WHERE key = ?',
+                (status, error, attempts, now + self.retry_delay * (2 ** (attempts - 1)), now, key)
+            )
+            self._conn.commit()
+
+    def status(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute('SELECT status FROM outbox WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute('SELECT status, COUNT(*) FROM outbox GROUP BY status').fetchall()
+        return dict(rows)
+
+    def purge(self, older_than: float) -> int:
+        """Drop sent and failed rows last touched more than `older_than` seconds ago."""
+        cutoff = self._clock() - older_than
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM outbox WHERE status IN ('sent', 'failed') AND updated_at < ?", (cutoff,)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+class OutboxWorker:
+    """Drains an Outbox through an SMSNotifier in batches, recording each message's outcome."""
+
+    def __init__(self, outbox: Outbox, notifier, batch_size: int = 50, metrics=None):
+        self.outbox = outbox
+        self.notifier = notifier
+        self.batch_size = batch_size
+        self.metrics = metrics or NULL_METRICS
+
+    def drain_once(self) -> List[Tuple[OutboxEntry, DeliveryResult]]:
+        entries = self.outbox.claim(self.batch_size)
+        if not entries:
+            return []
+        results = self.notifier.deliver_many([(e.to, SMSMessage(e.body)) for e in entries])
+        for entry, result in zip(entries, results):
+            if result.ok:
+                self.outbox.mark_sent(entry.key, result.sid)
+                self.metrics.incr('outbox_sent')
+            else:
+                self.outbox.mark_failed(entry.key, result.error, result.retryable)
+                self.metrics.incr('outbox_failed', retryable=result.retryable)
+        return list(zip(entries, results))
+
+    def drain(self) -> List[Tuple[OutboxEntry, DeliveryResult]]:
+        """Deliver everything currently deliverable; rows waiting out a retry delay are left for later."""
+        delivered = []
+        while True:
+            batch = self.drain_once()
+            if not batch:
+                return delivered
+            delivered.extend(batch)
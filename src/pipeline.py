@@ -0,0 +1,356 @@
+import queue
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Set
+from .metrics import NULL_METRICS
+from .models import Article
+from .near_duplicates import StreamingCollapser
+from .ranking import TopKRanker
+
+# Queue sentinel telling a stage that its upstream has finished
+_DONE = object()
+
+@dataclass
+class PipelineResult:
+    delivered: List[Article] = field(default_factory=list)
+    summarized: int = 0
+    cancelled: bool = False
+    first_sms_seconds: Optional[float] = None
+    elapsed_seconds: float = 0.0
+
+class Pipeline:
+    """Streaming fetch -> select -> summarize -> notify run with bounded queues between stages.
+
+    Feeds are fetched and parsed by `fetch_workers` threads. A single selector thread
+    owns dedup and streams every article into one `TopKRanker`: the best `max_articles`
+    across all topics, at most `per_topic` per topic and `per_source` per site. Picks
+    go on to summarization as soon as no pending feed can displace them (see `_emit`).
+    `summarize_workers` threads summarize them, and a single notifier
+    thread sends an SMS whenever a full message's worth of summaries is ready.
+    Bounded queues give backpressure. `cancel()` (or the `deadline`) stops new work
+    and the stages drain, so whatever was already summarized is still delivered.
+
+    With an `outbox_worker`, the notifier thread only persists each message to the
+    outbox and a separate delivery thread drains it (starting with anything an earlier
+    run left unsent), so summarization never waits on SMS latency.
+
+    With an `enricher`, each batch has teaser-only articles replaced by their full
+    text right before it is summarized; selection still uses the feed text.
+
+    With an `archive`, every candidate is recorded as it is selected from, summaries as
+    they are sent and delivery once it succeeds.
+
+    With a `fetcher` (see `ShardCoordinator`), feeds are fetched and parsed elsewhere and
+    a single collector thread streams its results into selection instead.
+    """
+
+    def __init__(self, scraper, summarizer, notifier, topics: List[str], per_topic: Optional[int] = None,
+                 fetch_workers: int = 8, summarize_workers: int = 4, queue_size: int = 32,
+                 deadline: Optional[float] = None, metrics=None, outbox_worker=None,
+                 max_articles: Optional[int] = None, per_source: Optional[int] = None, enricher=None,
+                 archive=None, fetcher=None):
+        self.scraper = scraper
+        self.summarizer = summarizer
+        self.notifier = notifier
+        self.topics = list(dict.fromkeys(t.lower().strip() for t in topics))
+        self.per_topic = per_topic or None
+        self.per_source = per_source or None
+        if max_articles is None:
+            max_articles = (per_topic or 0) * len(self.topics)
+        self.max_articles = max_articles
+        self.fetch_workers = max(1, fetch_workers)
+        self.summarize_workers = max(1, summarize_workers)
+        self.queue_size = queue_size
+        self.deadline = deadline
+        self.metrics = metrics or NULL_METRICS
+        self.outbox_worker = outbox_worker
+        self.enricher = enricher
+        self.archive = archive
+        self.fetcher = fetcher
+        self._cancel = threading.Event()
+        self._enqueued = threading.Event()
+        self._notify_done = threading.Event()
+        self._lock = threading.Lock()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def run(self) -> PipelineResult:
+        self._started = time.monotonic()
+        self._result = PipelineResult()
+        self._notify_done.clear()
+        self._enqueued.clear()
+        # Articles behind each outbox row enqueued by this run
+        self._outbox_articles: Dict[str, List[Article]] = {}
+        self._queue_messages = self.outbox_worker is not None
+        if self._queue_messages and not self.notifier.config.twilio_to_phone:
+            # Outbox rows need a recipient; the transport can still send to its default
+            print("Warning: TWILIO_TO_PHONE is not set; sending this run's messages without the outbox")
+            self._queue_messages = False
+
+        # Same topic -> feed planning (priority order, skipped polls) as NewsScraper.get_articles_for_topics
+        self._feed_topics: Dict[str, List[str]] = self.scraper.plan_feeds(self.topics)
+
+        feeds_q: queue.Queue = queue.Queue()
+        parsed_q: queue.Queue = queue.Queue(self.queue_size)
+        summarize_q: queue.Queue = queue.Queue(self.queue_size)
+        notify_q: queue.Queue = queue.Queue(self.queue_size)
+
+        for feed_url in self._feed_topics:
+            feeds_q.put(feed_url)
+        fetchers = min(self.fetch_workers, max(1, len(self._feed_topics)))
+        for _ in range(fetchers):
+            feeds_q.put(_DONE)
+
+        self._fetchers_left = fetchers
+        self._summarizers_left = self.summarize_workers
+        if self.fetcher is not None:
+            threads = [threading.Thread(target=self._collect, args=(parsed_q,), name='collect')]
+        else:
+            threads = [threading.Thread(target=self._fetch_worker, args=(feeds_q, parsed_q), name=f'fetch-{i}')
+                       for i in range(fetchers)]
+        threads.append(threading.Thread(target=self._select, args=(parsed_q, summarize_q), name='select'))
+        threads.extend(threading.Thread(target=self._summarize_worker, args=(summarize_q, notify_q), name=f'summarize-{i}')
+                       for i in range(self.summarize_workers))
+        threads.append(threading.Thread(target=self._notify, args=(notify_q,), name='notify'))
+        if self.outbox_worker is not None:
+            threads.append(threading.Thread(target=self._deliver, name='deliver'))
+
+        timer = None
+        if self.deadline:
+            timer = threading.Timer(self.deadline, self._overrun)
+            timer.daemon = True
+            timer.start()
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if timer:
+            timer.cancel()
+
+        self._result.cancelled = self.cancelled
+        self._result.elapsed_seconds = time.monotonic() - self._started
+        return self._result
+
+    def _overrun(self) -> None:
+        print(f"Warning: Run exceeded {self.deadline}s; cancelling and delivering partial results")
+        self.metrics.incr('pipeline_cancelled')
+        self.cancel()
+
+    def _fetch_worker(self, feeds_q: queue.Queue, parsed_q: queue.Queue) -> None:
+        try:
+            while not self.cancelled:
+                feed_url = feeds_q.get()
+                if feed_url is _DONE:
+                    break
+                articles = self.scraper.fetch_feed_articles(feed_url, self._feed_topics[feed_url][0])
+                parsed_q.put((feed_url, articles))
+        finally:
+            with self._lock:
+                self._fetchers_left -= 1
+                last = self._fetchers_left == 0
+            if last:
+                parsed_q.put(_DONE)
+
+    def _collect(self, parsed_q: queue.Queue) -> None:
+        results = self.fetcher.fetch_many(self._feed_topics)
+        try:
+            for feed_url, articles in results:
+                if self.cancelled:
+                    break
+                parsed_q.put((feed_url, articles))
+        except Exception as e:
+            self.metrics.incr('errors', stage='fetch')
+            print(f"Error collecting feed results: {str(e)}")
+        finally:
+            results.close()
+            parsed_q.put(_DONE)
+
+    def _select(self, parsed_q: queue.Queue, summarize_q: queue.Queue) -> None:
+        pending = {topic: 0 for topic in self.topics}
+        for feed_topics in self._feed_topics.values():
+            for topic in feed_topics:
+                pending[topic] += 1
+        ranker = TopKRanker(self.max_articles, self.per_topic, self.per_source)
+        detector = getattr(self.scraper, 'near_duplicates', None)
+        collapser = StreamingCollapser(detector) if detector is not None else None
+        emitted: Set[int] = set()
+        try:
+            while True:
+                entry = parsed_q.get()
+                if entry is _DONE:
+                    break
+                feed_url, articles = entry
+                kept = self.scraper.keep_unseen(articles) if articles else []
+                if self.archive is not None and kept:
+                    self.archive.record(kept)
+                for topic in self._feed_topics[feed_url]:
+                    for article in kept:
+                        copy = article if article.topic == topic else replace(article, topic=topic)
+                        self._offer(ranker, collapser, copy, emitted)
+                    pending[topic] -= 1
+                if not self.cancelled:
+                    self._emit(ranker, pending, emitted, summarize_q)
+            if not self.cancelled:
+                self._emit(ranker, {}, emitted, summarize_q)
+        finally:
+            for _ in range(self.summarize_workers):
+                summarize_q.put(_DONE)
+
+    def _offer(self, ranker: TopKRanker, collapser: Optional[StreamingCollapser], article: Article,
+               emitted: Set[int]) -> None:
+        representative = collapser.match(article) if collapser is not None else None
+        if representative is None:
+            if ranker.offer(article) and collapser is not None:
+                collapser.add(article)
+            return
+        if representative not in ranker:
+            # Its cluster's representative was outranked since; the copy competes on its own
+            if ranker.offer(article):
+                collapser.promote(representative, article)
+            return
+        self.metrics.incr('items_dropped', reason='near_duplicate')
+        better = article.relevance_score > representative.relevance_score
+        if better and id(representative) not in emitted and ranker.replace(representative, article):
+            collapser.promote(representative, article)
+        else:
+            collapser.absorb(representative, article)
+
+    def _emit(self, ranker: TopKRanker, pending: Dict[str, int], emitted: Set[int], summarize_q: queue.Queue) -> None:
+        """Start summarizing every retained article that later feeds can no longer displace.
+
+        Once all of a topic's feeds are in, its articles can only be pushed out by articles
+        of unfinished topics, and per-topic quotas bound how many of those there can be.
+        So the best `max_articles - reserve` articles of finished topics are final.
+        """
+        unfinished = [topic for topic, left in pending.items() if left > 0]
+        if unfinished and self.per_source:
+            # A later article from the same site could still evict one
+            return
+        reserve = sum(min(self.per_topic or self.max_articles, self.max_articles) for _ in unfinished)
+        settled = [a for a in ranker.ranked() if a.topic not in unfinished][:max(0, self.max_articles - reserve)]
+        for article in settled:
+            if id(article) not in emitted:
+                emitted.add(id(article))
+                summarize_q.put(article)
+
+    def _summarize_worker(self, summarize_q: queue.Queue, notify_q: queue.Queue) -> None:
+        pack_size = max(1, getattr(self.summarizer.config, 'llm_pack_size', 1))
+        try:
+            done = False
+            while not done:
+                item = summarize_q.get()
+                if item is _DONE:
+                    break
+                batch = [item]
+                # Grab whatever else is already waiting so short abstracts can share a prompt
+                while len(batch) < pack_size:
+                    try:
+                        item = summarize_q.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _DONE:
+                        done = True
+                        break
+                    batch.append(item)
+                if self.cancelled:
+                    continue
+                if self.enricher is not None:
+                    self.enricher.enrich(batch)
+                for article in self.summarizer.summarize_many(batch):
+                    notify_q.put(article)
+        finally:
+            with self._lock:
+                self._summarizers_left -= 1
+                last = self._summarizers_left == 0
+            if last:
+                notify_q.put(_DONE)
+
+    def _notify(self, notify_q: queue.Queue) -> None:
+        buffer: List[Article] = []
+        while True:
+            article = notify_q.get()
+            if article is _DONE:
+                break
+            with self._lock:
+                self._result.summarized += 1
+            # Send as soon as the next article would spill into a second message
+            if buffer and len(self.notifier.format_message(buffer + [article])) > 1:
+                self._send(buffer)
+                buffer = []
+            buffer.append(article)
+        if buffer:
+            self._send(buffer)
+        self._notify_done.set()
+        self._enqueued.set()
+
+    def _send(self, articles: List[Article]) -> None:
+        if self.archive is not None:
+            self.archive.record(articles)
+        if self._queue_messages:
+            self._enqueue(articles)
+            return
+        try:
+            results = self.notifier.send_notifications(articles)
+        except Exception as e:
+            self.metrics.incr('errors', stage='notify')
+            print(f"Error sending notifications: {str(e)}")
+            return
+        if results:
+            articles = [a for r in results if r.ok for a in r.message.articles]
+        if self._result.first_sms_seconds is None:
+            self._result.first_sms_seconds = time.monotonic() - self._started
+            self.metrics.observe('time_to_first_sms_seconds', self._result.first_sms_seconds)
+        self._result.delivered.extend(articles)
+        if self.archive is not None:
+            self.archive.mark_delivered(articles)
+        # Only delivered articles are remembered, so a failed send is retried next run
+        self.scraper.mark_seen(articles)
+
+    def _enqueue(self, articles: List[Article]) -> None:
+        messages = self.notifier.pack(articles)
+        to = self.notifier.config.twilio_to_phone
+        try:
+            keys = self.outbox_worker.outbox.enqueue([(to, message) for message in messages])
+        except Exception as e:
+            self.metrics.incr('errors', stage='notify')
+            print(f"Error queueing notifications: {str(e)}")
+            return
+        with self._lock:
+            for key, message in zip(keys, messages):
+                self._outbox_articles[key] = message.articles
+        # Once queued, delivery is the outbox's job; don't pick these articles again
+        self.scraper.mark_seen(articles)
+        self._enqueued.set()
+
+    def _deliver(self) -> None:
+        while True:
+            finished = self._notify_done.is_set()
+            try:
+                batch = self.outbox_worker.drain_once()
+            except Exception as e:
+                self.metrics.incr('errors', stage='deliver')
+                print(f"Error delivering queued notifications: {str(e)}")
+                return
+            for entry, delivery in batch:
+                if not delivery.ok:
+                    continue
+                if self._result.first_sms_seconds is None:
+                    self._result.first_sms_seconds = time.monotonic() - self._started
+                    self.metrics.observe('time_to_first_sms_seconds', self._result.first_sms_seconds)
+                delivered = self._outbox_articles.get(entry.key, [])
+                with self._lock:
+                    self._result.delivered.extend(delivered)
+                if self.archive is not None:
+                    self.archive.mark_delivered(delivered)
+            if not batch:
+                if finished:
+                    return
+                self._enqueued.wait()
+                self._enqueued.clear()
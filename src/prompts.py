@@ -0,0 +1,135 @@
+import html
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+from .metrics import NULL_METRICS
+
+BLOCK_TAGS = re.compile(r'<\s*(?:br|/?p|/?div|/?li|/?h[1-6]|/?tr|/?blockquote|/?pre|/?section|/?article)\b[^>]*>', re.I)
+INVISIBLE = re.compile(r'<\s*(script|style|noscript|iframe|svg)\b.*?<\s*/\s*\1\s*>', re.I | re.S)
+COMMENT = re.compile(r'<!--.*?-->', re.S)
+TAG = re.compile(r'<[^>]+>')
+SPACES = re.compile(r'[ \t\r\f\v\u00a0]+')
+BLANK_LINES = re.compile(r'\n\s*\n+')
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9"\'(\[])|\n+')
+WORD = re.compile(r'[a-z][a-z0-9-]+')
+STOPWORDS = frozenset(
+    "a an and are as at be been but by can could do does for from had has have he her his how i if in into is it "
+    "its more most not of on or our she so such than that the their them then there these they this those to "
+    "was we were what when where which while who will with would you your also about after all any been before "
+    "between both each just many may much new now only other over same should some very".split()
+)
+
+def estimate_tokens(text: str) -> int:
+    # Roughly 4 characters per token for English text
+    return len(text) // 4 + 1
+
+def html_to_text(text: str) -> str:
+    """Plain text of an HTML fragment: markup dropped, entities decoded, block elements become line breaks."""
+    if '<' not in text and '&' not in text:
+        return SPACES.sub(' ', text).strip()
+    text = COMMENT.sub(' ', text)
+    text = INVISIBLE.sub(' ', text)
+    text = BLOCK_TAGS.sub('\n', text)
+    text = html.unescape(TAG.sub(' ', text))
+    lines = (SPACES.sub(' ', line).strip() for line in text.split('\n'))
+    return BLANK_LINES.sub('\n', '\n'.join(lines)).strip()
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in SENTENCE_END.split(text) if s and s.strip()]
+
+def _truncate(text: str, budget: int) -> str:
+    limit = max(0, budget * 4 - 4)
+    if len(text) <= limit:
+        return text
+    cut = text.rfind(' ', 0, limit)
+    return text[:cut if cut > limit // 2 else limit].rstrip() + '...'
+
+def extract_sentences(text: str, budget: int, title: str = '') -> str:
+    """Keep the most informative sentences of `text` that fit in `budget` estimated tokens.
+
+    A sentence scores the average document frequency of its content words, boosted
+    for words shared with the title and for appearing early (news leads carry the
+    point). Sentences are picked best first and returned in their original order;
+    a single sentence larger than the budget is cut at a word boundary.
+    """
+    if estimate_tokens(text) <= budget:
+        return text
+    sentences = split_sentences(text)
+    if not sentences:
+        return _truncate(text, budget)
+
+    words = [WORD.findall(s.lower()) for s in sentences]
+    frequency = Counter(w for ws in words for w in ws if w not in STOPWORDS)
+    title_words = {w for w in WORD.findall(title.lower()) if w not in STOPWORDS}
+    scored: List[Tuple[float, int]] = []
+    for i, ws in enumerate(words):
+        content = [w for w in ws if w not in STOPWORDS]
+        if not content:
+            scored.append((0.0, i))
+            continue
+        score = sum(frequency[w] for w in content) / len(content)
+        score += 2.0 * len(title_words.intersection(content))
+        score *= 1.0 + 1.0 / (1 + i)
+        scored.append((score, i))
+
+    ranked = [i for _, i in sorted(scored, key=lambda item: (-item[0], item[1]))]
+    chosen = []
+    used = 0
+    for i in ranked:
+        # +1 for the joining space
+        cost = len(sentences[i]) + 1
+        if (used + cost) // 4 + 1 <= budget:
+            chosen.append(i)
+            used += cost
+    if not chosen:
+        return _truncate(sentences[ranked[0]], budget)
+    return ' '.join(sentences[i] for i in sorted(chosen))
+
+@dataclass
+class PromptStats:
+    articles: int = 0
+    original_tokens: int = 0
+    prompt_tokens: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.original_tokens - self.prompt_tokens
+
+class PromptBuilder:
+    """Turns article content into prompt text that fits a per-article input budget.
+
+    Content is reduced to plain text first; when it is still over `budget` estimated
+    tokens the most informative sentences are extracted. A budget of 0 only strips
+    markup. Results are memoized per (title, content), since packing decisions and
+    the prompt itself both need them.
+    """
+
+    def __init__(self, budget: int = 400, metrics=None, max_entries: int = 4096):
+        self.budget = budget
+        self.metrics = metrics or NULL_METRICS
+        self.max_entries = max_entries
+        self.stats = PromptStats()
+        self._memo: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+
+    def content(self, title: str, content: str) -> str:
+        key = (title, content)
+        prepared = self._memo.get(key)
+        if prepared is not None:
+            return prepared
+        prepared = html_to_text(content)
+        if self.budget > 0:
+            prepared = extract_sentences(prepared, self.budget, title)
+        original, reduced = estimate_tokens(content), estimate_tokens(prepared)
+        with self._lock:
+            if len(self._memo) >= self.max_entries:
+                self._memo.clear()
+            self._memo[key] = prepared
+            self.stats.articles += 1
+            self.stats.original_tokens += original
+            self.stats.prompt_tokens += reduced
+        self.metrics.incr('llm_prompt_tokens', reduced)
+        self.metrics.incr('llm_prompt_tokens_saved', original - reduced)
+        return prepared
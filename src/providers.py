@@ -0,0 +1,65 @@
+import importlib
+import threading
+from typing import Callable, Dict, List, Union
+
+class ProviderError(Exception):
+    pass
+
+class ProviderRegistry:
+    """Named factories that are imported on first use.
+
+    Entries are registered as `module:attribute` strings (relative to this package or
+    absolute), so a process only pays the import cost of the providers its config
+    selects. Callables can be registered directly as well, e.g. from tests or plugins.
+    """
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self._entries: Dict[str, Union[str, Callable]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, target: Union[str, Callable]) -> None:
+        with self._lock:
+            self._entries[name.lower()] = target
+
+    def names(self) -> List[str]:
+        return sorted(self._entries)
+
+    def __contains__(self, name: str) -> bool:
+        return bool(name) and name.lower() in self._entries
+
+    def target(self, name: str) -> str:
+        """Where `name` would be loaded from, without importing it."""
+        target = self._lookup(name)
+        return target if isinstance(target, str) else f"{target.__module__}:{target.__qualname__}"
+
+    def _lookup(self, name: str) -> Union[str, Callable]:
+        target = self._entries.get((name or '').lower())
+        if target is None:
+            raise ProviderError(f"Unknown {self.kind} '{name}', expected one of {', '.join(self.names())}")
+        return target
+
+    def load(self, name: str) -> Callable:
+        target = self._lookup(name)
+        if not isinstance(target, str):
+            return target
+        module_name, _, attribute = target.partition(':')
+        try:
+            module = importlib.import_module(module_name, package=__package__)
+            factory = getattr(module, attribute)
+        except (ImportError, AttributeError) as e:
+            raise ProviderError(f"Could not load {self.kind} '{name}' from {target}: {str(e)}") from e
+        # Later lookups skip the import machinery
+        self.register(name, factory)
+        return factory
+
+    def create(self, name: str, *args, **kwargs):
+        return self.load(name)(*args, **kwargs)
+
+LLM_BACKENDS = ProviderRegistry('LLM provider')
+LLM_BACKENDS.register('openai', '.llm_backends:OpenAIBackend')
+LLM_BACKENDS.register('anthropic', '.llm_backends:AnthropicBackend')
+
+NOTIFIER_TRANSPORTS = ProviderRegistry('notifier transport')
+NOTIFIER_TRANSPORTS.register('twilio', '.notifier:SMSNotifier')
+NOTIFIER_TRANSPORTS.register('console', '.notifier:ConsoleNotifier')
@@ -0,0 +1,147 @@
+import heapq
+import itertools
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+from .models import Article
+from .seen_store import normalize_url
+
+# (score, -arrival): the smallest entry is the weakest, and on equal scores the later arrival loses
+Rank = Tuple[float, int]
+
+def source_of(article: Article) -> str:
+    """The publishing site, used by the diversity cap (e.g. `medium.com`)."""
+    host = urlsplit(article.url).hostname or ''
+    return host[4:] if host.startswith('www.') else host
+
+class _Group:
+    """Min-heap over one slice of the retained items, with lazy deletion."""
+
+    def __init__(self):
+        self.heap: List[Tuple[float, int, Article]] = []
+        self.size = 0
+
+    def push(self, entry: Tuple[float, int, Article]) -> None:
+        heapq.heappush(self.heap, entry)
+        self.size += 1
+
+    def weakest(self, alive: Dict[int, Tuple[float, int, Article]]) -> Optional[Tuple[float, int, Article]]:
+        while self.heap and alive.get(self.heap[0][1]) is not self.heap[0]:
+            heapq.heappop(self.heap)
+        return self.heap[0] if self.heap else None
+
+    def compact(self, alive: Dict[int, Tuple[float, int, Article]]) -> None:
+        # Keeps stale entries from piling up, so memory stays proportional to what is retained
+        if len(self.heap) > 2 * self.size + 8:
+            self.heap = [entry for entry in self.heap if alive.get(entry[1]) is entry]
+            heapq.heapify(self.heap)
+
+class TopKRanker:
+    """Keeps the `k` best articles of a stream without holding or sorting the whole stream.
+
+    `per_topic` caps how many retained articles may share a topic and `per_source`
+    how many may come from one site (diversity). Articles are offered one at a time:
+    a new article enters by evicting the weakest article of a full topic, of a full
+    source, or otherwise the weakest overall, if it beats it. With topic caps alone
+    this retains exactly the best capped selection of everything offered so far.
+    When both caps bind on the same arrival the source cap is applied greedily.
+    Each URL is retained at most once. Memory is O(k).
+    """
+
+    def __init__(self, k: int, per_topic: Optional[int] = None, per_source: Optional[int] = None,
+                 key: Callable[[Article], float] = lambda a: a.relevance_score):
+        self.k = k
+        self.per_topic = per_topic or None
+        self.per_source = per_source or None
+        self.key = key
+        self._arrivals = itertools.count()
+        self._alive: Dict[int, Tuple[float, int, Article]] = {}
+        self._urls: Dict[str, int] = {}
+        self._all = _Group()
+        self._topics: Dict[str, _Group] = {}
+        self._sources: Dict[str, _Group] = {}
+
+    def __len__(self) -> int:
+        return len(self._alive)
+
+    def __contains__(self, article: Article) -> bool:
+        entry = self._alive.get(self._urls.get(normalize_url(article.url), -1))
+        return entry is not None and entry[2] is article
+
+    def offer(self, article: Article) -> bool:
+        """Add `article` if it belongs in the current top k; returns whether it was retained."""
+        if self.k <= 0:
+            return False
+        url = normalize_url(article.url)
+        if url in self._urls:
+            return False
+        entry = (self.key(article), -next(self._arrivals), article)
+        rank = entry[:2]
+
+        victims = []
+        for cap, groups, name in ((self.per_topic, self._topics, article.topic),
+                                  (self.per_source, self._sources, source_of(article) if self.per_source else '')):
+            if cap is None:
+                continue
+            group = groups.get(name)
+            if group is not None and group.size >= cap:
+                weakest = group.weakest(self._alive)
+                if rank <= weakest[:2]:
+                    return False
+                if weakest not in victims:
+                    victims.append(weakest)
+        if not victims and len(self._alive) >= self.k:
+            weakest = self._all.weakest(self._alive)
+            if rank <= weakest[:2]:
+                return False
+            victims.append(weakest)
+
+        for victim in victims:
+            self._remove(victim)
+        self._insert(url, entry)
+        return True
+
+    def extend(self, articles: Iterable[Article]) -> int:
+        return sum(1 for article in articles if self.offer(article))
+
+    def discard(self, article: Article) -> bool:
+        entry = self._alive.get(self._urls.get(normalize_url(article.url), -1))
+        if entry is None or entry[2] is not article:
+            return False
+        self._remove(entry)
+        return True
+
+    def replace(self, old: Article, new: Article) -> bool:
+        """Swap a retained article for `new` (e.g. a better-scored near duplicate); `old` stays if `new` is rejected."""
+        entry = self._alive.get(self._urls.get(normalize_url(old.url), -1))
+        if entry is None or entry[2] is not old:
+            return self.offer(new)
+        self._remove(entry)
+        if self.offer(new):
+            return True
+        self._insert(normalize_url(old.url), entry)
+        return False
+
+    def ranked(self) -> List[Article]:
+        """Retained articles, best first."""
+        return [entry[2] for entry in sorted(self._alive.values(), reverse=True, key=lambda e: e[:2])]
+
+    def _groups(self, article: Article) -> List[_Group]:
+        groups = [self._all]
+        if self.per_topic is not None:
+            groups.append(self._topics.setdefault(article.topic, _Group()))
+        if self.per_source is not None:
+            groups.append(self._sources.setdefault(source_of(article), _Group()))
+        return groups
+
+    def _insert(self, url: str, entry: Tuple[float, int, Article]) -> None:
+        self._alive[entry[1]] = entry
+        self._urls[url] = entry[1]
+        for group in self._groups(entry[2]):
+            group.push(entry)
+
+    def _remove(self, entry: Tuple[float, int, Article]) -> None:
+        del self._alive[entry[1]]
+        del self._urls[normalize_url(entry[2].url)]
+        for group in self._groups(entry[2]):
+            group.size -= 1
+            group.compact(self._alive)
@@ -0,0 +1,57 @@
+import threading
+import time
+from typing import Callable, Optional
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursting up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, amount: float = 1) -> float:
+        """Take `amount` tokens if available; otherwise return how long to wait for them."""
+        # A request larger than the bucket could never be served, so clamp it
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill()
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.rate
+
+    def acquire(self, amount: float = 1) -> None:
+        while True:
+            wait = self.try_acquire(amount)
+            if wait <= 0:
+                return
+            self._sleep(wait)
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits, as published by LLM providers."""
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.requests = None
+        self.tokens = None
+        if requests_per_minute:
+            self.requests = TokenBucket(requests_per_minute / 60, requests_per_minute, clock, sleep)
+        if tokens_per_minute:
+            self.tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute, clock, sleep)
+
+    def acquire(self, tokens: float = 0) -> None:
+        if self.requests is not None:
+            self.requests.acquire(1)
+        if self.tokens is not None and tokens:
+            self.tokens.acquire(tokens)
@@ -0,0 +1,117 @@
+import re
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+from .models import Article
+from .prompts import STOPWORDS, WORD
+
+DEFAULT_INSTITUTIONS = ["MIT", "Stanford", "Berkeley", "Oxford", "Cambridge", "Google", "Microsoft", "DeepMind"]
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """Build a regex alternation shaped like a prefix trie.
+
+    `re` tries alternatives one by one, so a flat `a|b|c...` costs a pass per keyword
+    at every position; sharing prefixes keeps matching roughly independent of the
+    number of keywords.
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            # A keyword ends here but longer ones continue
+            return f'(?:{body})?'
+        return body
+
+    return build(trie)
+
+def title_terms(title: str) -> Set[str]:
+    """Words (3+ letters) and adjacent word pairs of a title, without stopwords, e.g. `diffusion policy`."""
+    words = WORD.findall(title.lower())
+    terms = {w for w in words if len(w) > 2 and w not in STOPWORDS}
+    terms.update(f"{a} {b}" for a, b in zip(words, words[1:]) if a not in STOPWORDS and b not in STOPWORDS)
+    return terms
+
+class RelevanceScorer:
+    """Compiled relevance scoring: recency + content length + weighted keyword mentions.
+
+    The default weights reproduce the original scoring (5 points recency, 2 points
+    length, 0.5 per institution up to 3), except that keywords are matched on word
+    boundaries: the original substring test also credited MIT for "submitted" or
+    "permit". Pass `word_boundary=False` for the old substring matching.
+    `trends` maps title terms to bonus points (see `ArticleArchive.trend_boosts`),
+    summed over the terms of a title up to `max_trend_score`.
+    """
+
+    def __init__(self, keywords: Optional[Dict[str, float]] = None, max_keyword_score: float = 3.0,
+                 recency_points: float = 5.0, recency_window_hours: float = 24,
+                 length_points: float = 2.0, length_scale: float = 500, word_boundary: bool = True,
+                 trends: Optional[Dict[str, float]] = None, max_trend_score: float = 1.0):
+        if keywords is None:
+            keywords = {name: 0.5 for name in DEFAULT_INSTITUTIONS}
+        self.weights = {name.lower(): weight for name, weight in keywords.items() if name}
+        self.max_keyword_score = max_keyword_score
+        self.recency_points = recency_points
+        self.recency_window_hours = recency_window_hours
+        self.length_points = length_points
+        self.length_scale = length_scale
+        self.trends = trends or {}
+        self.max_trend_score = max_trend_score
+
+        self._pattern = None
+        if self.weights:
+            # Longest-first keeps the trie deterministic; boundaries work for keywords like "C++" too
+            pattern = _trie_regex(sorted(self.weights, key=len, reverse=True))
+            if word_boundary:
+                pattern = rf'(?<!\w){pattern}(?!\w)'
+            self._pattern = re.compile(pattern, re.IGNORECASE)
+
+    def keyword_score(self, text: str) -> float:
+        if self._pattern is None or not text:
+            return 0.0
+        mentioned = {match.lower() for match in self._pattern.findall(text)}
+        return min(self.max_keyword_score, sum(self.weights.get(name, 0.0) for name in mentioned))
+
+    def trend_score(self, title: str) -> float:
+        if not self.trends or not title:
+            return 0.0
+        return min(self.max_trend_score, sum(self.trends.get(term, 0.0) for term in title_terms(title)))
+
+    def score(self, article: Article, now: Optional[datetime] = None) -> float:
+        return self.score_many([article], now)[0]
+
+    def score_many(self, articles: Sequence[Article], now: Optional[datetime] = None) -> List[float]:
+        """Score a batch in one pass per component, sharing a single `now`."""
+        now = now or datetime.now(timezone.utc)
+        window = self.recency_window_hours
+
+        # Recency (max `recency_points`, full points when brand new)
+        recency = [
+            max(0, self.recency_points - ((now - a.published_date).total_seconds() / 3600 / window) * self.recency_points)
+            if a.published_date else 0.0
+            for a in articles
+        ]
+        # Content length (max `length_points`)
+        length = [min(self.length_points, len(a.content) / self.length_scale) if a.content else 0.0 for a in articles]
+        # Keyword mentions, each distinct keyword counted once; affiliations count like the text
+        mentions = [self.keyword_score(f"{a.content}\n{a.title}\n{'; '.join(a.affiliations)}") for a in articles]
+        # Title terms trending in the archive (precomputed, so no history is read here)
+        trending = [self.trend_score(a.title) for a in articles]
+
+        return [round(r + l + m + t, 2) for r, l, m, t in zip(recency, length, mentions, trending)]
+
+def parse_keywords(raw: str) -> Optional[Dict[str, float]]:
+    """Parse `name:weight,name:weight` (weight defaults to 0.5) from the environment."""
+    keywords = {}
+    for entry in raw.split(','):
+        name, _, weight = entry.partition(':')
+        if name.strip():
+            keywords[name.strip()] = float(weight) if weight.strip() else 0.5
+    return keywords or None
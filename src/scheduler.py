@@ -1,16 +1,195 @@
-import schedule
-import time
-from typing import Callable, List
+import json
+import os
+import threading
+from datetime import datetime, time, timedelta, timezone, tzinfo
+from typing import Callable, List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from .metrics import NULL_METRICS
+
+OVERLAP_POLICIES = ('skip', 'queue')
+
+class SchedulerError(Exception):
+    pass
+
+def parse_timezone(name: Optional[str]) -> Optional[tzinfo]:
+    """Resolve an IANA zone name such as `Europe/Berlin`; None means the host's local time."""
+    if not name:
+        return None
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        raise SchedulerError(f"Unknown timezone '{name}'") from e
 
 class Scheduler:
-    def __init__(self, schedule_times: List[str], task: Callable):
+    """Runs `task` at fixed times of day.
+
+    The loop sleeps until the next slot (or until `stop()` / a finishing overrun wakes
+    it) rather than polling. Each run happens in a worker thread that is given
+    `timeout` seconds; a run that overshoots is abandoned and the loop moves on.
+    While an abandoned run is still going, later slots are skipped or queued (at
+    most one) according to `overlap`. The start time of every run is persisted to
+    `state_path`, so a slot missed while the process was down is run once on startup.
+    `clock` and `sleep` can be swapped for fakes in tests.
+    """
+
+    def __init__(self, schedule_times: List[str], task: Callable, metrics=None,
+                 tz: Optional[tzinfo] = None, timeout: Optional[float] = None, overlap: str = 'skip',
+                 state_path: Optional[str] = None, clock: Optional[Callable[[], datetime]] = None,
+                 sleep: Optional[Callable[[float], None]] = None):
+        if overlap not in OVERLAP_POLICIES:
+            raise SchedulerError(f"Unknown overlap policy '{overlap}', expected one of {', '.join(OVERLAP_POLICIES)}")
         self.schedule_times = schedule_times
+        self.times = sorted(self._parse_time(t) for t in schedule_times)
+        if not self.times:
+            raise SchedulerError("No schedule times configured")
         self.task = task
+        self.metrics = metrics or NULL_METRICS
+        self.tz = tz
+        self.timeout = timeout or None
+        self.overlap = overlap
+        self.state_path = state_path
+        self.clock = clock or (lambda: datetime.now(timezone.utc))
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self.sleep = sleep or self._wait
+        self._lock = threading.Lock()
+        self._running = False
+        self._queued: Optional[datetime] = None
+        # The slot the in-progress run was scheduled for, in schedule-local time
+        self.current_slot: Optional[datetime] = None
+
+    @staticmethod
+    def _parse_time(time_str: str) -> time:
+        try:
+            return time.fromisoformat(time_str.strip())
+        except ValueError as e:
+            raise SchedulerError(f"Invalid schedule time '{time_str}', expected HH:MM") from e
+
+    def _wait(self, seconds: float) -> None:
+        self._wake.wait(seconds)
+        self._wake.clear()
+
+    def _at(self, day, slot: time) -> datetime:
+        if self.tz is not None:
+            return datetime.combine(day, slot, tzinfo=self.tz)
+        # Naive local time; astimezone() applies the host's UTC offset for that date
+        return datetime.combine(day, slot).astimezone()
+
+    def _slots_around(self, moment: datetime) -> List[datetime]:
+        today = moment.astimezone(self.tz).date()
+        return [self._at(today + timedelta(days=offset), slot) for offset in (-1, 0, 1, 2) for slot in self.times]
+
+    def next_run(self, after: datetime) -> datetime:
+        return min(slot for slot in self._slots_around(after) if slot > after)
+
+    def previous_run(self, before: datetime) -> datetime:
+        return max(slot for slot in self._slots_around(before) if slot <= before)
+
+    def last_run(self) -> Optional[datetime]:
+        if not self.state_path or not os.path.exists(self.state_path):
+            return None
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return datetime.fromisoformat(json.load(f)['last_run'])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Warning: Ignoring unreadable scheduler state {self.state_path}: {str(e)}")
+            return None
+
+    def _save_last_run(self, slot: datetime) -> None:
+        if not self.state_path:
+            return
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'last_run': slot.isoformat()}, f)
+        os.replace(tmp_path, self.state_path)
+
+    def run_task(self):
+        try:
+            with self.metrics.timer('scheduler_run_seconds'):
+                self.task()
+            self.metrics.incr('scheduler_runs', status='ok')
+        except Exception as e:
+            # A failing run must not take the scheduler loop down with it
+            self.metrics.incr('scheduler_runs', status='error')
+            print(f"Error in scheduled run: {str(e)}")
+
+    def _work(self) -> None:
+        try:
+            self.run_task()
+        finally:
+            with self._lock:
+                self._running = False
+            # Let the loop pick up a queued run straight away
+            self._wake.set()
+
+    def dispatch(self, slot: datetime) -> bool:
+        """Run the slot now, or skip/queue it if an overrunning run is still going."""
+        with self._lock:
+            if self._running:
+                if self.overlap == 'queue':
+                    self._queued = slot
+                    self.metrics.incr('scheduler_runs', status='queued')
+                    print(f"Warning: Previous run still in progress; queueing the {slot.isoformat()} run")
+                else:
+                    self.metrics.incr('scheduler_runs', status='skipped')
+                    print(f"Warning: Previous run still in progress; skipping the {slot.isoformat()} run")
+                return False
+            self._running = True
+            self.current_slot = slot
+
+        self._save_last_run(slot)
+        worker = threading.Thread(target=self._work, name='scheduled-run', daemon=True)
+        worker.start()
+        worker.join(self.timeout)
+        if worker.is_alive():
+            # Threads cannot be killed; the run is left to finish (or hang) in the background
+            self.metrics.incr('scheduler_runs', status='timeout')
+            print(f"Warning: Scheduled run exceeded {self.timeout}s; continuing without waiting for it")
+        return True
+
+    def catch_up(self, now: datetime) -> bool:
+        """Run the most recent slot once if it was missed since the last recorded run."""
+        last = self.last_run()
+        if last is None:
+            return False
+        missed = self.previous_run(now)
+        if missed <= last:
+            return False
+        print(f"Catching up on the missed {missed.isoformat()} run")
+        self.metrics.incr('scheduler_catch_ups')
+        return self.dispatch(missed)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
 
     def start(self):
-        for time_str in self.schedule_times:
-            schedule.every().day.at(time_str).do(self.task)
+        self.catch_up(self.clock())
+        next_slot = self.next_run(self.clock())
+        while not self._stop.is_set():
+            with self._lock:
+                queued = None if self._running else self._queued
+                if queued is not None:
+                    self._queued = None
+            if queued is not None:
+                self.dispatch(queued)
+                continue
 
-        while True:
-            schedule.run_pending()
-            time.sleep(1) 
\ No newline at end of file
+            now = self.clock()
+            if now >= next_slot:
+                self.dispatch(next_slot)
+                following = self.next_run(next_slot)
+                finished = self.clock()
+                if following <= finished:
+                    # The run itself outlasted the next slot: apply the overlap policy to it
+                    if self.overlap == 'queue':
+                        next_slot = following
+                        continue
+                    self.metrics.incr('scheduler_runs', status='skipped')
+                    print(f"Warning: Previous run still in progress; skipping the {following.isoformat()} run")
+                next_slot = self.next_run(max(finished, next_slot))
+                continue
+            self.sleep((next_slot - now).total_seconds())
@@ -0,0 +1,111 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional, Set
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# /abs/2401.01234v2, /pdf/2401.01234v2.pdf, /html/2401.01234v1 and old-style /abs/cs/0112017
+ARXIV_PATH = re.compile(r'^/(?:abs|pdf|html)/(.+?)(?:v\d+)?(?:\.pdf)?/?$')
+TRACKING_PARAMS = {'source', 'ref', 'fbclid', 'gclid'}
+# SQLite caps the number of bound parameters per statement
+LOOKUP_CHUNK = 500
+
+def normalize_url(url: str) -> str:
+    """Reduce a URL to a canonical form so trivially different links dedup together."""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+
+    if host in ('arxiv.org', 'export.arxiv.org'):
+        match = ARXIV_PATH.match(parts.path)
+        if match:
+            return f"arxiv:{match.group(1)}"
+
+    query = urlencode([
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    ])
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit(('https' if parts.scheme in ('http', 'https') else parts.scheme, host, path, query, ''))
+
+class SeenStore:
+    """Persistent set of delivered article URLs with TTL-based eviction.
+
+    URLs are stored as 16-byte hashes of their normalized form in a WITHOUT ROWID
+    table, so lookups are a single index probe and the file stays compact. A
+    `namespace` (e.g. a subscriber id) keeps a separate seen set in the same table.
+    """
+
+    def __init__(self, path: str, ttl: float = 30 * 24 * 3600):
+        self.path = path
+        self.ttl = ttl
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS seen (key BLOB PRIMARY KEY, seen_at REAL NOT NULL) WITHOUT ROWID'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS seen_at_idx ON seen (seen_at)')
+        self._conn.commit()
+        self.evict()
+
+    @staticmethod
+    def _key(url: str, namespace: str = '') -> bytes:
+        value = normalize_url(url)
+        if namespace:
+            value = f"{namespace}\0{value}"
+        return hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+
+    def filter_unseen(self, urls: Iterable[str], namespace: str = '') -> List[str]:
+        """Return the URLs (in input order) that have not been seen within the TTL."""
+        urls = list(urls)
+        keys = [self._key(url, namespace) for url in urls]
+        seen = self._seen_keys(keys)
+        return [url for url, key in zip(urls, keys) if key not in seen]
+
+    def contains(self, url: str) -> bool:
+        return not self.filter_unseen([url])
+
+    def add_many(self, urls: Iterable[str], seen_at: Optional[float] = None, namespace: str = '') -> None:
+        seen_at = time.time() if seen_at is None else seen_at
+        rows = [(self._key(url, namespace), seen_at) for url in urls]
+        with self._lock:
+            self._conn.executemany('INSERT OR REPLACE INTO seen (key, seen_at) VALUES (?, ?)', rows)
+            self._conn.commit()
+
+    def evict(self, now: Optional[float] = None) -> int:
+        cutoff = (time.time() if now is None else now) - self.ttl
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM seen WHERE seen_at < ?', (cutoff,))
+            self._conn.commit()
+        return cursor.rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM seen').fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _seen_keys(self, keys: List[bytes]) -> Set[bytes]:
+        cutoff = time.time() - self.ttl
+        seen = set()
+        with self._lock:
+            for i in range(0, len(keys), LOOKUP_CHUNK):
+                chunk = keys[i:i + LOOKUP_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f'SELECT key FROM seen WHERE seen_at >= ? AND key IN ({placeholders})',
+                    [cutoff, *chunk]
+                )
+                seen.update(row[0] for row in rows)
+        return seen
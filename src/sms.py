@@ -0,0 +1,96 @@
+import math
+import unicodedata
+from typing import List, Sequence, Tuple
+
+# GSM 03.38 default alphabet (one septet each) and its extension table (escape + septet)
+GSM7_BASIC = set(
+    "@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà"
+)
+GSM7_EXTENDED = set("^{}\\[~]|€\f")
+
+# Single-part and per-part (after the concatenation header) capacities
+GSM7_SINGLE, GSM7_PART = 160, 153
+UCS2_SINGLE, UCS2_PART = 70, 67
+# Twilio rejects bodies longer than this
+MAX_BODY_CHARS = 1600
+
+# Typographic characters LLMs and feeds like to emit, mapped to GSM-7 look-alikes
+REPLACEMENTS = {
+    '‘': "'", '’': "'", '‚': "'", '‛': "'", '′': "'", '`': "'",
+    '“': '"', '”': '"', '„': '"', '‟': '"', '″': '"', '«': '"', '»': '"',
+    '‐': '-', '‑': '-', '‒': '-', '–': '-', '—': '-', '―': '-', '−': '-',
+    '…': '...', '•': '*', '·': '*', '×': 'x',
+    '\u00a0': ' ', '\u2002': ' ', '\u2003': ' ', '\u2009': ' ', '\u200a': ' ', '\u202f': ' ',
+    '\u200b': '', '\u200c': '', '\u200d': '', '\ufeff': '', '\t': ' ',
+}
+
+def is_gsm7(text: str) -> bool:
+    return all(c in GSM7_BASIC or c in GSM7_EXTENDED for c in text)
+
+def _normalize_char(char: str) -> str:
+    if char in GSM7_BASIC or char in GSM7_EXTENDED:
+        return char
+    if char in REPLACEMENTS:
+        return REPLACEMENTS[char]
+    # Accented letters outside the alphabet lose their accent (á -> a) rather than
+    # forcing the whole message into UCS-2
+    stripped = ''.join(c for c in unicodedata.normalize('NFKD', char) if not unicodedata.combining(c))
+    if stripped and is_gsm7(stripped):
+        return stripped
+    return char
+
+def normalize_gsm7(text: str) -> str:
+    """Replace characters with GSM-7 equivalents where one exists; the rest (e.g. emoji) are kept."""
+    if is_gsm7(text):
+        return text
+    return ''.join(_normalize_char(c) for c in text)
+
+def encoding(text: str) -> str:
+    return 'gsm7' if is_gsm7(text) else 'ucs2'
+
+def length_units(text: str, text_encoding: str) -> int:
+    """Septets for GSM-7 (extension characters take two), UTF-16 code units for UCS-2."""
+    if text_encoding == 'gsm7':
+        return sum(2 if c in GSM7_EXTENDED else 1 for c in text)
+    return len(text.encode('utf-16-le')) // 2
+
+def segment_count(text: str) -> int:
+    text_encoding = encoding(text)
+    units = length_units(text, text_encoding)
+    single, part = (GSM7_SINGLE, GSM7_PART) if text_encoding == 'gsm7' else (UCS2_SINGLE, UCS2_PART)
+    if units <= single:
+        return 1
+    return math.ceil(units / part)
+
+def pack(texts: Sequence[str], max_segments: int = 10) -> List[List[int]]:
+    """Group texts into messages of at most `max_segments` segments, using as few segments as possible.
+
+    GSM-7 and UCS-2 texts go into separate messages, since a single UCS-2 character
+    would more than double the segments of everything sharing its message. Each group
+    is bin-packed first-fit decreasing. Returns lists of indices into `texts`, in their
+    original order, with messages ordered by their first text.
+    """
+    groups = {'gsm7': [], 'ucs2': []}
+    for index, text in enumerate(texts):
+        text_encoding = encoding(text)
+        groups[text_encoding].append((index, length_units(text, text_encoding), len(text)))
+
+    bins: List[Tuple[List[int], int, int]] = []
+    for text_encoding, items in groups.items():
+        single, part = (GSM7_SINGLE, GSM7_PART) if text_encoding == 'gsm7' else (UCS2_SINGLE, UCS2_PART)
+        capacity = single if max_segments <= 1 else max_segments * part
+        encoding_bins: List[Tuple[List[int], int, int]] = []
+        for index, units, chars in sorted(items, key=lambda item: item[1], reverse=True):
+            for i, (members, used_units, used_chars) in enumerate(encoding_bins):
+                if used_units + units <= capacity and used_chars + chars <= MAX_BODY_CHARS:
+                    members.append(index)
+                    encoding_bins[i] = (members, used_units + units, used_chars + chars)
+                    break
+            else:
+                encoding_bins.append(([index], units, chars))
+        bins.extend(encoding_bins)
+
+    messages = [sorted(members) for members, _, _ in bins]
+    messages.sort(key=lambda members: members[0])
+    return messages
@@ -0,0 +1,298 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+from .metrics import NULL_METRICS
+from .models import Article
+from .notifier import SMSMessage
+from .ranking import TopKRanker
+
+class SubscriberError(Exception):
+    pass
+
+@dataclass
+class Subscriber:
+    id: str
+    phone: str
+    topics: List[str]
+    max_articles: int = 3
+    # Empty means the default SCHEDULE_TIMES
+    schedule_times: List[str] = field(default_factory=list)
+    active: bool = True
+
+    def per_topic(self) -> int:
+        # Same default quota as the single-recipient run: an even share, rounded up
+        return -(-self.max_articles // max(1, len(self.topics)))
+
+    def is_due(self, slot_time: Optional[str], default_times: Iterable[str] = ()) -> bool:
+        """A run without a slot (e.g. a manual run) is due for every active subscriber."""
+        times = self.schedule_times or list(default_times)
+        return self.active and (slot_time is None or not times or slot_time in times)
+
+def _split(value: str) -> List[str]:
+    return [v.strip() for v in value.split(',') if v.strip()]
+
+class SubscriberRegistry:
+    """SQLite-backed set of SMS recipients, each with their own topics, digest size and schedule."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS subscribers ('
+            'id TEXT PRIMARY KEY, phone TEXT NOT NULL, topics TEXT NOT NULL, '
+            'max_articles INTEGER NOT NULL, schedule_times TEXT NOT NULL, active INTEGER NOT NULL)'
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _row(subscriber: Subscriber) -> Tuple:
+        return (
+            subscriber.id,
+            subscriber.phone,
+            ','.join(t.lower().strip() for t in subscriber.topics),
+            subscriber.max_articles,
+            ','.join(subscriber.schedule_times),
+            int(subscriber.active)
+        )
+
+    def upsert_many(self, subscribers: Iterable[Subscriber]) -> None:
+        rows = [self._row(s) for s in subscribers]
+        with self._lock:
+            self._conn.executemany('INSERT OR REPLACE INTO subscribers VALUES (?, ?, ?, ?, ?, ?)', rows)
+            self._conn.commit()
+
+    def upsert(self, subscriber: Subscriber) -> None:
+        self.upsert_many([subscriber])
+
+    def remove(self, subscriber_id: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM subscribers WHERE id = ?', (subscriber_id,))
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def all(self, active_only: bool = True) -> List[Subscriber]:
+        query = 'SELECT id, phone, topics, max_articles, schedule_times, active FROM subscribers'
+        if active_only:
+            query += ' WHERE active = 1'
+        with self._lock:
+            rows = self._conn.execute(query + ' ORDER BY id').fetchall()
+        return [
+            Subscriber(id=id_, phone=phone, topics=_split(topics), max_articles=max_articles,
+                       schedule_times=_split(times), active=bool(active))
+            for id_, phone, topics, max_articles, times, active in rows
+        ]
+
+    def due(self, slot_time: Optional[str] = None, default_times: Iterable[str] = ()) -> List[Subscriber]:
+        default_times = list(default_times)
+        return [s for s in self.all() if s.is_due(slot_time, default_times)]
+
+    def schedule_times(self) -> List[str]:
+        return sorted({t for s in self.all() for t in s.schedule_times})
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM subscribers').fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+@dataclass
+class FanOutResult:
+    delivered: Dict[str, int] = field(default_factory=dict)
+    failed: List[str] = field(default_factory=list)
+    topics: int = 0
+    summarized: int = 0
+
+class DigestFanOut:
+    """Scrape, rank and summarize each distinct topic once, then send every subscriber their digest.
+
+    Feeds are fetched once per run and summaries are made once per picked article, so
+    cost follows the number of distinct topics rather than subscribers. Dedup is per
+    subscriber (a namespace in the seen store), so someone on an evening schedule still
+    gets an article that morning subscribers already received. All digests go out in
+    one concurrent, rate-limited batch.
+    """
+
+    def __init__(self, scraper, summarizer, notifier, seen_store=None, metrics=None, outbox_worker=None,
+                 enricher=None, archive=None, fetcher=None):
+        self.scraper = scraper
+        self.summarizer = summarizer
+        self.notifier = notifier
+        self.seen_store = seen_store
+        self.metrics = metrics or NULL_METRICS
+        self.outbox_worker = outbox_worker
+        self.enricher = enricher
+        self.archive = archive
+        # Fetches and parses feeds in worker processes (see ShardCoordinator)
+        self.fetcher = fetcher
+
+    def run(self, subscribers: List[Subscriber]) -> FanOutResult:
+        result = FanOutResult()
+        topics = sorted({t for s in subscribers for t in s.topics})
+        result.topics = len(topics)
+        if not topics:
+            return result
+
+        with self.metrics.timer('stage_seconds', stage='fetch'):
+            if self.fetcher is not None:
+                ranked = self.scraper.get_articles_for_topics(topics, fetcher=self.fetcher)
+            else:
+                ranked = self.scraper.get_articles_for_topics(topics)
+        if self.archive is not None:
+            self.archive.record(a for articles in ranked.values() for a in articles)
+
+        picks = {s.id: self._pick(s, ranked) for s in subscribers}
+
+        # Summarize the union of everyone's picks once; an article listed under two
+        # topics is a separate object per topic but shares one summary
+        unique: Dict[str, Article] = {}
+        for articles in picks.values():
+            for article in articles:
+                unique.setdefault(article.url, article)
+        if self.enricher is not None:
+            with self.metrics.timer('stage_seconds', stage='enrich'):
+                self.enricher.enrich(list(unique.values()))
+        with self.metrics.timer('stage_seconds', stage='summarize'):
+            self.summarizer.summarize_many(list(unique.values()))
+        for articles in picks.values():
+            for article in articles:
+                article.summary = unique[article.url].summary
+        result.summarized = sum(1 for a in unique.values() if a.summary)
+        if self.archive is not None:
+            self.archive.record(a for a in unique.values() if a.summary)
+
+        # Subscribers with identical picks share the packed messages
+        packed: Dict[Tuple[int, ...], List[SMSMessage]] = {}
+        outbox = []
+        for subscriber in subscribers:
+            digest = [a for a in picks[subscriber.id] if a.summary]
+            if not digest:
+                continue
+            key = tuple(id(a) for a in digest)
+            if key not in packed:
+                packed[key] = self.notifier.pack(digest)
+            outbox.extend((subscriber, message) for message in packed[key])
+
+        if self.outbox_worker is not None:
+            outcomes = self._deliver_via_outbox(outbox)
+        else:
+            with self.metrics.timer('stage_seconds', stage='notify'):
+                results = self.notifier.deliver_many([(s.phone, message) for s, message in outbox])
+            outcomes = [(subscriber, message, delivery.ok) for (subscriber, message), delivery in zip(outbox, results)]
+
+        sent: Dict[str, List[Article]] = {}
+        failed = set()
+        for subscriber, message, ok in outcomes:
+            if ok:
+                sent.setdefault(subscriber.id, []).extend(message.articles)
+            else:
+                failed.add(subscriber.id)
+        for subscriber in subscribers:
+            if subscriber.id in failed:
+                self.metrics.incr('errors', stage='notify')
+                result.failed.append(subscriber.id)
+            if subscriber.id in sent:
+                delivered = sent[subscriber.id]
+                result.delivered[subscriber.id] = len(delivered)
+                if self.archive is not None:
+                    self.archive.mark_delivered(delivered)
+                # Articles from a failed message stay unseen and are retried next run
+                if self.seen_store is not None and self.outbox_worker is None:
+                    self.seen_store.add_many((url for a in delivered for url in [a.url, *a.alternates]),
+                                             namespace=subscriber.id)
+        self.metrics.incr('subscribers_delivered', len(result.delivered))
+        return result
+
+    def _deliver_via_outbox(self, outbox: List[Tuple[Subscriber, SMSMessage]]) -> List[Tuple[Subscriber, SMSMessage, bool]]:
+        keys = self.outbox_worker.outbox.enqueue([(s.phone, message) for s, message in outbox])
+        queued = dict(zip(keys, outbox))
+        # Once queued, delivery is the outbox's job; don't pick these articles again
+        if self.seen_store is not None:
+            for subscriber, message in outbox:
+                self.seen_store.add_many((url for a in message.articles for url in [a.url, *a.alternates]),
+                                         namespace=subscriber.id)
+        with self.metrics.timer('stage_seconds', stage='notify'):
+            deliveries = self.outbox_worker.drain()
+        # Rows left over from an earlier run are delivered too but not counted here
+        return [(*queued[entry.key], delivery.ok) for entry, delivery in deliveries if entry.key in queued]
+
+    def _pick(self, subscriber: Subscriber, ranked: Dict[str, List[Article]]) -> List[Article]:
+        """The subscriber's best `max_articles` unseen articles across their topics, best first."""
+        quota = subscriber.per_topic()
+        ranker = TopKRanker(subscriber.max_articles, quota)
+        window = max(quota * 2, 8)
+        for topic in subscriber.topics:
+            candidates = ranked.get(topic.lower().strip(), [])
+            # Look at the ranking a window at a time so a long list costs one small query
+            for start in range(0, len(candidates), window):
+                batch = candidates[start:start + window]
+                if self.seen_store is not None:
+                    unseen = set(self.seen_store.filter_unseen((a.url for a in batch), namespace=subscriber.id))
+                    batch = [a for a in batch if a.url in unseen]
+                # Candidates are sorted, so once a whole window is turned away the rest would be too
+                if batch and not ranker.extend(batch):
+                    break
+        return ranker.ranked()
+
+def load_subscribers(path: str) -> List[Subscriber]:
+    """Read subscribers from a JSON list of objects with Subscriber's fields."""
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    try:
+        return [Subscriber(**entry) for entry in entries]
+    except TypeError as e:
+        raise SubscriberError(f"Invalid subscriber entry in {path}: {str(e)}") from e
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Manage the SMS subscriber registry.')
+    parser.add_argument('--db', default=os.getenv('SUBSCRIBERS_DB_PATH', '.cache/subscribers.db'))
+    commands = parser.add_subparsers(dest='command', required=True)
+    add = commands.add_parser('add', help='add or update a subscriber')
+    add.add_argument('id')
+    add.add_argument('phone')
+    add.add_argument('--topics', required=True, help='comma-separated topics')
+    add.add_argument('--max-articles', type=int, default=3)
+    add.add_argument('--times', default='', help='comma-separated HH:MM; empty means SCHEDULE_TIMES')
+    add.add_argument('--inactive', action='store_true')
+    remove = commands.add_parser('remove', help='remove a subscriber')
+    remove.add_argument('id')
+    load = commands.add_parser('import', help='add or update subscribers from a JSON file')
+    load.add_argument('path')
+    commands.add_parser('list', help='list subscribers')
+    args = parser.parse_args(argv)
+
+    registry = SubscriberRegistry(args.db)
+    try:
+        if args.command == 'add':
+            registry.upsert(Subscriber(args.id, args.phone, _split(args.topics), args.max_articles,
+                                       _split(args.times), not args.inactive))
+        elif args.command == 'remove':
+            if not registry.remove(args.id):
+                print(f"No subscriber '{args.id}'")
+                return 1
+        elif args.command == 'import':
+            subscribers = load_subscribers(args.path)
+            registry.upsert_many(subscribers)
+            print(f"Imported {len(subscribers)} subscribers")
+        else:
+            for s in registry.all(active_only=False):
+                times = ','.join(s.schedule_times) or 'default schedule'
+                status = '' if s.active else ' (inactive)'
+                print(f"{s.id}\t{s.phone}\t{','.join(s.topics)}\t{s.max_articles}\t{times}{status}")
+    finally:
+        registry.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,65 +1,224 @@
-from typing import Optional
-import openai
-import anthropic
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
 from .models import Article
 from .config import Config
+from .llm_backends import Completion
+from .metrics import NULL_METRICS
+from .prompts import PromptBuilder, estimate_tokens
+from .llm_router import LLMRouter
+from .providers import LLM_BACKENDS
+from .rate_limit import RateLimiter
+from .summary_cache import SummaryCache
+
+SYSTEM_PROMPT = "You are a concise news summarizer."
+PROMPT_TEMPLATE = """Summarize this article in 2-3 concise sentences:
+Title: {title}
+Content: {content}"""
+PACKED_PROMPT_TEMPLATE = """Summarize each of the following {count} articles in 2-3 concise sentences.
+Reply with exactly one line per article, formatted as "[n] summary", in the same order.
+
+{articles}"""
+PACKED_ITEM_TEMPLATE = """[{index}] Title: {title}
+Content: {content}"""
+PACKED_LINE = re.compile(r'^\s*\[(\d+)\]\s*(.+?)\s*$', re.MULTILINE)
+SUMMARY_MAX_TOKENS = 100
 
 class SummarizerError(Exception):
     pass
 
+def is_retryable(error: Exception) -> bool:
+    """Rate limits (429) and server errors (5xx) are worth retrying; anything else is not."""
+    cause = error.__cause__ or error
+    status = getattr(cause, 'status_code', None)
+    return status is not None and (status == 429 or status >= 500)
+
 class Summarizer:
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, cache: Optional[SummaryCache] = None, metrics=None):
         self.config = config
-        if config.llm_provider == 'openai':
-            openai.api_key = config.llm_api_key
-        elif config.llm_provider == 'anthropic':
-            self.client = anthropic.Anthropic(api_key=config.llm_api_key)
+        self.cache = cache
+        self.metrics = metrics or NULL_METRICS
+        self.rate_limiter = RateLimiter(config.llm_requests_per_minute, config.llm_tokens_per_minute)
+        self.prompts = PromptBuilder(config.llm_input_token_budget, metrics=self.metrics)
+        self.retry_base_delay = 1.0
+        # Only the configured providers' SDKs are imported (see `providers.LLM_BACKENDS`)
+        self.backend = None
+        if config.llm_providers and len(config.llm_providers) > 1:
+            keys = config.llm_api_keys or {}
+            self.backend = LLMRouter(
+                {name: LLM_BACKENDS.create(name, keys.get(name) or config.llm_api_key) for name in config.llm_providers},
+                hedge_after=config.llm_hedge_after_seconds or None,
+                # Room for a hedge per concurrent request
+                workers=2 * config.llm_concurrency,
+                metrics=self.metrics
+            )
+        elif config.llm_provider in LLM_BACKENDS:
+            self.backend = LLM_BACKENDS.create(config.llm_provider, config.llm_api_key)
+
+    def close(self) -> None:
+        """Release the backend's resources, e.g. the router's thread pool and any hedged calls still queued."""
+        close = getattr(self.backend, 'close', None)
+        if close is not None:
+            close()
 
     def summarize(self, article: Article) -> Optional[str]:
-        if self.config.llm_provider == 'openai':
-            return self._summarize_with_openai(article)
-        elif self.config.llm_provider == 'anthropic':
-            return self._summarize_with_anthropic(article)
-        else:
+        key = self._cache_key(article)
+        summary = self._cached(key)
+        if summary is not None:
+            return summary
+
+        summary = self._summarize_uncached(article)
+        if key is not None and summary:
+            self.cache.put(key, summary)
+        return summary
+
+    def _summarize_uncached(self, article: Article) -> str:
+        if self.backend is None:
             raise SummarizerError(f"Unsupported LLM provider: {self.config.llm_provider}")
 
-    def _summarize_with_openai(self, article: Article) -> str:
-        try:
-            prompt = f"""Summarize this article in 2-3 concise sentences:
-            Title: {article.title}
-            Content: {article.content}"""
-
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a concise news summarizer."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=100,
-                temperature=0.7
-            )
-            
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            raise SummarizerError(f"Failed to summarize article with OpenAI: {str(e)}")
+        prompt = PROMPT_TEMPLATE.format(title=article.title, content=self._content(article))
+        prompt_tokens = estimate_tokens(prompt) + SUMMARY_MAX_TOKENS
+        return self._with_retries(lambda: self._complete(prompt, SUMMARY_MAX_TOKENS), prompt_tokens)
+
+    def summarize_many(self, articles: List[Article]) -> List[Article]:
+        """Summarize `articles` concurrently and return those that got a summary, in input order.
+
+        Requests run on up to `llm_concurrency` threads under the provider rate limit. With
+        `llm_pack_size` > 1, short abstracts are packed into one prompt and the numbered
+        reply is split back onto each article.
+        """
+        pending = []
+        for article in articles:
+            cached = self._cached(self._cache_key(article))
+            if cached is not None:
+                article.summary = cached
+            else:
+                pending.append(article)
+
+        jobs = []
+        pack_size = self.config.llm_pack_size
+        if pack_size > 1:
+            # Packing goes by the prompt text, so markup-heavy abstracts still qualify
+            short = [a for a in pending if len(self._content(a)) <= self.config.llm_pack_max_chars]
+            jobs.extend(short[i:i + pack_size] for i in range(0, len(short), pack_size))
+            jobs.extend([a] for a in pending if len(self._content(a)) > self.config.llm_pack_max_chars)
+        else:
+            jobs.extend([a] for a in pending)
 
-    def _summarize_with_anthropic(self, article: Article) -> str:
+        if jobs:
+            workers = max(1, min(self.config.llm_concurrency, len(jobs)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(self._summarize_job, jobs))
+
+        return [a for a in articles if a.summary]
+
+    def _summarize_job(self, batch: List[Article]) -> None:
+        if len(batch) > 1:
+            try:
+                summaries = self._summarize_packed(batch)
+            except SummarizerError as e:
+                print(f"Error summarizing packed batch of {len(batch)} articles: {str(e)}")
+                summaries = {}
+            for index, article in enumerate(batch):
+                if index in summaries:
+                    article.summary = summaries[index]
+                    self._store(article)
+            # Anything the model skipped or mangled gets its own request
+            batch = [a for i, a in enumerate(batch) if i not in summaries]
+
+        for article in batch:
+            try:
+                article.summary = self._summarize_uncached(article)
+                self._store(article)
+            except Exception as e:
+                print(f"Error summarizing article {article.title}: {str(e)}")
+
+    def _summarize_packed(self, batch: List[Article]) -> dict:
+        items = "\n\n".join(
+            PACKED_ITEM_TEMPLATE.format(index=i + 1, title=a.title, content=self._content(a))
+            for i, a in enumerate(batch)
+        )
+        prompt = PACKED_PROMPT_TEMPLATE.format(count=len(batch), articles=items)
+        max_tokens = SUMMARY_MAX_TOKENS * len(batch)
+        text = self._with_retries(
+            lambda: self._complete(prompt, max_tokens),
+            estimate_tokens(prompt) + max_tokens
+        )
+
+        summaries = {}
+        for match in PACKED_LINE.finditer(text):
+            index = int(match.group(1)) - 1
+            if 0 <= index < len(batch) and index not in summaries:
+                summaries[index] = match.group(2)
+        return summaries
+
+    def _with_retries(self, call: Callable[[], Completion], tokens: int) -> str:
+        provider = self.config.llm_provider
+        attempt = 0
+        while True:
+            with self.metrics.timer('llm_rate_limit_wait_seconds', provider=provider):
+                self.rate_limiter.acquire(tokens)
+            start = time.perf_counter()
+            try:
+                completion = call()
+                # With a router, label the request with the provider that actually answered it
+                served_by = completion.provider or provider
+                self.metrics.observe('llm_latency_seconds', time.perf_counter() - start, provider=served_by)
+                self.metrics.incr('llm_requests', provider=served_by)
+                return completion.text
+            except SummarizerError as e:
+                self.metrics.incr('llm_errors', provider=provider, retryable=is_retryable(e))
+                if attempt >= self.config.llm_max_retries or not is_retryable(e):
+                    raise
+                self.metrics.incr('llm_retries', provider=provider)
+                # Exponential backoff with jitter; only this worker thread waits
+                delay = self.retry_base_delay * (2 ** attempt)
+                time.sleep(delay + random.uniform(0, delay / 2))
+                attempt += 1
+
+    def _content(self, article: Article) -> str:
+        return self.prompts.content(article.title, article.content)
+
+    def _cached(self, key: Optional[str]) -> Optional[str]:
+        if key is None:
+            return None
+        summary = self.cache.get(key)
+        self.metrics.incr('summary_cache_hits' if summary is not None else 'summary_cache_misses')
+        return summary
+
+    def _record_usage(self, input_tokens: Optional[int], output_tokens: Optional[int],
+                      provider: Optional[str] = None) -> None:
+        if not self.metrics.enabled:
+            return
+        for value, direction in ((input_tokens, 'input'), (output_tokens, 'output')):
+            if value is not None:
+                self.metrics.incr('llm_tokens', value, provider=provider or self.config.llm_provider, direction=direction)
+
+    def _cache_key(self, article: Article) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return SummaryCache.make_key(
+            self.config.llm_provider,
+            self.backend.model if self.backend is not None else '',
+            # The budget changes what the model sees, so it is part of the prompt identity
+            f"{PROMPT_TEMPLATE}\0budget={self.prompts.budget}",
+            article.title,
+            article.content
+        )
+
+    def _store(self, article: Article) -> None:
+        key = self._cache_key(article)
+        if key is not None and article.summary:
+            self.cache.put(key, article.summary)
+
+    def _complete(self, prompt: str, max_tokens: int) -> Completion:
+        if self.backend is None:
+            raise SummarizerError(f"Unsupported LLM provider: {self.config.llm_provider}")
         try:
-            prompt = f"""Summarize this article in 2-3 concise sentences:
-            Title: {article.title}
-            Content: {article.content}"""
-
-            response = self.client.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=100,
-                temperature=0.7,
-                system="You are a concise news summarizer.",
-                messages=[{
-                    "role": "user",
-                    "content": prompt
-                }]
-            )
-            
-            return response.content[0].text.strip()
+            completion = self.backend.complete(SYSTEM_PROMPT, prompt, max_tokens)
         except Exception as e:
-            raise SummarizerError(f"Failed to summarize article with Anthropic: {str(e)}")
\ No newline at end of file
+            raise SummarizerError(f"Failed to summarize article with {self.backend.label}: {str(e)}") from e
+        self._record_usage(completion.input_tokens, completion.output_tokens, completion.provider)
+        return completion
@@ -0,0 +1,106 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+class SummaryCache:
+    """Content-addressed summary store: an in-memory LRU in front of SQLite.
+
+    Keys hash everything that determines the LLM output, so a summary is reused
+    across runs and topics but never across a changed model or prompt.
+    """
+
+    def __init__(self, path: Optional[str] = None, memory_entries: int = 1024,
+                 max_entries: int = 100_000, max_age: float = 90 * 24 * 3600):
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._memory: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS summaries '
+                '(key TEXT PRIMARY KEY, summary TEXT NOT NULL, created_at REAL NOT NULL)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS summaries_created_idx ON summaries (created_at)')
+            self._conn.commit()
+            self.evict()
+
+    @staticmethod
+    def make_key(provider: str, model: str, template: str, title: str, content: str) -> str:
+        digest = hashlib.sha256()
+        for part in (provider, model, template, title, content):
+            # Length-prefix each part so ("ab", "c") and ("a", "bc") hash differently
+            encoded = (part or '').encode('utf-8')
+            digest.update(len(encoded).to_bytes(8, 'big'))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            summary = self._memory.get(key)
+            if summary is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return summary
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    'SELECT summary FROM summaries WHERE key = ? AND created_at >= ?',
+                    (key, time.time() - self.max_age)
+                ).fetchone()
+                if row:
+                    self._remember(key, row[0])
+                    self.hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, summary: str) -> None:
+        with self._lock:
+            self._remember(key, summary)
+            if self._conn is not None:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO summaries (key, summary, created_at) VALUES (?, ?, ?)',
+                    (key, summary, time.time())
+                )
+                self._conn.commit()
+
+    def evict(self) -> None:
+        if self._conn is None:
+            return
+        with self._lock:
+            self._conn.execute('DELETE FROM summaries WHERE created_at < ?', (time.time() - self.max_age,))
+            self._conn.execute(
+                'DELETE FROM summaries WHERE key IN '
+                '(SELECT key FROM summaries ORDER BY created_at DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'memory_entries': len(self._memory)}
+
+    def close(self) -> None:
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+                self._conn = None
+
+    def _remember(self, key: str, summary: str) -> None:
+        self._memory[key] = summary
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
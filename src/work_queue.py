@@ -0,0 +1,394 @@
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from .metrics import NULL_METRICS, Metrics
+from .models import Article
+
+# Unit key shared by all arXiv feeds of a run (see ShardCoordinator.plan_units)
+ARXIV_UNIT = 'arxiv'
+
+@dataclass
+class WorkUnit:
+    run_id: str
+    key: str
+    payload: dict
+    owner: str
+    attempts: int = 1
+
+class WorkQueue:
+    """Leased units of work in SQLite, shared by worker processes (or hosts, over a shared directory).
+
+    A coordinator enqueues a run's units; workers claim one at a time, taking a lease of
+    `lease` seconds that they renew while they work. Rows move pending -> leased -> done
+    (or failed) -> collected. A unit whose worker crashed is handed out again once its
+    lease expires, up to `max_attempts` claims. Completing a unit requires still holding
+    its lease, so a worker that lost one cannot overwrite the result of the worker that
+    took it over.
+    """
+
+    def __init__(self, path: str, lease: float = 120, max_attempts: int = 3,
+                 clock: Callable[[], float] = time.time):
+        self.path = path
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self._clock = clock
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # Other processes hold the write lock only briefly; wait for them rather than fail
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS work_units ('
+            'run_id TEXT NOT NULL, key TEXT NOT NULL, payload TEXT NOT NULL, status TEXT NOT NULL, '
+            'owner TEXT, lease_expires REAL, attempts INTEGER NOT NULL DEFAULT 0, result TEXT, error TEXT, '
+            'created_at REAL NOT NULL, updated_at REAL NOT NULL, PRIMARY KEY (run_id, key))'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS work_units_status_idx ON work_units (status, lease_expires)')
+        self._conn.commit()
+
+    def enqueue(self, run_id: str, units: Dict[str, dict]) -> int:
+        """Add `units` (key -> JSON-serializable payload) to `run_id`; returns how many were new."""
+        now = self._clock()
+        rows = [(run_id, key, json.dumps(payload), 'pending', now, now) for key, payload in units.items()]
+        with self._lock:
+            cursor = self._conn.executemany(
+                'INSERT OR IGNORE INTO work_units (run_id, key, payload, status, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def claim(self, owner: str, run_id: Optional[str] = None) -> Optional[WorkUnit]:
+        """Lease the oldest claimable unit (of `run_id`, or of any run) to `owner`."""
+        now = self._clock()
+        where = "(status = 'pending' OR (status = 'leased' AND lease_expires <= ?))"
+        params: list = [now]
+        if run_id is not None:
+            where += ' AND run_id = ?'
+            params.append(run_id)
+        with self._lock:
+            # Take the write lock up front so two processes can't read the same unit as free
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.execute(
+                    "UPDATE work_units SET status = 'failed', error = 'lease expired', updated_at = ? "
+                    "WHERE status = 'leased' AND lease_expires <= ? AND attempts >= ?",
+                    (now, now, self.max_attempts)
+                )
+                row = self._conn.execute(
+                    f'SELECT run_id, key, payload, attempts FROM work_units WHERE {where} '
+                    'ORDER BY created_at, rowid LIMIT 1',
+                    params
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE work_units SET status = 'leased', owner = ?, lease_expires = ?, "
+                        "attempts = attempts + 1, updated_at = ? WHERE run_id = ? AND key = ?",
+                        (owner, now + self.lease, now, row[0], row[1])
+                    )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        if row is None:
+            return None
+        return WorkUnit(row[0], row[1], json.loads(row[2]), owner, row[3] + 1)
+
+    def renew(self, unit: WorkUnit) -> bool:
+        """Extend `unit`'s lease; False if it has expired and been taken over."""
+        return self._update_leased(unit, 'lease_expires = ?', (self._clock() + self.lease,))
+
+    def complete(self, unit: WorkUnit, result) -> bool:
+        """Store `result` (JSON-serializable) for `unit`; False if its lease was lost."""
+        return self._update_leased(unit, "status = 'done', result = ?, error = NULL", (json.dumps(result),))
+
+    def fail(self, unit: WorkUnit, error: str) -> bool:
+        """Give `unit` back for another attempt, or fail it once it has had `max_attempts`."""
+        status = 'pending' if unit.attempts < self.max_attempts else 'failed'
+        return self._update_leased(unit, 'status = ?, error = ?', (status, error))
+
+    def _update_leased(self, unit: WorkUnit, assignments: str, values: Tuple) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE work_units SET {assignments}, updated_at = ? "
+                "WHERE run_id = ? AND key = ? AND owner = ? AND status = 'leased'",
+                (*values, self._clock(), unit.run_id, unit.key, unit.owner)
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def collect(self, run_id: str) -> List[Tuple[str, bool, object]]:
+        """Finished units of `run_id` not collected before, as (key, ok, result) tuples."""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows = self._conn.execute(
+                    "SELECT key, status, result FROM work_units WHERE run_id = ? AND status IN ('done', 'failed')",
+                    (run_id,)
+                ).fetchall()
+                # Results are only needed once; dropping them keeps the database small
+                self._conn.execute(
+                    "UPDATE work_units SET status = 'collected', result = NULL, updated_at = ? "
+                    "WHERE run_id = ? AND status IN ('done', 'failed')",
+                    (self._clock(), run_id)
+                )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return [(key, status == 'done', json.loads(result) if result else None) for key, status, result in rows]
+
+    def remaining(self, run_id: str) -> int:
+        """Units of `run_id` still pending or leased."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM work_units WHERE run_id = ? AND status IN ('pending', 'leased')", (run_id,)
+            ).fetchone()[0]
+
+    def abandon(self, run_id: str) -> int:
+        """Drop the unfinished units of a run the coordinator has stopped waiting for."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM work_units WHERE run_id = ? AND status IN ('pending', 'leased')", (run_id,)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def counts(self, run_id: Optional[str] = None) -> dict:
+        sql = 'SELECT status, COUNT(*) FROM work_units'
+        params: tuple = ()
+        if run_id is not None:
+            sql += ' WHERE run_id = ?'
+            params = (run_id,)
+        with self._lock:
+            rows = self._conn.execute(sql + ' GROUP BY status', params).fetchall()
+        return dict(rows)
+
+    def purge(self, older_than: float) -> int:
+        """Drop finished units last touched more than `older_than` seconds ago."""
+        cutoff = self._clock() - older_than
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM work_units WHERE status IN ('done', 'failed', 'collected') AND updated_at < ?",
+                (cutoff,)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+def article_to_dict(article: Article) -> dict:
+    data = asdict(article)
+    data['published_date'] = article.published_date.isoformat() if article.published_date else None
+    return data
+
+def article_from_dict(data: dict) -> Article:
+    published = data.get('published_date')
+    return Article(**{**data, 'published_date': datetime.fromisoformat(published) if published else None})
+
+class _PollRecorder:
+    """Stands in for a worker scraper's PollSchedule; the coordinator owns the real one."""
+
+    def __init__(self):
+        self.observed: Dict[str, List[float]] = {}
+
+    def observe(self, url: str, published, polled_at: Optional[float] = None) -> None:
+        self.observed[url] = [d.timestamp() for d in published if d is not None]
+
+class ShardWorker:
+    """Claims feed units from a WorkQueue and fetches, parses and scores them.
+
+    Each unit gets a fresh scraper from `scraper_factory(metrics)`, so nothing a run
+    harvested or cached in memory leaks into the next run's units. The result of a
+    unit is, per feed, the scored articles (or None when the feed was unchanged or
+    failed) and the item dates the poll observed, which the coordinator feeds to its
+    poll schedule. It also carries what the unit's scraper would commit (staged feed
+    cache entries and arXiv watermarks), which the coordinator commits with its run,
+    and the unit's counters, which it adds to the run's metrics. The scraper's own poll schedule is replaced, since the coordinator
+    plans the polls. The lease is renewed in the background while a unit is being
+    worked on.
+    """
+
+    def __init__(self, queue: WorkQueue, scraper_factory: Callable[[Metrics], object], owner: Optional[str] = None,
+                 poll_interval: float = 1.0, metrics=None, sleep: Callable[[float], None] = time.sleep):
+        self.queue = queue
+        self.scraper_factory = scraper_factory
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_interval = poll_interval
+        self.metrics = metrics or NULL_METRICS
+        self._sleep = sleep
+
+    def process(self, unit: WorkUnit) -> dict:
+        metrics = Metrics()
+        scraper = self.scraper_factory(metrics)
+        observed = scraper.poll_schedule = _PollRecorder()
+        # Trending terms are computed by the coordinator, so every worker scores alike
+        scraper.scorer.trends = unit.payload.get('trends') or {}
+        feeds = {}
+        try:
+            for url, topic in unit.payload['feeds'].items():
+                articles = scraper.fetch_feed_articles(url, topic)
+                feeds[url] = {
+                    'articles': [article_to_dict(a) for a in articles] if articles is not None else None,
+                    'observed': observed.observed.pop(url, None)
+                }
+            return {'feeds': feeds, 'pending': scraper.pending(), 'metrics': metrics.counters()}
+        finally:
+            scraper.close()
+
+    def run_once(self, run_id: Optional[str] = None) -> bool:
+        """Work on one unit; False if there was nothing to claim."""
+        unit = self.queue.claim(self.owner, run_id)
+        if unit is None:
+            return False
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(unit, stop), name='lease', daemon=True)
+        heartbeat.start()
+        try:
+            with self.metrics.timer('shard_unit_seconds'):
+                result = self.process(unit)
+        except Exception as e:
+            self.metrics.incr('errors', stage='shard')
+            print(f"Error processing work unit {unit.key}: {str(e)}")
+            self.queue.fail(unit, str(e))
+            return True
+        finally:
+            stop.set()
+            heartbeat.join()
+        if not self.queue.complete(unit, result):
+            print(f"Warning: Lost the lease on work unit {unit.key}; its result was discarded")
+        self.metrics.incr('shard_units_done')
+        return True
+
+    def run(self, run_id: Optional[str] = None, stop: Optional[threading.Event] = None) -> None:
+        """Work on units until `stop` is set or, with a `run_id`, until that run has none left."""
+        while stop is None or not stop.is_set():
+            if self.run_once(run_id):
+                continue
+            if run_id is not None and not self.queue.remaining(run_id):
+                return
+            # Nothing free right now; another worker's lease may still expire
+            self._sleep(self.poll_interval)
+
+    def _heartbeat(self, unit: WorkUnit, stop: threading.Event) -> None:
+        while not stop.wait(self.queue.lease / 3):
+            if not self.queue.renew(unit):
+                return
+
+class ShardCoordinator:
+    """Splits a run's feeds into work units and merges what the workers parsed.
+
+    Stands in for `NewsScraper.fetch_feed_articles` as the `fetcher` of a Pipeline,
+    DigestFanOut or `NewsScraper.get_articles_for_topics`: `fetch_many` yields (feed,
+    articles) pairs as units complete, and ranking, dedup, summarization and delivery
+    stay here. Each feed is its own unit, except that all arXiv feeds go together,
+    since they share one harvest per archive set and one watermark file. The feed
+    cache entries and arXiv watermarks workers report are staged on `scraper`, the
+    run's own, so they are committed (or not) along with the run.
+
+    With `processes`, that many local worker processes running `worker_target(run_id)`
+    are started for each run; workers on other hosts run the same loop against the
+    shared queue. Units not finished within `timeout` seconds are given up on.
+    """
+
+    def __init__(self, queue: WorkQueue, feeds, poll_schedule=None, processes: int = 0,
+                 worker_target: Optional[Callable[[str], None]] = None, timeout: float = 600,
+                 poll_interval: float = 0.2, trends: Optional[Dict[str, float]] = None, scraper=None, metrics=None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.queue = queue
+        self.feeds = feeds
+        self.poll_schedule = poll_schedule
+        self.processes = processes if worker_target is not None else 0
+        self.worker_target = worker_target
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.trends = trends
+        self.scraper = scraper
+        self.metrics = metrics or NULL_METRICS
+        self._clock = clock
+        self._sleep = sleep
+
+    def plan_units(self, feed_topics: Dict[str, List[str]]) -> Dict[str, dict]:
+        """Work units for feed -> topics, in the given (priority) order; each feed is parsed for its first topic."""
+        units: Dict[str, dict] = {}
+        for url, topics in feed_topics.items():
+            key = ARXIV_UNIT if self.feeds.get(url).format == 'arxiv' else url
+            unit = units.setdefault(key, {'feeds': {}})
+            unit['feeds'][url] = topics[0]
+        if self.trends:
+            for unit in units.values():
+                unit['trends'] = self.trends
+        return units
+
+    def fetch_many(self, feed_topics: Dict[str, List[str]]) -> Iterator[Tuple[str, Optional[List[Article]]]]:
+        units = self.plan_units(feed_topics)
+        if not units:
+            return
+        run_id = uuid.uuid4().hex
+        self.queue.enqueue(run_id, units)
+        self.metrics.incr('shard_units', len(units))
+        workers = self._start_workers(run_id)
+        deadline = self._clock() + self.timeout
+        pending = set(units)
+        try:
+            while pending:
+                for key, ok, result in self.queue.collect(run_id):
+                    pending.discard(key)
+                    if ok and result.get('pending') and self.scraper is not None:
+                        self.scraper.stage(result['pending'])
+                    if ok:
+                        # Feed bytes, parse counts and errors happened in the worker; count them in this run
+                        for name, labels, value in result.get('metrics') or []:
+                            self.metrics.incr(name, value, **labels)
+                    for url in units[key]['feeds']:
+                        yield url, self._merge(url, result['feeds'].get(url) if ok else None)
+                if not pending:
+                    break
+                if self._clock() >= deadline:
+                    print(f"Warning: {len(pending)} work units unfinished after {self.timeout}s; continuing without them")
+                    self.metrics.incr('shard_units_timed_out', len(pending))
+                    for key in pending:
+                        for url in units[key]['feeds']:
+                            yield url, None
+                    break
+                self._sleep(self.poll_interval)
+        finally:
+            # Nothing is waiting for these any more, so workers should not pick them up
+            self.queue.abandon(run_id)
+            for process in workers:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+
+    def _merge(self, url: str, result: Optional[dict]) -> Optional[List[Article]]:
+        if result is None:
+            return None
+        if result.get('observed') is not None and self.poll_schedule is not None:
+            self.poll_schedule.observe(url, [datetime.fromtimestamp(t, timezone.utc) for t in result['observed']])
+        if result['articles'] is None:
+            return None
+        return [article_from_dict(a) for a in result['articles']]
+
+    def _start_workers(self, run_id: str) -> List[multiprocessing.Process]:
+        # Spawned rather than forked: the coordinator already runs pipeline threads
+        context = multiprocessing.get_context('spawn')
+        workers = []
+        for i in range(self.processes):
+            process = context.Process(target=self.worker_target, args=(run_id,), name=f'shard-{i}', daemon=True)
+            process.start()
+            workers.append(process)
+        return workers
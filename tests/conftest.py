@@ -0,0 +1,11 @@
+from src.config import Config
+
+
+def make_config(**overrides):
+    """A Config with no credentials and no topics; keyword arguments override any field."""
+    values = dict(
+        llm_provider="anthropic", llm_api_key="fake_key", twilio_account_sid="", twilio_auth_token="",
+        twilio_from_phone="", twilio_to_phone="", topics=[], schedule_times=[], max_articles=3
+    )
+    values.update(overrides)
+    return Config(**values)
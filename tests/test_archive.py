@@ -0,0 +1,72 @@
+from datetime import datetime, timezone
+
+import pytest
+from src.archive import DAY, ArticleArchive
+from src.models import Article
+
+NOW = 1_700_000_000.0
+
+
+def make_article(title, url, summary=None, score=1.0):
+    return Article(title=title, url=url, topic="robotics", content="<p>raw feed content</p>",
+                   summary=summary, published_date=datetime(2024, 1, 1, tzinfo=timezone.utc),
+                   relevance_score=score)
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = ArticleArchive(str(tmp_path / "archive.db"), content_retention=7 * DAY)
+    yield archive
+    archive.close()
+
+
+def test_record_is_idempotent_and_updates_summary(archive):
+    article = make_article("Robots fold laundry", "https://www.example.com/fold?utm_source=rss")
+    assert archive.record([article], now=NOW) == 1
+    assert archive.search("laundry")[0].summary is None
+
+    # Same article seen again (normalized URL), now summarized and delivered
+    again = make_article("Robots fold laundry", "https://example.com/fold", summary="A towel-folding agent.", score=4)
+    assert archive.record([again], now=NOW + 60) == 0
+    archive.mark_delivered([again], at=NOW + 120)
+    assert len(archive) == 1
+
+    found = archive.search("agents")
+    assert [a.title for a in found] == ["Robots fold laundry"]
+    assert found[0].relevance_score == 4
+    assert found[0].delivered_at == NOW + 120
+    assert archive.search("laundry", delivered_only=True)
+    assert archive.search('"unbalanced OR quotes*') == []
+
+
+def test_prune_drops_old_content_only(archive):
+    archive.record([make_article("Old news about robots", "https://example.com/old")], now=NOW - 10 * DAY)
+    archive.record([make_article("Fresh news about robots", "https://example.com/new")], now=NOW)
+    assert archive.prune(now=NOW) == 1
+    assert archive.prune(now=NOW) == 0
+    assert len(archive.search("robots")) == 2
+
+
+def test_trending_compares_recent_days_with_baseline(archive):
+    for day in range(28, 0, -1):
+        archive.record([make_article(f"Weekly model roundup {day}", f"https://example.com/r{day}"),
+                        make_article(f"Benchmark notes {day}", f"https://example.com/b{day}")],
+                       now=NOW - (day + 6) * DAY)
+    for day in range(6):
+        archive.record([make_article(f"Diffusion policy for arms {day}", f"https://example.com/d{day}"),
+                        make_article(f"Weekly model roundup new {day}", f"https://example.com/n{day}")],
+                       now=NOW - day * DAY)
+
+    trending = dict(archive.trending(days=7, baseline_days=28, now=NOW))
+    assert "diffusion policy" in trending and "diffusion" in trending
+    assert trending["diffusion policy"] > 10
+    assert "roundup" not in trending
+
+    boosts = archive.trend_boosts(days=7, baseline_days=28, now=NOW)
+    assert boosts["diffusion policy"] == 1.0
+    assert all(0 < points <= 1 for points in boosts.values())
+
+
+def test_trending_needs_a_baseline(archive):
+    archive.record([make_article(f"Diffusion policy {i}", f"https://example.com/{i}") for i in range(5)], now=NOW)
+    assert archive.trending(now=NOW) == []
@@ -0,0 +1,178 @@
+from datetime import datetime, timezone
+
+import pytest
+from src.arxiv_oai import ArxivHarvestError, ArxivHarvester, parse_list_records, set_spec
+from src.feed_registry import Feed, FeedRegistry
+from src.scraper import NewsScraper
+
+NOW = datetime(2024, 1, 3, 9, 0, tzinfo=timezone.utc).timestamp()
+
+
+def record(arxiv_id, datestamp, categories, title, updated=None, affiliation=None):
+    updated = f"<updated>{updated}</updated>" if updated else ""
+    affiliation = f"<affiliation>{affiliation}</affiliation>" if affiliation else ""
+    return f"""<record><header><identifier>oai:arXiv.org:{arxiv_id}</identifier>
+    <datestamp>{datestamp}</datestamp><setSpec>cs</setSpec></header><metadata>
+    <arXiv xmlns="http://arxiv.org/OAI/arXiv/"><id>{arxiv_id}</id><created>2024-01-01</created>{updated}
+    <authors><author><keyname>Doe</keyname><forenames>Jane</forenames>{affiliation}</author>
+    <author><keyname>Roe</keyname><forenames>Richard</forenames></author></authors>
+    <title>{title}</title><categories>{categories}</categories>
+    <abstract>  An abstract about
+      {title.lower()}.  </abstract></arXiv></metadata></record>"""
+
+
+def page(*records, token=None):
+    token = f'<resumptionToken cursor="0" completeListSize="4">{token}</resumptionToken>' if token is not None else ""
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+    <OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/"><responseDate>2024-01-03T09:00:00Z</responseDate>
+    <ListRecords>{"".join(records)}{token}</ListRecords></OAI-PMH>""".encode("utf-8")
+
+
+DELETED = """<record><header status="deleted"><identifier>oai:arXiv.org:2401.00009</identifier>
+<datestamp>2024-01-02</datestamp><setSpec>cs</setSpec></header></record>"""
+NO_RECORDS = b"""<?xml version="1.0" encoding="UTF-8"?><OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/">
+<error code="noRecordsMatch">No records</error></OAI-PMH>"""
+
+# Recorded shape of a two-page harvest of the cs set
+FIRST_PAGE = page(
+    record("2401.00001", "2024-01-02", "cs.CL cs.AI", "Sparse Experts", affiliation="Stanford University"),
+    record("2401.00002", "2024-01-02", "cs.CV", "Diffusion Segmentation"),
+    token="cs|1001",
+)
+SECOND_PAGE = page(
+    record("2312.00003", "2024-01-02", "cs.CL", "Old Paper v2", updated="2024-01-02"),
+    record("2401.00004", "2024-01-02", "cs.LG cs.CL", "Tokenizer Scaling"),
+    DELETED,
+    token="",
+)
+
+
+class Response:
+    def __init__(self, content, status_code=200, headers=None):
+        self.content = content
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, params=None, timeout=None):
+        self.requests.append(dict(params))
+        return self.responses.pop(0)
+
+
+def test_parse_list_records():
+    records, token = parse_list_records(FIRST_PAGE)
+    assert token == "cs|1001"
+    first = records[0]
+    assert (first.id, first.datestamp, first.categories) == ("2401.00001", "2024-01-02", ["cs.CL", "cs.AI"])
+    assert first.authors == ["Jane Doe", "Richard Roe"]
+    assert first.affiliations == ["Stanford University"]
+    assert first.abstract == "An abstract about sparse experts."
+
+    records, token = parse_list_records(SECOND_PAGE)
+    assert token is None
+    assert records[2].deleted
+    assert parse_list_records(NO_RECORDS) == ([], None)
+    with pytest.raises(ArxivHarvestError, match="badArgument"):
+        parse_list_records(b'<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/"><error code="badArgument"/></OAI-PMH>')
+    assert set_spec("cs.CL") == "cs" and set_spec("hep-th") == "physics:hep-th" and set_spec("q-fin.CP") == "q-fin"
+
+
+def test_harvest_follows_tokens_and_shares_a_set_between_categories(tmp_path):
+    session = FakeSession([Response(FIRST_PAGE), Response(SECOND_PAGE)])
+    harvester = ArxivHarvester(session, state_path=str(tmp_path / "oai.json"), clock=lambda: NOW)
+
+    cl = harvester.articles("https://arxiv.org/rss/cs.CL", "nlp")
+    cv = harvester.articles("https://arxiv.org/rss/cs.CV", "computer vision")
+
+    assert session.requests == [
+        {"verb": "ListRecords", "metadataPrefix": "arXiv", "set": "cs", "from": "2024-01-02"},
+        {"verb": "ListRecords", "resumptionToken": "cs|1001"},
+    ]
+    # Revisions and deletions are left out; structured metadata comes along
+    assert [a.url for a in cl] == ["https://arxiv.org/abs/2401.00001", "https://arxiv.org/abs/2401.00004"]
+    assert cl[0].affiliations == ["Stanford University"]
+    assert cl[0].published_date == datetime(2024, 1, 2, tzinfo=timezone.utc)
+    assert [a.title for a in cv] == ["Diffusion Segmentation"]
+    assert harvester.pending["cs.CL"] == {"watermark": "2024-01-02", "boundary": ["2312.00003", "2401.00001", "2401.00004"]}
+    # Watermarks only move once the run commits them
+    assert harvester.watermark("cs.CL") == ("2024-01-02", [])
+    harvester.commit()
+    assert harvester.watermark("cs.CL") == ("2024-01-02", ["2312.00003", "2401.00001", "2401.00004"])
+
+
+def test_next_run_transfers_only_new_records_and_catches_up_exactly(tmp_path):
+    state = str(tmp_path / "oai.json")
+    first_run = ArxivHarvester(FakeSession([Response(FIRST_PAGE), Response(SECOND_PAGE)]), state_path=state,
+                               clock=lambda: NOW)
+    first_run.articles("https://arxiv.org/rss/cs.CL", "nlp")
+    first_run.articles("https://arxiv.org/rss/cs.CV", "computer vision")
+    first_run.commit()
+
+    # Three days later: the boundary day comes back (day granularity) but its records are skipped
+    later = page(
+        record("2401.00004", "2024-01-02", "cs.CL", "Tokenizer Scaling"),
+        record("2401.00010", "2024-01-02", "cs.CL", "Late Addition"),
+        record("2401.00011", "2024-01-05", "cs.CL", "Catch Up"),
+    )
+    session = FakeSession([Response(b"busy", 503, {"Retry-After": "1"}), Response(later)])
+    slept = []
+    harvester = ArxivHarvester(session, state_path=state, clock=lambda: NOW + 3 * 86400, sleep=slept.append)
+    articles = harvester.articles("https://arxiv.org/rss/cs.CL", "nlp")
+
+    assert session.requests[-1]["from"] == "2024-01-02"
+    assert slept == [1.0]
+    assert [a.title for a in articles] == ["Late Addition", "Catch Up"]
+    harvester.commit()
+    assert harvester.watermark("cs.CL") == ("2024-01-05", ["2401.00011"])
+
+    # A category of the same set that is further behind only fetches the days it is missing
+    session = FakeSession([Response(FIRST_PAGE), Response(page(token=None)), Response(NO_RECORDS)])
+    harvester = ArxivHarvester(session, state_path=state, clock=lambda: NOW + 3 * 86400)
+    harvester.articles("https://arxiv.org/rss/cs.CL", "nlp")
+    harvester.articles("https://arxiv.org/rss/cs.CV", "computer vision")
+    assert [r.get("from") for r in session.requests] == ["2024-01-05", None, "2024-01-02"]
+    assert session.requests[2]["until"] == "2024-01-04"
+
+
+def test_uncommitted_run_is_harvested_again_and_commits_merge_into_the_file(tmp_path):
+    state = str(tmp_path / "oai.json")
+    later = page(record("2401.00011", "2024-01-05", "cs.CL", "Catch Up"))
+    session = FakeSession([Response(FIRST_PAGE), Response(SECOND_PAGE), Response(FIRST_PAGE),
+                           Response(SECOND_PAGE), Response(later)])
+
+    # A run that never commits (e.g. it failed before delivery) is harvested again by the next one
+    failed = ArxivHarvester(session, state_path=state, clock=lambda: NOW)
+    assert len(failed.articles("https://arxiv.org/rss/cs.CL", "nlp")) == 2
+    retry = ArxivHarvester(session, state_path=state, clock=lambda: NOW)
+    assert len(retry.articles("https://arxiv.org/rss/cs.CL", "nlp")) == 2
+
+    # Meanwhile another process moves cs.CV in the shared file; committing cs.CL keeps it
+    other = ArxivHarvester(FakeSession([Response(page(record("2401.00020", "2024-01-04", "cs.CV", "Elsewhere")))]),
+                           state_path=state, clock=lambda: NOW)
+    other.articles("https://arxiv.org/rss/cs.CV", "computer vision")
+    other.commit()
+    retry.commit()
+
+    harvester = ArxivHarvester(session, state_path=state, clock=lambda: NOW)
+    assert [a.title for a in harvester.articles("https://arxiv.org/rss/cs.CL", "nlp")] == ["Catch Up"]
+    assert session.requests[-1]["from"] == "2024-01-02"
+    harvester.commit()
+    assert ArxivHarvester(state_path=state).watermark("cs.CV") == ("2024-01-04", ["2401.00020"])
+    assert ArxivHarvester(state_path=state).watermark("cs.CL") == ("2024-01-05", ["2401.00011"])
+
+
+def test_scraper_reads_arxiv_feeds_through_the_harvester():
+    registry = FeedRegistry([Feed("https://arxiv.org/rss/cs.CL", ["nlp"], format="arxiv")])
+    harvester = ArxivHarvester(FakeSession([Response(FIRST_PAGE), Response(SECOND_PAGE)]), clock=lambda: NOW)
+    scraper = NewsScraper(feeds=registry, arxiv=harvester)
+
+    articles = scraper.get_articles_for_topics(["nlp"])["nlp"]
+
+    # Stanford is matched in the affiliations, so that paper ranks first
+    assert [a.title for a in articles] == ["Sparse Experts", "Tokenizer Scaling"]
+    assert articles[0].relevance_score > articles[1].relevance_score
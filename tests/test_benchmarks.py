@@ -0,0 +1,28 @@
+import json
+
+from benchmarks import run
+from benchmarks.fixtures import generate_atom, generate_rss
+from src.scraper import NewsScraper
+
+
+def test_fixtures_parse_in_both_formats():
+    scraper = NewsScraper()
+    rss = scraper.parse_feed(generate_rss(50), "ml")
+    atom = NewsScraper().parse_feed(generate_atom(50), "ml")
+    # Fixtures span 36 hours, so roughly two thirds fall inside the 24h window
+    assert 10 < len(rss) < 50
+    assert sorted(a.url for a in rss) == sorted(a.url for a in atom)
+
+
+def test_run_writes_results_and_flags_regressions(tmp_path):
+    output = tmp_path / "results.json"
+    baseline = tmp_path / "baseline.json"
+    args = ["--sizes", "10", "--only", "parse,format", "--output", str(output), "--baseline", str(baseline)]
+
+    assert run.main(args + ["--save-baseline"]) == 0
+    results = json.loads(output.read_text())["results"]
+    assert {"p50_ms", "p95_ms", "throughput_per_s", "peak_kb"} <= set(results["parse_feed[rss,10]"])
+
+    slower = {name: dict(r, p50_ms=r["p50_ms"] * 2) for name, r in results.items()}
+    assert run.compare(slower, results, 0.2)
+    assert not run.compare(results, results, 0.2)
@@ -0,0 +1,56 @@
+from datetime import datetime, timezone, timedelta
+
+from src.dates import DateParser
+from src.metrics import Metrics
+from src.scraper import NewsScraper
+
+
+def test_common_formats():
+    parser = DateParser()
+    expected = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    assert parser.parse("Tue, 02 Jan 2024 03:04:05 +0000") == expected
+    assert parser.parse("Tue, 02 Jan 2024 03:04:05 GMT") == expected
+    assert parser.parse("2024-01-02T03:04:05Z") == expected
+    assert parser.parse("2024-01-02T04:04:05+01:00") == expected
+    assert parser.parse("Tue, 02 Jan 2024 03:04:05") == expected
+    assert parser.unparseable == 0
+
+
+def test_remembers_format_per_feed():
+    parser = DateParser()
+    parser.parse("2024-01-02T03:04:05Z", feed="atom")
+    attempts = parser.attempts
+    for minute in range(10):
+        parser.parse(f"2024-01-02T03:{minute:02d}:00Z", feed="atom")
+    # One attempt per item once the ISO strategy is remembered for this feed
+    assert parser.attempts - attempts == 10
+
+
+def test_caches_repeated_strings_and_counts_failures():
+    parser = DateParser()
+    parser.parse("Mon, 01 Jan 2024 00:00:00 -0500")
+    attempts = parser.attempts
+    parser.parse("Mon, 01 Jan 2024 00:00:00 -0500")
+    assert parser.attempts == attempts
+
+    assert parser.parse("yesterday-ish") is None
+    assert parser.unparseable == 1
+
+
+def test_dc_date_and_unparseable_fallback(capsys):
+    recent = (datetime.now(timezone.utc) - timedelta(hours=2)).strftime('%Y-%m-%dT%H:%M:%SZ')
+    feed = f"""<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+            xmlns:dc="http://purl.org/dc/elements/1.1/">
+        <item><title>Dated</title><link>http://example.com/a</link>
+            <description>From Google.</description><dc:date>{recent}</dc:date></item>
+        <item><title>Garbled</title><link>http://example.com/b</link>
+            <description>From Google.</description><pubDate>not a date</pubDate></item>
+    </rdf:RDF>"""
+    metrics = Metrics()
+    scraper = NewsScraper(metrics=metrics)
+    articles = scraper.parse_feed(feed, "ml")
+    assert {a.title for a in articles} == {"Dated", "Garbled"}
+    assert scraper.date_parser.unparseable == 1
+    # Counted where the parse happened, so shard workers report it with their other counters
+    assert metrics.counter('dates_unparseable') == 1
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,181 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from src.enrichment import Enricher, ExtractionCache, extract_main_text
+from src.metrics import Metrics
+from src.models import Article
+
+BODY = " ".join(f"Sentence {i} explains how the robot learned to fold towels." for i in range(20))
+PAGE = f"""<html><head><title>Robots</title><script>var tracking = "{'x' * 300}";</script></head>
+<body><nav><p>Home / Research / Robotics / About us / Contact / Careers / Newsletter</p></nav>
+<article><h1>Robots learn to fold laundry</h1><p>{BODY}</p><p>Share</p></article>
+<footer><p>Copyright 2024, a footer that is long enough to look like a paragraph.</p></footer>
+</body></html>""".encode('utf-8')
+
+
+def test_extract_prefers_article_and_skips_chrome():
+    chunks = [PAGE[i:i + 50] for i in range(0, len(PAGE), 50)]
+    text = extract_main_text(chunks)
+    assert text.startswith("Robots learn to fold laundry\n\nSentence 0")
+    assert "Home / Research" not in text
+    assert "tracking" not in text
+    assert "Copyright" not in text
+    assert extract_main_text([PAGE], max_chars=100) == text[:100]
+
+
+def test_extract_without_article_keeps_long_blocks():
+    page = f"<html><body><div><p>Menu</p><p>{BODY}</p><ul><li>Short</li></ul></div></body></html>"
+    assert extract_main_text([page.encode('utf-8')]) == BODY
+
+
+def test_extraction_cache_round_trip(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "extracted.db"))
+    cache.put("https://www.example.com/post?utm_source=rss", "full text")
+    cache.put("https://example.com/empty", "")
+    assert cache.get_many(["https://example.com/post", "https://example.com/empty", "https://example.com/new"]) == {
+        "https://example.com/post": "full text", "https://example.com/empty": ""
+    }
+    cache.close()
+
+    expired = ExtractionCache(str(tmp_path / "extracted.db"), max_age=0)
+    assert expired.get_many(["https://example.com/post"]) == {}
+    expired.close()
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+    hits = []
+
+    def do_GET(self):
+        cls = PageHandler
+        with cls.lock:
+            cls.hits.append(self.path)
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        try:
+            time.sleep(2 if self.path.startswith('/slow') else 0.05)
+            status, body = (404, b"") if self.path.startswith('/missing') else (200, PAGE)
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def page_server():
+    PageHandler.active = PageHandler.peak = 0
+    PageHandler.hits = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PageHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def teaser(url):
+    return Article(title="Robots", url=url, topic="robotics", content="<p>Robots fold towels.</p>")
+
+
+def test_enricher_fetches_teasers_once_per_host_limit(tmp_path, page_server):
+    cache = ExtractionCache(str(tmp_path / "extracted.db"))
+    enricher = Enricher(cache, workers=6, per_host=2)
+    articles = [teaser(f"{page_server}/post/{i}") for i in range(6)]
+    long_abstract = Article(title="Paper", url=f"{page_server}/abs", topic="ml", content="x " * 400)
+    try:
+        assert enricher.enrich(articles + [long_abstract]) == 6
+    finally:
+        enricher.close()
+    assert all(a.content.startswith("Robots learn to fold laundry") for a in articles)
+    assert long_abstract.content == "x " * 400
+    assert PageHandler.peak <= 2
+    assert len(PageHandler.hits) == 6
+
+    # Later runs read from the cache, including pages that had no text
+    articles = [teaser(f"{page_server}/post/{i}") for i in range(6)] + [teaser(f"{page_server}/missing")]
+    enricher = Enricher(cache)
+    try:
+        assert enricher.enrich(articles) == 6
+        assert enricher.enrich([teaser(f"{page_server}/missing")]) == 0
+    finally:
+        enricher.close()
+    assert PageHandler.hits.count("/missing") == 1
+    assert len(PageHandler.hits) == 7
+    cache.close()
+
+
+def test_enricher_skips_pages_past_the_budget(page_server):
+    metrics = Metrics()
+    enricher = Enricher(budget=0.5, metrics=metrics)
+    fast, slow = teaser(f"{page_server}/post/1"), teaser(f"{page_server}/slow")
+    try:
+        assert enricher.enrich([fast, slow]) == 1
+    finally:
+        enricher.close()
+    # The slow page was given up on at the budget, either by the wait or by its own request timeout
+    assert metrics.counter('enrich_skipped', reason='budget') + metrics.counter('enrich_errors', reason='fetch') == 1
+    assert fast.content.startswith("Robots learn")
+    assert slow.content == "<p>Robots fold towels.</p>"
+    # The budget is for the whole run
+    assert enricher.enrich([teaser(f"{page_server}/post/2")]) == 0
+
+
+def test_pages_cut_short_are_used_but_not_cached(tmp_path, page_server):
+    cache = ExtractionCache(str(tmp_path / "extracted.db"))
+    # The byte cap only cuts off the footer, so the article text is complete enough for this run
+    enricher = Enricher(cache, max_bytes=len(PAGE) - 100)
+    article = teaser(f"{page_server}/post/1")
+    try:
+        assert enricher.enrich([article]) == 1
+    finally:
+        enricher.close()
+    assert article.content.startswith("Robots learn")
+    assert cache.get_many([article.url]) == {}
+    cache.close()
+
+
+class TrickleResponse:
+    """Streams PAGE in two chunks, with the run's clock moving past the budget in between."""
+
+    status_code = 200
+    headers = {'Content-Type': 'text/html; charset=utf-8'}
+    encoding = 'utf-8'
+
+    def __init__(self, clock):
+        self.clock = clock
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_content(self, chunk_size):
+        yield PAGE[:len(PAGE) // 2]
+        self.clock.now += 10
+        yield PAGE[len(PAGE) // 2:]
+
+
+def test_page_cut_short_by_the_budget_is_not_cached(tmp_path):
+    clock = type("Clock", (), {"now": 0.0, "__call__": lambda self: self.now})()
+    cache = ExtractionCache(str(tmp_path / "extracted.db"))
+    enricher = Enricher(cache, budget=5, clock=clock)
+    enricher.session.get = lambda url, timeout, stream: TrickleResponse(clock)
+
+    text = enricher._fetch_text("https://example.com/post")
+
+    assert text and "footer" not in text
+    assert cache.get_many(["https://example.com/post"]) == {}
+    enricher.close()
+    cache.close()
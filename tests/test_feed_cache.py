@@ -0,0 +1,131 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from src.feed_cache import CachedFeed, FeedCache
+from src.feed_registry import Feed, FeedRegistry
+from src.scraper import NewsScraper
+
+FEED_ETAG = '"v1"'
+
+
+def make_feed(items=1):
+    pub_date = (datetime.now(timezone.utc) - timedelta(hours=1)).strftime('%a, %d %b %Y %H:%M:%S %z')
+    titles = ["Cached Article"] + [f"Cached Article {i}" for i in range(2, items + 1)]
+    entries = "".join(f"""<item>
+        <title>{title}</title>
+        <link>http://example.com/{title.lower().replace(' ', '-')}</link>
+        <description>A paper from DeepMind.</description>
+        <pubDate>{pub_date}</pubDate>
+    </item>""" for title in titles)
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+    <rss><channel>{entries}</channel></rss>""".encode('utf-8')
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    requests_seen = []
+    items = 1
+
+    def do_GET(self):
+        FeedHandler.requests_seen.append(dict(self.headers))
+        if self.headers.get('If-None-Match') == FEED_ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = make_feed(FeedHandler.items)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/rss+xml; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', FEED_ETAG)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def feed_server():
+    FeedHandler.requests_seen = []
+    FeedHandler.items = 1
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FeedHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/feed"
+    server.shutdown()
+    server.server_close()
+
+
+def test_conditional_get_hit_and_miss(tmp_path, feed_server):
+    cache = FeedCache(str(tmp_path))
+    scraper = NewsScraper(cache=cache)
+    scraper.topic_feeds = {"test": [feed_server]}
+
+    first = scraper.get_articles_for_topics(["test"])
+    assert [a.title for a in first["test"]] == ["Cached Article"]
+    assert 'If-None-Match' not in FeedHandler.requests_seen[0]
+    assert 'gzip' in FeedHandler.requests_seen[0]['Accept-Encoding']
+    scraper.commit()
+
+    # A new scraper (as on the next scheduled run) revalidates instead of re-downloading
+    scraper = NewsScraper(cache=cache)
+    scraper.topic_feeds = {"test": [feed_server]}
+    second = scraper.get_articles_for_topics(["test"])
+    assert FeedHandler.requests_seen[1]['If-None-Match'] == FEED_ETAG
+    assert second["test"] == []
+
+    # fetch_feed still hands back the cached body on a 304
+    assert "Cached Article" in scraper.fetch_feed(feed_server)
+
+
+def test_feed_of_a_run_that_never_commits_is_read_again(tmp_path, feed_server):
+    cache = FeedCache(str(tmp_path))
+    scraper = NewsScraper(cache=cache)
+    scraper.topic_feeds = {"test": [feed_server]}
+    assert len(scraper.get_articles_for_topics(["test"])["test"]) == 1
+    assert scraper.pending()["feeds"] == [feed_server]
+    # The run fails before delivering, so its download stays staged
+    assert cache.get(feed_server) is None
+
+    scraper = NewsScraper(cache=cache)
+    scraper.topic_feeds = {"test": [feed_server]}
+    assert [a.title for a in scraper.get_articles_for_topics(["test"])["test"]] == ["Cached Article"]
+    assert 'If-None-Match' not in FeedHandler.requests_seen[1]
+    scraper.commit()
+    assert cache.get(feed_server).etag == FEED_ETAG
+
+
+def test_feed_cut_short_by_max_items_is_still_cached(tmp_path, feed_server):
+    FeedHandler.items = 5
+    cache = FeedCache(str(tmp_path))
+    registry = FeedRegistry([Feed(feed_server, ["test"], max_items=2)])
+
+    scraper = NewsScraper(cache=cache, feeds=registry)
+    first = scraper.get_articles_for_topics(["test"])
+    assert len(first["test"]) == 2
+    scraper.commit()
+    assert cache.get(feed_server).body.rstrip().endswith(b"</rss>")
+
+    NewsScraper(cache=cache, feeds=registry).get_articles_for_topics(["test"])
+    assert FeedHandler.requests_seen[1]['If-None-Match'] == FEED_ETAG
+
+
+def test_eviction_by_size_and_age(tmp_path):
+    cache = FeedCache(str(tmp_path), max_bytes=25, max_age=3600)
+    cache.put(CachedFeed(url="http://a", body=b"a" * 10))
+    old = time.time() - 10
+    os.utime(os.path.join(str(tmp_path), cache._key("http://a") + '.body'), (old, old))
+    cache.put(CachedFeed(url="http://b", body=b"b" * 10))
+    cache.put(CachedFeed(url="http://c", body=b"c" * 10))
+
+    # "a" was validated longest ago, so it is dropped to fit 25 bytes
+    assert cache.get("http://a") is None
+    assert cache.get("http://b").body == b"b" * 10
+    assert cache.get("http://c").body == b"c" * 10
+
+    expired = time.time() - 7200
+    os.utime(os.path.join(str(tmp_path), cache._key("http://b") + '.body'), (expired, expired))
+    assert cache.get("http://b") is None
@@ -0,0 +1,76 @@
+import io
+from datetime import datetime, timezone, timedelta
+
+from src.feed_parser import FeedStream, iter_items
+from src.scraper import NewsScraper
+
+
+def rss_items(count, start_hours=1, prefix="Item"):
+    now = datetime.now(timezone.utc)
+    return "".join(
+        f"""<item>
+            <title>{prefix} {i}</title>
+            <link>http://example.com/{prefix}/{i}</link>
+            <description>Abstract {i} from Oxford.</description>
+            <pubDate>{(now - timedelta(hours=start_hours + i)).strftime('%a, %d %b %Y %H:%M:%S %z')}</pubDate>
+        </item>"""
+        for i in range(count)
+    )
+
+
+def test_atom_entries():
+    feed = b"""<?xml version="1.0" encoding="utf-8"?>
+    <feed xmlns="http://www.w3.org/2005/Atom">
+        <title>Example</title>
+        <entry>
+            <title type="html">Atom Article</title>
+            <link rel="self" href="http://example.com/self"/>
+            <link rel="alternate" href="http://example.com/atom"/>
+            <summary>Summary text</summary>
+            <updated>2024-01-02T03:04:05Z</updated>
+        </entry>
+    </feed>"""
+    items = list(iter_items(io.BytesIO(feed)))
+    assert len(items) == 1
+    assert items[0].title == "Atom Article"
+    assert items[0].link == "http://example.com/atom"
+    assert items[0].description == "Summary text"
+    assert items[0].date == "2024-01-02T03:04:05Z"
+
+
+def test_max_bytes_drops_partial_item():
+    feed = f"<rss><channel>{rss_items(200)}</channel></rss>".encode('utf-8')
+    chunks = [feed[i:i + 1000] for i in range(0, len(feed), 1000)]
+    stream = FeedStream(chunks, max_bytes=len(feed) // 2)
+
+    items = list(iter_items(stream))
+    assert stream.truncated
+    assert 0 < len(items) < 200
+    # Every item that made it through is complete
+    assert all(item.link and item.date for item in items)
+    assert items[-1].title == f"Item {len(items) - 1}"
+
+
+def test_stop_at_stale_exits_early():
+    # 30 items an hour apart (23 inside the 24h window), then an out-of-order fresh one
+    feed = f"<rss><channel>{rss_items(30)}{rss_items(1, prefix='Late')}</channel></rss>"
+    articles = NewsScraper().parse_feed(feed, "ml")
+    assert len(articles) == 24
+
+    scraper = NewsScraper(stop_at_stale=True)
+    stream = FeedStream([feed.encode('utf-8')])
+    articles = list(scraper.iter_articles(stream, "ml"))
+    assert len(articles) == 23
+    assert all(not a.title.startswith("Late") for a in articles)
+
+
+def test_stream_caches_only_complete_body():
+    captured = []
+    stream = FeedStream([b"<rss>", b"</rss>"], on_complete=captured.append)
+    list(iter_items(stream))
+    assert captured == [b"<rss></rss>"]
+
+    captured = []
+    stream = FeedStream([b"<rss>", b"</rss>"], max_bytes=3, on_complete=captured.append)
+    list(iter_items(stream))
+    assert captured == []
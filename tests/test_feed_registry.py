@@ -0,0 +1,97 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.feed_registry import Feed, FeedRegistry, FeedRegistryError, PollSchedule
+from src.scraper import NewsScraper
+
+HOUR = 3600
+DAY = 24 * HOUR
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def at(hours):
+    return START + timedelta(hours=hours)
+
+
+def ts(hours):
+    return at(hours).timestamp()
+
+
+def test_bundled_registry_covers_the_supported_topics():
+    registry = FeedRegistry.load()
+    assert set(registry.topics()) == {
+        "computer vision", "robotics", "llms", "nlp", "ml", "blockchain",
+        "cryptocurrency", "computational finance", "reinforcement learning"
+    }
+    assert registry.topic_feeds()["nlp"][0] == "https://arxiv.org/rss/cs.CL"
+    assert registry.get("https://arxiv.org/rss/cs.CL").cadence_hours == 24
+
+
+def test_registry_rejects_bad_entries(tmp_path):
+    path = tmp_path / "feeds.json"
+    path.write_text(json.dumps({"feeds": [{"url": "http://a/feed", "topics": ["x"], "format": "csv"}]}))
+    with pytest.raises(FeedRegistryError, match="unknown format 'csv'"):
+        FeedRegistry.load(str(path))
+    with pytest.raises(FeedRegistryError, match="Could not load"):
+        FeedRegistry.load(str(tmp_path / "missing.json"))
+
+
+def test_daily_feed_is_skipped_until_its_next_batch_is_expected(tmp_path):
+    now = [ts(9)]
+    schedule = PollSchedule(str(tmp_path / "polls.json"), clock=lambda: now[0])
+    arxiv = Feed("http://arxiv/rss", ["ml"], cadence_hours=24)
+
+    assert schedule.is_due(arxiv)
+    # A daily batch: every item carries the same announcement time
+    schedule.observe(arxiv.url, [at(0)] * 20)
+    now[0] = ts(17)
+    assert not schedule.is_due(arxiv)
+    now[0] = ts(24 + 9)
+    assert schedule.is_due(arxiv)
+    schedule.observe(arxiv.url, [at(24)] * 25)
+    assert schedule.state(arxiv.url).interval == DAY
+
+    # Learned state survives a restart
+    restarted = PollSchedule(str(tmp_path / "polls.json"), clock=lambda: ts(24 + 17))
+    assert not restarted.is_due(arxiv)
+
+
+def test_busy_feed_stays_due_on_every_run():
+    now = [ts(9)]
+    schedule = PollSchedule(clock=lambda: now[0])
+    medium = Feed("http://medium/feed", ["ml"], cadence_hours=2)
+    schedule.observe(medium.url, [at(9 - i * 0.5) for i in range(10)])
+    now[0] = ts(17)
+    schedule.observe(medium.url, [at(17 - i * 0.5) for i in range(16)])
+
+    assert schedule.state(medium.url).interval == pytest.approx(0.5 * HOUR)
+    now[0] = ts(18)
+    assert schedule.is_due(medium)
+
+
+def test_late_feed_is_rechecked_and_never_left_longer_than_max_interval():
+    now = [ts(30)]
+    schedule = PollSchedule(max_interval=12 * HOUR, clock=lambda: now[0])
+    feed = Feed("http://late/feed", ["ml"], cadence_hours=24)
+    # Newest item is 30h old, so the daily update was already overdue at this poll
+    schedule.observe(feed.url, [at(0)])
+    assert schedule.next_poll(feed) == ts(30) + 6 * HOUR
+
+    slow = Feed("http://slow/feed", ["ml"], cadence_hours=24 * 7)
+    schedule.observe(slow.url, [at(29)])
+    assert schedule.next_poll(slow) == ts(30) + 12 * HOUR
+
+
+def test_scraper_plans_by_priority_and_skips_feeds_that_are_not_due():
+    registry = FeedRegistry([
+        Feed("http://medium/feed", ["ml"], priority=1),
+        Feed("http://arxiv/rss", ["ml", "nlp"], priority=2, cadence_hours=24),
+        Feed("http://blog/feed", ["nlp"], priority=0, cadence_hours=6),
+    ])
+    schedule = PollSchedule(clock=lambda: ts(12))
+    schedule.observe("http://blog/feed", [at(11)], polled_at=ts(11))
+    scraper = NewsScraper(feeds=registry, poll_schedule=schedule)
+
+    assert scraper.plan_feeds(["nlp", "ml"]) == {"http://arxiv/rss": ["nlp", "ml"], "http://medium/feed": ["ml"]}
@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+from src.llm_backends import Completion
+from src.llm_router import LLMRouter, ProviderHealth
+from src.metrics import Metrics
+from src.models import Article
+from src.providers import LLM_BACKENDS
+from src.summarizer import Summarizer, SummarizerError, is_retryable
+from tests.conftest import make_config
+
+
+class FakeError(Exception):
+    status_code = 503
+
+
+class FakeBackend:
+    """Answers after `latency` seconds; `stall_every` makes every nth call hang, `fail` raises."""
+
+    def __init__(self, name, latency=0.01, stall_every=0, stall=1.0, fail=False):
+        self.label = name
+        self.model = f"{name}-model"
+        self.latency = latency
+        self.stall_every = stall_every
+        self.stall = stall
+        self.fail = fail
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def complete(self, system, prompt, max_tokens):
+        with self.lock:
+            self.calls += 1
+            calls = self.calls
+        time.sleep(self.stall if self.stall_every and calls % self.stall_every == 0 else self.latency)
+        if self.fail:
+            raise FakeError(f"{self.label} is down")
+        return Completion(f"{self.label}: {prompt}", 10, 5)
+
+
+def test_provider_health_p95_and_error_rate():
+    health = ProviderHealth(window=20, min_samples=5)
+    assert health.p95(default=3.0) == 3.0
+    for i in range(1, 21):
+        health.record(i / 10, ok=True)
+    assert health.p95(default=3.0) == 1.9
+    for _ in range(5):
+        health.record(0, ok=False)
+    assert health.error_rate == 0.25
+
+
+def test_routes_to_the_faster_provider():
+    slow, fast = FakeBackend("slow", latency=0.05), FakeBackend("fast", latency=0.005)
+    router = LLMRouter({"slow": slow, "fast": fast}, hedge_after=1, default_latency=0.02)
+    try:
+        for _ in range(30):
+            router.complete("system", "prompt", 10)
+    finally:
+        router.close()
+    # Both start at the default until measured; afterwards the fast one takes nearly everything
+    assert router.ranked() == ["fast", "slow"]
+    assert fast.calls > 20
+
+
+def test_hedging_bounds_latency_when_a_provider_stalls():
+    flaky = FakeBackend("flaky", latency=0.01, stall_every=3, stall=2.0)
+    steady = FakeBackend("steady", latency=0.03)
+    metrics = Metrics()
+    router = LLMRouter({"flaky": flaky, "steady": steady}, hedge_after=0.1, metrics=metrics)
+    try:
+        for _ in range(12):
+            assert router.complete("system", "prompt", 10).text.endswith("prompt")
+    finally:
+        router.close()
+    # Stalled calls were answered by the hedge to the steady provider instead of waited out
+    assert metrics.counter("llm_backup_wins", provider="steady") > 0
+    assert steady.calls > 0
+
+
+def test_fails_over_and_raises_the_last_error_when_all_fail():
+    down, up = FakeBackend("down", fail=True), FakeBackend("up", latency=0.02)
+    router = LLMRouter({"down": down, "up": up}, hedge_after=1)
+    try:
+        completion = router.complete("system", "prompt", 10)
+        assert completion.provider == "up"
+        assert router.health["down"].error_rate == 1.0
+        assert router.ranked() == ["up", "down"]
+    finally:
+        router.close()
+
+    router = LLMRouter({"a": FakeBackend("a", fail=True), "b": FakeBackend("b", fail=True)}, hedge_after=1)
+    try:
+        with pytest.raises(FakeError):
+            router.complete("system", "prompt", 10)
+    finally:
+        router.close()
+
+
+def test_summarizer_routes_between_configured_providers(monkeypatch):
+    backends = {"first": FakeBackend("first", fail=True), "second": FakeBackend("second")}
+    for name, backend in backends.items():
+        monkeypatch.setitem(LLM_BACKENDS._entries, name, lambda api_key, backend=backend: backend)
+    config = make_config(llm_provider="first", llm_api_key="key", llm_providers=["first", "second"],
+                         llm_hedge_after_seconds=1, llm_max_retries=0)
+    metrics = Metrics()
+    summarizer = Summarizer(config, metrics=metrics)
+    try:
+        assert summarizer.summarize(Article(title="T", url="", topic="", content="C")).startswith("second:")
+        assert metrics.counter("llm_requests", provider="second") == 1
+        assert metrics.counter("llm_requests", provider="first") == 0
+
+        backends["second"].fail = True
+        with pytest.raises(SummarizerError) as error:
+            summarizer.summarize(Article(title="U", url="", topic="", content="D"))
+        assert is_retryable(error.value)
+    finally:
+        summarizer.close()
+    # Closing the summarizer shuts down the router's thread pool
+    with pytest.raises(RuntimeError):
+        summarizer.backend._executor.submit(lambda: None)
+    # A single provider's backend has nothing to close
+    Summarizer(make_config(llm_provider="second", llm_api_key="key")).close()
@@ -0,0 +1,71 @@
+import json
+from datetime import datetime, timezone, timedelta
+
+from src.feed_parser import FeedStream
+from src.metrics import Metrics, NULL_METRICS
+from src.scraper import NewsScraper
+
+
+def test_report_and_prometheus_export(tmp_path):
+    metrics = Metrics()
+    metrics.incr('feed_bytes', 100, feed='a')
+    metrics.incr('feed_bytes', 50, feed='a')
+    for seconds in (0.1, 0.2, 0.3):
+        metrics.observe('stage_seconds', seconds, stage='fetch')
+
+    report = metrics.report()
+    assert report['counters']['feed_bytes{feed="a"}'] == 150
+    assert report['timings']['stage_seconds{stage="fetch"}']['count'] == 3
+    assert report['timings']['stage_seconds{stage="fetch"}']['p50_s'] == 0.2
+
+    path = metrics.write_json(str(tmp_path))
+    assert json.loads(open(path).read())['counters'] == report['counters']
+
+    text = metrics.to_prometheus()
+    assert '# TYPE textalert_feed_bytes counter' in text
+    assert 'textalert_feed_bytes{feed="a"} 150' in text
+    assert 'textalert_stage_seconds{stage="fetch",quantile="0.5"} 0.2' in text
+    assert 'textalert_stage_seconds_count{stage="fetch"} 3' in text
+
+
+def test_merge_accumulates_process_totals():
+    totals = Metrics()
+    for _ in range(2):
+        run = Metrics()
+        run.incr('sms_messages_sent', 3)
+        run.observe('llm_latency_seconds', 0.5, provider='anthropic')
+        totals.merge(run)
+    assert totals.counter('sms_messages_sent') == 6
+    assert totals.report()['timings']['llm_latency_seconds{provider="anthropic"}']['count'] == 2
+
+
+def test_null_metrics_are_no_ops():
+    with NULL_METRICS.timer('anything', label='x'):
+        NULL_METRICS.incr('anything')
+    assert NULL_METRICS.counter('anything') == 0
+    assert not NULL_METRICS.enabled
+
+
+def test_scraper_records_parse_counts():
+    now = datetime.now(timezone.utc)
+    fresh = now.strftime('%a, %d %b %Y %H:%M:%S %z')
+    stale = (now - timedelta(days=3)).strftime('%a, %d %b %Y %H:%M:%S %z')
+    feed = f"""<rss><channel>
+        <item><title>Fresh</title><link>http://example.com/1</link><pubDate>{fresh}</pubDate>
+            <description>From MIT.</description></item>
+        <item><title>Stale</title><link>http://example.com/2</link><pubDate>{stale}</pubDate></item>
+        <item><title>No link</title><pubDate>{fresh}</pubDate></item>
+    </channel></rss>""".encode('utf-8')
+
+    metrics = Metrics()
+    scraper = NewsScraper(metrics=metrics)
+    scraper.open_feed = lambda url: (FeedStream([feed]), True)
+    scraper.topic_feeds = {"test": ["http://example.com/feed"]}
+    articles = scraper.get_articles_for_topics(["test"])
+
+    assert [a.title for a in articles["test"]] == ["Fresh"]
+    assert metrics.counter('items_parsed') == 3
+    assert metrics.counter('items_dropped', reason='stale') == 1
+    assert metrics.counter('items_dropped', reason='no_link') == 1
+    assert metrics.counter('items_kept', feed="http://example.com/feed") == 1
+    assert metrics.counter('feed_bytes', feed="http://example.com/feed") == len(feed)
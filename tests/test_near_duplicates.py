@@ -0,0 +1,68 @@
+from src.models import Article
+from src.near_duplicates import LSHIndex, MinHasher, NearDuplicateDetector, shingles, similarity
+from src.scraper import NewsScraper
+from src.seen_store import SeenStore
+
+ABSTRACT = (
+    "We introduce a sparse mixture of experts architecture for long context language modelling "
+    "that routes each token to two experts and matches dense baselines at a third of the compute. "
+    "Experiments on retrieval, summarization and code generation benchmarks show consistent gains, "
+    "and an ablation study isolates the contribution of the load balancing loss."
+)
+OTHER = (
+    "A diffusion policy for bimanual robot manipulation learns from fifty teleoperated demonstrations "
+    "and transfers to unseen objects; we release the hardware designs and the training code."
+)
+
+
+def article(url, title, content, score):
+    return Article(title=title, url=url, topic="llms", content=content, relevance_score=score)
+
+
+def test_shingles_ignore_markup_case_and_punctuation():
+    assert shingles("<p>Sparse Mixture, of experts!</p>") == shingles("sparse mixture of EXPERTS")
+
+
+def test_signature_similarity_tracks_jaccard():
+    hasher = MinHasher(128)
+    left = shingles(ABSTRACT)
+    right = shingles(ABSTRACT.replace("two experts", "three experts"))
+    jaccard = len(left & right) / len(left | right)
+
+    assert abs(similarity(hasher.signature(left), hasher.signature(right)) - jaccard) < 0.15
+    assert similarity(hasher.signature(left), hasher.signature(shingles(OTHER))) < 0.2
+
+
+def test_collapse_keeps_best_copy_and_records_alternates():
+    arxiv = article("https://arxiv.org/abs/2401.00001", "Sparse Experts for Long Context", ABSTRACT, 8.0)
+    repost = article("https://medium.com/p/sparse-experts", "Sparse experts for long context!",
+                     "<p>" + ABSTRACT + "</p> Read more on Medium.", 5.0)
+    unrelated = article("https://arxiv.org/abs/2401.00002", "Bimanual Diffusion Policies", OTHER, 6.0)
+
+    kept = NearDuplicateDetector().collapse([repost, unrelated, arxiv])
+
+    assert kept == [unrelated, arxiv]
+    assert arxiv.alternates == ["https://medium.com/p/sparse-experts"]
+    assert unrelated.alternates == []
+
+
+def test_lsh_only_returns_colliding_candidates():
+    hasher = MinHasher(64)
+    index = LSHIndex(64, 16)
+    index.add(0, hasher.signature(shingles(ABSTRACT)))
+    index.add(1, hasher.signature(shingles(OTHER)))
+
+    assert index.candidates(hasher.signature(shingles(ABSTRACT + " Code is available."))) == [0]
+
+
+def test_scraper_collapses_and_marks_alternates_seen(tmp_path):
+    store = SeenStore(str(tmp_path / "seen.db"))
+    scraper = NewsScraper(seen_store=store, near_duplicates=NearDuplicateDetector())
+    arxiv = article("https://arxiv.org/abs/2401.00001", "Sparse Experts for Long Context", ABSTRACT, 8.0)
+    repost = article("https://medium.com/p/sparse-experts", "Sparse Experts for Long Context", ABSTRACT, 5.0)
+
+    kept = scraper.collapse_near_duplicates([arxiv, repost])
+    scraper.mark_seen(kept)
+
+    assert kept == [arxiv]
+    assert store.filter_unseen([repost.url]) == []
@@ -1,7 +1,11 @@
+import threading
+import time
 from unittest.mock import Mock, patch
-from src.notifier import SMSNotifier, NotifierError
+from twilio.base.exceptions import TwilioRestException
+from src.notifier import DeliveryResult, SMSNotifier, NotifierError
 from src.models import Article
-from src.config import Config, load_config
+from src.config import load_config
+from tests.conftest import make_config
 
 @patch('twilio.rest.Client')
 def test_format_message(mock_client):
@@ -40,4 +44,93 @@ def test_send_notifications(mock_client):
         Article(title="Test Article", url="http://example.com", topic="AI", content="", summary="This is a test summary.")
     ]
     notifier.send_notifications(articles)
-    mock_messages.create()
\ No newline at end of file
+    mock_messages.create()
+
+
+class FakeMessages:
+    """Twilio messages resource that fails selected bodies and tracks concurrency."""
+
+    def __init__(self, failures=None, latency=0.0):
+        self.failures = dict(failures or {})
+        self.latency = latency
+        self.sent = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def create(self, from_, to, body):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.latency)
+            with self.lock:
+                for marker, statuses in self.failures.items():
+                    if marker in body and statuses:
+                        raise TwilioRestException(statuses.pop(0), '/Messages.json', 'failed')
+                self.sent.append((to, body))
+                return Mock(sid=f"SM{len(self.sent)}")
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def make_notifier(messages, **overrides):
+    values = dict(twilio_account_sid='ACtest', twilio_auth_token='token', twilio_from_phone='+15550000000',
+                  twilio_to_phone='+15550000001', sms_per_second=0)
+    values.update(overrides)
+    notifier = SMSNotifier(make_config(**values))
+    notifier.client = Mock(messages=messages)
+    notifier.retry_base_delay = 0.001
+    return notifier
+
+
+def article(i, summary="A summary."):
+    return Article(title=f"Title {i}", url=f"https://example.com/{i}", topic="ml", content="", summary=summary)
+
+
+def test_format_message_normalizes_to_gsm7():
+    notifier = make_notifier(FakeMessages())
+
+    messages = notifier.pack([article(0, summary="It’s “fast” — really…")])
+
+    assert messages[0].encoding == 'gsm7'
+    assert 'It\'s "fast" - really...' in messages[0].body
+    assert messages[0].segments == 1
+
+
+def test_deliver_retries_transient_errors_and_reports_each_message():
+    messages = FakeMessages(failures={'Title 0': [429], 'Title 1': [400]})
+    notifier = make_notifier(messages, sms_max_segments=1)
+
+    # One article per single-segment message
+    results = notifier.deliver(notifier.pack([article(i, summary="x" * 100) for i in range(3)]))
+
+    assert [r.ok for r in results] == [True, False, True]
+    assert [r.attempts for r in results] == [2, 1, 1]
+    assert results[1].error and results[1].message.articles[0].title == "Title 1"
+    assert all(isinstance(r, DeliveryResult) for r in results)
+    assert len(messages.sent) == 2
+
+
+def test_deliver_many_sends_concurrently():
+    messages = FakeMessages(latency=0.05)
+    notifier = make_notifier(messages, sms_concurrency=4)
+    outbox = [(f"+1555000{i:04d}", message) for i in range(8) for message in notifier.pack([article(i)])]
+
+    results = notifier.deliver_many(outbox)
+
+    assert all(r.ok for r in results)
+    assert [r.to for r in results] == [to for to, _ in outbox]
+    assert 1 < messages.peak <= 4
+
+
+def test_send_notifications_raises_when_nothing_was_delivered():
+    notifier = make_notifier(FakeMessages(failures={'Title': [400]}))
+
+    try:
+        notifier.send_notifications([article(0)])
+    except NotifierError:
+        pass
+    else:
+        raise AssertionError("expected NotifierError")
@@ -0,0 +1,171 @@
+from src.models import Article
+from src.notifier import DeliveryResult, SMSMessage
+from src.outbox import Outbox, OutboxWorker
+from src.pipeline import Pipeline
+from tests.test_pipeline import FakeSummarizer, make_scraper
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakeNotifier:
+    """Delivers (to, body) pairs; bodies listed in `failures` fail with the given retryability."""
+
+    def __init__(self, failures=None):
+        self.failures = dict(failures or {})
+        self.sent = []
+        self.config = type("Config", (), {"twilio_to_phone": "+15550000001"})()
+
+    def pack(self, articles):
+        return [SMSMessage(a.title, [a]) for a in articles]
+
+    def format_message(self, articles):
+        return [a.title for a in articles]
+
+    def send_notifications(self, articles):
+        return self.deliver_many([(self.config.twilio_to_phone, m) for m in self.pack(articles)])
+
+    def deliver_many(self, outbox):
+        results = []
+        for to, message in outbox:
+            if message.body in self.failures:
+                results.append(DeliveryResult(message, to, attempts=1, error="failed",
+                                              retryable=self.failures[message.body]))
+            else:
+                self.sent.append((to, message.body))
+                results.append(DeliveryResult(message, to, sid=f"SM{len(self.sent)}", attempts=1))
+        return results
+
+
+def message(body, url=None):
+    return SMSMessage(body, [Article(title=body, url=url or f"https://example.com/{body}", topic="ml", content="")])
+
+
+def test_enqueue_is_idempotent(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+
+    first = outbox.enqueue([("+1", message("a")), ("+2", message("a"))])
+    second = outbox.enqueue([("+1", message("a"))])
+
+    assert len(set(first)) == 2
+    assert second == first[:1]
+    assert outbox.counts() == {"pending": 2}
+
+
+def test_failed_message_enqueued_again_is_retried(tmp_path):
+    clock = FakeClock()
+    outbox = Outbox(str(tmp_path / "outbox.db"), clock=clock)
+    (key,) = outbox.enqueue([("+1", message("a"))])
+    OutboxWorker(outbox, FakeNotifier(failures={"a": False})).drain()
+    assert outbox.status(key) == "failed"
+
+    # The same digest in a later run goes back to the queue instead of staying failed
+    clock.now += 60
+    assert outbox.enqueue([("+1", message("a"))]) == [key]
+    assert outbox.status(key) == "pending"
+    notifier = FakeNotifier()
+    assert len(OutboxWorker(outbox, notifier).drain()) == 1
+    assert notifier.sent == [("+1", "a")]
+    assert outbox.counts() == {"sent": 1}
+
+
+def test_sent_rows_are_never_resent(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    notifier = FakeNotifier()
+    outbox.enqueue([("+1", message("a")), ("+1", message("b"))])
+
+    assert len(OutboxWorker(outbox, notifier).drain()) == 2
+    outbox.enqueue([("+1", message("a"))])
+
+    assert OutboxWorker(outbox, notifier).drain() == []
+    assert notifier.sent == [("+1", "a"), ("+1", "b")]
+    assert outbox.counts() == {"sent": 2}
+
+
+def test_crash_mid_delivery_resumes_only_unsent_rows(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    clock = FakeClock()
+    outbox = Outbox(path, lease=60, clock=clock)
+    keys = outbox.enqueue([("+1", message(body)) for body in "abc"])
+    # "a" went out, then the process died while "b" was in flight
+    claimed = outbox.claim(2)
+    outbox.mark_sent(claimed[0].key, "SM1")
+    outbox.close()
+
+    clock.now += 1
+    restarted = Outbox(path, lease=60, clock=clock)
+    assert [e.body for e in restarted.claim(10)] == ["c"]
+
+    # The in-flight row is handed out again once its lease expires
+    clock.now += 120
+    notifier = FakeNotifier()
+    delivered = OutboxWorker(restarted, notifier).drain()
+    assert [entry.body for entry, _ in delivered] == ["b", "c"]
+    assert {restarted.status(key) for key in keys} == {"sent"}
+
+
+def test_transient_failures_back_off_then_give_up(tmp_path):
+    clock = FakeClock()
+    outbox = Outbox(str(tmp_path / "outbox.db"), max_attempts=2, retry_delay=10, clock=clock)
+    key_retry, key_fatal = outbox.enqueue([("+1", message("retry")), ("+1", message("fatal"))])
+    worker = OutboxWorker(outbox, FakeNotifier(failures={"retry": True, "fatal": False}))
+
+    worker.drain()
+    assert outbox.status(key_retry) == "pending"
+    assert outbox.status(key_fatal) == "failed"
+    # Not deliverable again until the retry delay has passed
+    assert worker.drain() == []
+    clock.now += 11
+    assert len(worker.drain()) == 1
+    assert outbox.status(key_retry) == "failed"
+
+
+def test_purge_keeps_pending_rows(tmp_path):
+    clock = FakeClock()
+    outbox = Outbox(str(tmp_path / "outbox.db"), clock=clock)
+    outbox.enqueue([("+1", message("a")), ("+1", message("b"))])
+    entry = outbox.claim(1)[0]
+    outbox.mark_sent(entry.key)
+
+    clock.now += 3600
+    assert outbox.purge(60) == 1
+    assert outbox.counts() == {"pending": 1}
+
+
+def test_pipeline_queues_messages_and_delivers_leftovers_first(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    outbox.enqueue([("+15550000001", message("left over"))])
+    notifier = FakeNotifier()
+    scraper = make_scraper({"ml": 0.01})
+    pipeline = Pipeline(scraper, FakeSummarizer(latency=0), notifier, ["ml"], per_topic=2,
+                        outbox_worker=OutboxWorker(outbox, notifier))
+
+    result = pipeline.run()
+
+    bodies = [body for _, body in notifier.sent]
+    assert bodies[0] == "left over"
+    assert sorted(bodies[1:]) == ["ml 0", "ml 1"]
+    # Only this run's articles are reported as delivered
+    assert sorted(a.title for a in result.delivered) == ["ml 0", "ml 1"]
+    assert result.first_sms_seconds is not None
+    assert outbox.counts() == {"sent": 3}
+
+
+def test_pipeline_without_a_recipient_sends_directly_instead_of_dropping_the_digest(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    notifier = FakeNotifier()
+    # e.g. the console transport with TWILIO_TO_PHONE unset
+    notifier.config = type("Config", (), {"twilio_to_phone": None})()
+    pipeline = Pipeline(make_scraper({"ml": 0.01}), FakeSummarizer(latency=0), notifier, ["ml"], per_topic=2,
+                        outbox_worker=OutboxWorker(outbox, notifier))
+
+    result = pipeline.run()
+
+    assert sorted(body for _, body in notifier.sent) == ["ml 0", "ml 1"]
+    assert sorted(a.title for a in result.delivered) == ["ml 0", "ml 1"]
+    assert outbox.counts() == {}
@@ -0,0 +1,141 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+from src.archive import ArticleArchive
+from src.models import Article
+from src.pipeline import Pipeline
+from src.scraper import NewsScraper
+
+
+class FakeSummarizer:
+    def __init__(self, latency=0.05):
+        self.latency = latency
+        self.config = type("Config", (), {"llm_pack_size": 1})()
+
+    def summarize_many(self, articles):
+        time.sleep(self.latency)
+        for article in articles:
+            article.summary = f"Summary of {article.title}"
+        return articles
+
+
+class FakeNotifier:
+    """One article per message, so every summary is sent as soon as the next one arrives."""
+
+    def __init__(self):
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def format_message(self, articles):
+        return [a.title for a in articles]
+
+    def send_notifications(self, articles):
+        with self.lock:
+            self.sent.append((time.monotonic(), [a.title for a in articles]))
+
+
+def make_scraper(delays):
+    scraper = NewsScraper()
+    scraper.topic_feeds = {topic: [f"http://{topic}/feed"] for topic in delays}
+
+    def fetch_feed_articles(url, topic):
+        time.sleep(delays[topic])
+        return [
+            Article(title=f"{topic} {i}", url=f"{url}/{i}", topic=topic, content="",
+                    published_date=datetime.now(timezone.utc), relevance_score=10 - i)
+            for i in range(3)
+        ]
+
+    scraper.fetch_feed_articles = fetch_feed_articles
+    return scraper
+
+
+def test_first_sms_goes_out_before_slow_feeds_finish():
+    scraper = make_scraper({"fast": 0.01, "slow": 0})
+    notifier = FakeNotifier()
+    first_sent = threading.Event()
+    send = notifier.send_notifications
+
+    def send_and_signal(articles):
+        results = send(articles)
+        first_sent.set()
+        return results
+
+    notifier.send_notifications = send_and_signal
+    fetch = scraper.fetch_feed_articles
+    released = []
+
+    def fetch_slow_after_first_sms(url, topic):
+        # The slow feed only finishes once an SMS has gone out (or gives up after 5s)
+        if topic == "slow":
+            released.append(first_sent.wait(5))
+        return fetch(url, topic)
+
+    scraper.fetch_feed_articles = fetch_slow_after_first_sms
+    pipeline = Pipeline(scraper, FakeSummarizer(), notifier, ["fast", "slow"], per_topic=2, summarize_workers=2)
+
+    result = pipeline.run()
+
+    assert released == [True]
+    assert sorted(a.title for a in result.delivered) == ["fast 0", "fast 1", "slow 0", "slow 1"]
+    assert result.summarized == 4
+    assert not result.cancelled
+
+
+def test_deadline_cancels_and_delivers_partial_results():
+    scraper = make_scraper({"fast": 0.01, "slow": 0.8})
+    notifier = FakeNotifier()
+    pipeline = Pipeline(scraper, FakeSummarizer(), notifier, ["fast", "slow"], per_topic=2, deadline=0.3)
+
+    result = pipeline.run()
+
+    assert result.cancelled
+    assert sorted(a.title for a in result.delivered) == ["fast 0", "fast 1"]
+
+
+def test_shared_feed_is_fetched_once_and_fanned_out():
+    scraper = make_scraper({"a": 0.01})
+    scraper.topic_feeds = {"a": ["http://shared/feed"], "b": ["http://shared/feed"]}
+    calls = []
+    fetch = scraper.fetch_feed_articles
+    scraper.fetch_feed_articles = lambda url, topic: calls.append(url) or fetch(url, "a")
+
+    result = Pipeline(scraper, FakeSummarizer(latency=0), FakeNotifier(), ["a", "b"], per_topic=1).run()
+
+    assert calls == ["http://shared/feed"]
+    assert sorted(a.topic for a in result.delivered) == ["a", "b"]
+
+
+def test_selection_is_a_global_top_k_across_topics():
+    # Three topics but room for two articles: the best two overall win
+    scraper = make_scraper({"a": 0.01, "b": 0.02, "c": 0.03})
+    fetch = scraper.fetch_feed_articles
+
+    def fetch_feed_articles(url, topic):
+        articles = fetch(url, topic)
+        for article in articles:
+            article.relevance_score += {"a": 0, "b": 5, "c": 3}[topic]
+        return articles
+
+    scraper.fetch_feed_articles = fetch_feed_articles
+    pipeline = Pipeline(scraper, FakeSummarizer(latency=0), FakeNotifier(), ["a", "b", "c"],
+                        per_topic=1, max_articles=2)
+
+    result = pipeline.run()
+
+    assert sorted(a.title for a in result.delivered) == ["b 0", "c 0"]
+
+
+def test_archive_records_candidates_summaries_and_delivery(tmp_path):
+    archive = ArticleArchive(str(tmp_path / "archive.db"))
+    scraper = make_scraper({"a": 0.01})
+    pipeline = Pipeline(scraper, FakeSummarizer(latency=0), FakeNotifier(), ["a"], per_topic=1, archive=archive)
+
+    pipeline.run()
+
+    assert len(archive) == 3
+    [picked] = archive.search("a 0", delivered_only=True)
+    assert picked.summary == "Summary of a 0"
+    assert archive.search("a 1")[0].delivered_at is None
+    archive.close()
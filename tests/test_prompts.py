@@ -0,0 +1,60 @@
+from src.prompts import PromptBuilder, estimate_tokens, extract_sentences, html_to_text, split_sentences
+
+
+MEDIUM_POST = """
+<div class="post"><h1>Diffusion models for robot control</h1>
+<p>Researchers at Stanford trained a diffusion policy for robot arms.</p>
+<style>.post { color: red; }</style>
+<p>The weather in Palo Alto was pleasant during the experiments.</p>
+<p>The diffusion policy outperformed behaviour cloning on 11 of 12 robot tasks.</p>
+<figure><img src="x.png"><figcaption>Figure&nbsp;1</figcaption></figure>
+<p>Lunch was served at noon.</p>
+</div>
+"""
+
+
+def test_html_to_text_strips_markup_and_hidden_content():
+    text = html_to_text(MEDIUM_POST)
+    assert "<" not in text
+    assert "color: red" not in text
+    assert "Figure 1" in text
+    assert text.splitlines()[0] == "Diffusion models for robot control"
+
+
+def test_split_sentences():
+    assert split_sentences("First one. Second one! Third?\nFourth") == ["First one.", "Second one!", "Third?", "Fourth"]
+    assert split_sentences("Version 2.5 is out. Done.") == ["Version 2.5 is out.", "Done."]
+
+
+def test_extract_sentences_keeps_informative_sentences_in_order():
+    text = html_to_text(MEDIUM_POST)
+    reduced = extract_sentences(text, 50, title="Diffusion policy for robots")
+
+    assert estimate_tokens(reduced) <= 50
+    assert "diffusion policy outperformed" in reduced
+    assert "weather" not in reduced
+    assert reduced.index("Stanford") < reduced.index("outperformed")
+
+
+def test_extract_sentences_truncates_an_oversized_sentence():
+    reduced = extract_sentences("word " * 500, 20)
+    assert estimate_tokens(reduced) <= 20
+    assert reduced.endswith("...")
+
+
+def test_prompt_builder_reports_tokens_saved():
+    builder = PromptBuilder(budget=40)
+    short = builder.content("Short", "A brief abstract.")
+    long = builder.content("Diffusion policy", MEDIUM_POST)
+    # Memoized: a second lookup is not counted again
+    builder.content("Diffusion policy", MEDIUM_POST)
+
+    assert short == "A brief abstract."
+    assert estimate_tokens(long) <= 40
+    assert builder.stats.articles == 2
+    assert builder.stats.tokens_saved == estimate_tokens(MEDIUM_POST) - estimate_tokens(long)
+
+
+def test_prompt_builder_without_budget_only_strips_markup():
+    builder = PromptBuilder(budget=0)
+    assert builder.content("T", "<p>Hello <b>world</b></p>") == "Hello world"
@@ -0,0 +1,61 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from src.providers import LLM_BACKENDS, NOTIFIER_TRANSPORTS, ProviderError, ProviderRegistry
+
+
+def test_registry_loads_entries_lazily_and_caches_them():
+    registry = ProviderRegistry("widget")
+    registry.register("decoder", "json:JSONDecoder")
+    registry.register("inline", lambda value: value * 2)
+
+    assert registry.names() == ["decoder", "inline"]
+    assert registry.target("decoder") == "json:JSONDecoder"
+    assert registry.load("decoder") is json.JSONDecoder
+    assert registry.create("INLINE", 21) == 42
+    # The loaded factory replaces the import path
+    assert registry.target("decoder") == "json.decoder:JSONDecoder"
+
+
+def test_registry_errors_name_the_choices():
+    registry = ProviderRegistry("widget")
+    registry.register("missing", ".no_such_module:Thing")
+    with pytest.raises(ProviderError, match="Unknown widget 'other', expected one of missing"):
+        registry.load("other")
+    with pytest.raises(ProviderError, match="Could not load widget 'missing'"):
+        registry.load("missing")
+
+
+def test_builtin_providers_are_registered():
+    assert LLM_BACKENDS.names() == ["anthropic", "openai"]
+    assert {"twilio", "console"} <= set(NOTIFIER_TRANSPORTS.names())
+
+
+def test_importing_main_loads_no_provider_sdk():
+    code = "import sys, src.main; print([m for m in ('openai', 'anthropic', 'twilio') if m in sys.modules])"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "[]"
+
+
+def test_config_check_loads_neither_http_nor_xml_libraries():
+    code = ("import sys\nfrom src.main import main\nmain(['--check'])\n"
+            "print([m for m in ('requests', 'lxml', 'openai', 'anthropic', 'twilio') if m in sys.modules])")
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip().splitlines()[-1] == "[]"
+
+
+def test_console_transport_prints_messages(capsys):
+    from src.models import Article
+    from tests.conftest import make_config
+
+    config = make_config(twilio_from_phone="+1", twilio_to_phone="+2", sms_per_second=0)
+    notifier = NOTIFIER_TRANSPORTS.create("console", config)
+    article = Article(title="Hello", url="http://example.com", topic="ml", content="", summary="World.")
+
+    results = notifier.send_notifications([article])
+
+    assert [r.sid for r in results] == ["console-1"]
+    assert "--- SMS to +2 ---" in capsys.readouterr().out
@@ -0,0 +1,80 @@
+import random
+
+from src.models import Article
+from src.ranking import TopKRanker, source_of
+
+
+def article(i, score, topic="ml", site="example.com"):
+    return Article(title=f"A{i}", url=f"https://{site}/{i}", topic=topic, content="", relevance_score=score)
+
+
+def greedy(articles, k, per_topic=None, per_source=None):
+    """Reference selection: sort everything, then take the best that fit the caps."""
+    chosen, topics, sources = [], {}, {}
+    for a in sorted(articles, key=lambda a: a.relevance_score, reverse=True):
+        if len(chosen) == k:
+            break
+        if per_topic and topics.get(a.topic, 0) >= per_topic:
+            continue
+        if per_source and sources.get(source_of(a), 0) >= per_source:
+            continue
+        chosen.append(a)
+        topics[a.topic] = topics.get(a.topic, 0) + 1
+        sources[source_of(a)] = sources.get(source_of(a), 0) + 1
+    return chosen
+
+
+def test_matches_a_full_sort_with_and_without_topic_quotas():
+    rng = random.Random(7)
+    for trial in range(50):
+        stream = [article(i, rng.random(), topic=rng.choice("abcd")) for i in range(300)]
+        for per_topic in (None, 1, 3):
+            ranker = TopKRanker(5, per_topic=per_topic)
+            ranker.extend(stream)
+            assert ranker.ranked() == greedy(stream, 5, per_topic)
+
+
+def test_memory_stays_proportional_to_k():
+    rng = random.Random(1)
+    ranker = TopKRanker(10, per_topic=4)
+    # Ascending scores make every arrival evict something
+    for i in range(20000):
+        ranker.offer(article(i, i + rng.random(), topic=rng.choice("abc")))
+    assert len(ranker) == 10
+    assert len(ranker._all.heap) <= 2 * 10 + 8
+    assert all(len(g.heap) <= 2 * g.size + 8 for g in ranker._topics.values())
+
+
+def test_source_cap_keeps_sites_diverse():
+    stream = [article(i, 10 - i, site="medium.com") for i in range(5)]
+    stream += [article(i, 5 - i, site="www.arxiv.org") for i in range(5, 8)]
+    ranker = TopKRanker(4, per_source=2)
+    ranker.extend(stream)
+    assert [a.title for a in ranker.ranked()] == ["A0", "A1", "A5", "A6"]
+
+
+def test_topics_beyond_k_do_not_get_zero_articles():
+    # Four topics and k=3 used to mean 3 // 4 = 0 articles per topic
+    stream = [article(i, score, topic=t) for i, (t, score) in enumerate([("a", 1), ("b", 5), ("c", 3), ("d", 4)])]
+    ranker = TopKRanker(3, per_topic=1)
+    ranker.extend(stream)
+    assert [a.topic for a in ranker.ranked()] == ["b", "d", "c"]
+
+
+def test_each_url_is_kept_once_and_replace_rolls_back():
+    first = article(1, 5, topic="llms")
+    copy = article(1, 5, topic="nlp")
+    ranker = TopKRanker(2, per_topic=1)
+    assert ranker.offer(first)
+    assert not ranker.offer(copy)
+
+    better = article(2, 9, topic="llms")
+    assert ranker.replace(first, better)
+    assert better in ranker and first not in ranker
+    # With the llms copy gone, the same story may still fill the nlp slot
+    assert ranker.offer(copy)
+
+    # Swapping the nlp slot for a second llms article breaks the quota, so it is undone
+    other = article(3, 7, topic="llms")
+    assert not ranker.replace(copy, other)
+    assert copy in ranker and other not in ranker
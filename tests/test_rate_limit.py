@@ -0,0 +1,37 @@
+from src.rate_limit import RateLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_token_bucket_bursts_then_waits():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock, sleep=clock.sleep)
+
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.sleeps == []
+
+    bucket.acquire()
+    assert clock.sleeps == [0.5]
+    assert bucket.try_acquire() == 0.5
+
+
+def test_rate_limiter_applies_request_and_token_limits():
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=600, clock=clock, sleep=clock.sleep)
+
+    limiter.acquire(tokens=600)
+    # The token budget is exhausted, so the next 300-token call waits 30s for a refill
+    limiter.acquire(tokens=300)
+    assert round(clock.now) == 30
@@ -0,0 +1,79 @@
+from datetime import datetime, timezone, timedelta
+
+from src.models import Article
+from src.relevance import RelevanceScorer, parse_keywords, title_terms
+
+
+def legacy_score(article, now):
+    # The scoring NewsScraper used before the compiled engine
+    score = 0.0
+    if article.published_date:
+        hours_old = (now - article.published_date).total_seconds() / 3600
+        score += max(0, 5 - (hours_old / 24) * 5)
+    if article.content:
+        score += min(2, len(article.content) / 500)
+    institutions = ["MIT", "Stanford", "Berkeley", "Oxford", "Cambridge", "Google", "Microsoft", "DeepMind"]
+    mentioned = sum(1 for inst in institutions if inst.lower() in (article.content + article.title).lower())
+    score += min(3, mentioned * 0.5)
+    return round(score, 2)
+
+
+def test_matches_legacy_scores_for_default_weights():
+    now = datetime.now(timezone.utc)
+    texts = [
+        ("A study", "Joint work by MIT and Stanford with Google DeepMind."),
+        ("Oxford and Cambridge", "x" * 1200),
+        ("Nothing notable", ""),
+        ("Microsoft, Berkeley, MIT, Stanford, Oxford, Cambridge, Google", "DeepMind"),
+    ]
+    articles = [
+        Article(title=title, url=f"u{i}", topic="ml", content=content,
+                published_date=now - timedelta(hours=3 * i))
+        for i, (title, content) in enumerate(texts)
+    ]
+    articles.append(Article(title="Undated", url="undated", topic="ml", content="From MIT"))
+
+    scores = RelevanceScorer().score_many(articles, now)
+    assert scores == [legacy_score(a, now) for a in articles]
+
+
+def test_word_boundaries_avoid_substring_hits():
+    scorer = RelevanceScorer()
+    assert scorer.keyword_score("We submitted the permit.") == 0
+    assert scorer.keyword_score("Researchers at MIT.") == 0.5
+    assert scorer.keyword_score("mit MIT Mit") == 0.5
+
+    # An intended change from the legacy scoring, which credited MIT for "submitted"
+    now = datetime.now(timezone.utc)
+    article = Article(title="Results submitted", url="u", topic="ml", content="", published_date=now)
+    assert RelevanceScorer().score(article, now) == legacy_score(article, now) - 0.5
+    assert RelevanceScorer(word_boundary=False).score(article, now) == legacy_score(article, now)
+
+
+def test_weighted_keywords_share_prefixes():
+    scorer = RelevanceScorer({"deep": 0.25, "deepmind": 1.0, "C++": 0.5}, max_keyword_score=10)
+    assert scorer.keyword_score("DeepMind uses C++") == 1.5
+    assert scorer.keyword_score("deep learning") == 0.25
+
+
+def test_scales_to_thousands_of_keywords():
+    keywords = {f"lab{i}": 0.001 for i in range(5000)}
+    keywords["Stanford"] = 0.5
+    scorer = RelevanceScorer(keywords)
+    text = " ".join(["ordinary words"] * 500 + ["lab42", "Stanford", "lab4999"])
+
+    # One compiled pattern finds every listed keyword in the text; speed is tracked in benchmarks/
+    assert scorer.keyword_score(text) == 0.502
+
+
+def test_parse_keywords():
+    assert parse_keywords("MIT:1, Stanford ,OpenAI:0.25") == {"MIT": 1.0, "Stanford": 0.5, "OpenAI": 0.25}
+    assert parse_keywords("") is None
+
+
+def test_trending_title_terms_add_capped_points():
+    assert title_terms("The Diffusion Policy for robots") == {"diffusion", "policy", "robots", "diffusion policy"}
+    scorer = RelevanceScorer({}, trends={"diffusion policy": 0.6, "robots": 0.7, "weather": 1.0}, max_trend_score=1.0)
+    assert scorer.trend_score("Diffusion policy robots") == 1.0
+    assert scorer.trend_score("A diffusion policy") == 0.6
+    assert scorer.trend_score("Nothing new") == 0
@@ -0,0 +1,147 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.metrics import Metrics
+from src.scheduler import Scheduler, SchedulerError, parse_timezone
+
+
+class FakeClock:
+    """Clock whose sleep advances time instantly and stops the scheduler at `until`."""
+
+    def __init__(self, now, until=None):
+        self.now = now
+        self.until = until
+        self.scheduler = None
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += timedelta(seconds=seconds)
+        if self.until and self.now >= self.until:
+            self.scheduler.stop()
+
+
+def make_scheduler(clock, task, **kwargs):
+    scheduler = Scheduler(kwargs.pop('times', ['09:00', '17:00']), task, tz=timezone.utc,
+                          clock=clock, sleep=clock.sleep, **kwargs)
+    clock.scheduler = scheduler
+    return scheduler
+
+
+def test_sleeps_until_each_slot_instead_of_polling():
+    start = datetime(2024, 1, 1, 8, 0, tzinfo=timezone.utc)
+    clock = FakeClock(start, until=start + timedelta(days=1, hours=2))
+    runs = []
+    scheduler = make_scheduler(clock, lambda: runs.append(clock()))
+
+    scheduler.start()
+
+    assert runs == [
+        datetime(2024, 1, 1, 9, 0, tzinfo=timezone.utc),
+        datetime(2024, 1, 1, 17, 0, tzinfo=timezone.utc),
+        datetime(2024, 1, 2, 9, 0, tzinfo=timezone.utc),
+    ]
+    assert clock.sleeps == [3600, 8 * 3600, 16 * 3600, 8 * 3600]
+
+
+def test_schedule_times_follow_timezone():
+    scheduler = Scheduler(['09:00'], lambda: None, tz=parse_timezone('America/New_York'))
+
+    # 09:00 in New York is 14:00 UTC in winter and 13:00 UTC in summer
+    assert scheduler.next_run(datetime(2024, 1, 15, 0, 0, tzinfo=timezone.utc)) == \
+        datetime(2024, 1, 15, 14, 0, tzinfo=timezone.utc)
+    assert scheduler.next_run(datetime(2024, 7, 15, 0, 0, tzinfo=timezone.utc)) == \
+        datetime(2024, 7, 15, 13, 0, tzinfo=timezone.utc)
+
+
+def test_invalid_configuration_is_rejected():
+    with pytest.raises(SchedulerError):
+        parse_timezone('Mars/Olympus_Mons')
+    with pytest.raises(SchedulerError):
+        Scheduler(['25:99'], lambda: None)
+    with pytest.raises(SchedulerError):
+        Scheduler(['09:00'], lambda: None, overlap='parallel')
+
+
+def test_missed_slot_runs_once_on_startup(tmp_path):
+    state_path = str(tmp_path / 'scheduler.json')
+    with open(state_path, 'w') as f:
+        json.dump({'last_run': '2024-01-01T09:00:00+00:00'}, f)
+    # Down over both of the 2nd's slots; only the latest one is caught up
+    clock = FakeClock(datetime(2024, 1, 2, 20, 0, tzinfo=timezone.utc))
+    runs = []
+    scheduler = make_scheduler(clock, lambda: runs.append(clock()), state_path=state_path)
+
+    assert scheduler.catch_up(clock())
+    assert len(runs) == 1
+    assert scheduler.last_run() == datetime(2024, 1, 2, 17, 0, tzinfo=timezone.utc)
+    assert not scheduler.catch_up(clock())
+
+
+def test_no_catch_up_without_state(tmp_path):
+    clock = FakeClock(datetime(2024, 1, 2, 20, 0, tzinfo=timezone.utc))
+    scheduler = make_scheduler(clock, lambda: None, state_path=str(tmp_path / 'scheduler.json'))
+
+    assert not scheduler.catch_up(clock())
+
+
+def test_timeout_abandons_run_and_skips_overlapping_slot():
+    release = threading.Event()
+    metrics = Metrics()
+    clock = FakeClock(datetime(2024, 1, 1, 8, 0, tzinfo=timezone.utc))
+    scheduler = make_scheduler(clock, release.wait, timeout=0.05, metrics=metrics)
+
+    assert scheduler.dispatch(datetime(2024, 1, 1, 9, 0, tzinfo=timezone.utc))
+    assert metrics.counter('scheduler_runs', status='timeout') == 1
+    assert not scheduler.dispatch(datetime(2024, 1, 1, 17, 0, tzinfo=timezone.utc))
+    assert metrics.counter('scheduler_runs', status='skipped') == 1
+    release.set()
+
+
+def test_queue_policy_runs_overlapping_slot_after_previous_finishes():
+    release = threading.Event()
+    runs = []
+
+    def task():
+        runs.append(clock())
+        if len(runs) == 1:
+            release.wait()
+
+    start = datetime(2024, 1, 1, 8, 0, tzinfo=timezone.utc)
+    clock = FakeClock(start, until=start + timedelta(hours=10))
+    scheduler = make_scheduler(clock, task, timeout=0.05, overlap='queue')
+
+    def sleep(seconds):
+        # The 09:00 run is still stuck when 17:00 is queued; finishing it wakes the loop early
+        if clock() >= datetime(2024, 1, 1, 17, 0, tzinfo=timezone.utc) and not release.is_set():
+            release.set()
+            while scheduler._running:
+                time.sleep(0.001)
+            return
+        clock.sleep(seconds)
+
+    scheduler.sleep = sleep
+    scheduler.start()
+
+    assert runs == [
+        datetime(2024, 1, 1, 9, 0, tzinfo=timezone.utc),
+        datetime(2024, 1, 1, 17, 0, tzinfo=timezone.utc),
+    ]
+
+
+def test_failing_task_does_not_stop_the_loop():
+    start = datetime(2024, 1, 1, 8, 0, tzinfo=timezone.utc)
+    clock = FakeClock(start, until=start + timedelta(hours=12))
+    metrics = Metrics()
+    scheduler = make_scheduler(clock, lambda: 1 / 0, metrics=metrics)
+
+    scheduler.start()
+
+    assert metrics.counter('scheduler_runs', status='error') == 2
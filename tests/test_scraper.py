@@ -1,5 +1,8 @@
 import pytest
+import threading
 from src.scraper import NewsScraper, NewsScraperError
+from src.feed_parser import FeedStream
+from src.feed_registry import FeedRegistry
 from datetime import datetime, timezone, timedelta
 
 def test_fetch_feed():
@@ -76,4 +79,42 @@ def test_parse_feed_with_dates():
     assert len(articles) == 1
     assert articles[0].title == "Recent Article"
     assert articles[0].relevance_score > 0  # Should have some relevance score
-    assert articles[0].published_date > (datetime.now(timezone.utc) - timedelta(days=1)) 
\ No newline at end of file
+    assert articles[0].published_date > (datetime.now(timezone.utc) - timedelta(days=1)) 
+
+def test_get_articles_for_topics_fetches_shared_feeds_once(monkeypatch):
+    # Exercises the RSS path, so the bundled arXiv feeds are read as RSS here (harvesting is in test_arxiv_oai)
+    registry = FeedRegistry.load()
+    for feed in registry.feeds.values():
+        feed.format = "rss"
+    scraper = NewsScraper(feeds=registry)
+    recent_date = (datetime.now(timezone.utc) - timedelta(hours=1)).strftime('%a, %d %b %Y %H:%M:%S %z')
+    fetched = []
+
+    # Every download has to be in flight at once to get past the barrier
+    all_in_flight = threading.Barrier(6, timeout=5)
+
+    def fake_fetch(url):
+        fetched.append(url)
+        all_in_flight.wait()
+        return FeedStream([f"""
+        <rss><channel><item>
+            <title>Item from {url}</title>
+            <link>{url}/item</link>
+            <description>Paper from Stanford.</description>
+            <pubDate>{recent_date}</pubDate>
+        </item></channel></rss>
+        """.encode('utf-8')]), True
+
+    monkeypatch.setattr(scraper, "open_feed", fake_fetch)
+
+    results = scraper.get_articles_for_topics(["llms", "nlp", "ml", "reinforcement learning"])
+
+    # cs.CL and cs.LG are shared, so 8 feed slots collapse to 6 concurrent downloads
+    assert sorted(fetched) == sorted(set(fetched))
+    assert len(fetched) == 6
+
+    llms_urls = {a.url for a in results["llms"]}
+    nlp_urls = {a.url for a in results["nlp"]}
+    assert "https://arxiv.org/rss/cs.CL/item" in llms_urls
+    assert "https://arxiv.org/rss/cs.CL/item" in nlp_urls
+    assert all(a.topic == "nlp" for a in results["nlp"])
@@ -0,0 +1,61 @@
+import time
+from datetime import datetime, timezone, timedelta
+
+from src.scraper import NewsScraper
+from src.seen_store import SeenStore, normalize_url
+
+
+def test_normalize_arxiv_variants():
+    variants = [
+        "https://arxiv.org/abs/2401.01234",
+        "http://arxiv.org/abs/2401.01234v2",
+        "https://arxiv.org/pdf/2401.01234v1.pdf",
+        "https://export.arxiv.org/abs/2401.01234v3/",
+    ]
+    assert {normalize_url(url) for url in variants} == {"arxiv:2401.01234"}
+    assert normalize_url("https://arxiv.org/abs/cs/0112017v1") == "arxiv:cs/0112017"
+
+
+def test_normalize_drops_tracking_params():
+    assert normalize_url("https://www.medium.com/p/abc/?source=rss----1&utm_medium=x#frag") == \
+        normalize_url("http://medium.com/p/abc")
+    assert normalize_url("https://example.com/a?id=1") != normalize_url("https://example.com/a?id=2")
+
+
+def test_persists_across_instances_and_expires(tmp_path):
+    path = str(tmp_path / "seen.db")
+    store = SeenStore(path, ttl=3600)
+    store.add_many(["https://arxiv.org/abs/2401.00001v1", "https://example.com/old"])
+    store.add_many(["https://example.com/expired"], seen_at=time.time() - 7200)
+    store.close()
+
+    store = SeenStore(path, ttl=3600)
+    urls = [
+        "https://arxiv.org/pdf/2401.00001v2.pdf",
+        "https://example.com/old",
+        "https://example.com/expired",
+        "https://example.com/new",
+    ]
+    assert store.filter_unseen(urls) == ["https://example.com/expired", "https://example.com/new"]
+    # Expired rows are evicted when the store is opened
+    assert len(store) == 2
+
+
+def test_scraper_skips_previously_delivered(tmp_path):
+    pub_date = (datetime.now(timezone.utc) - timedelta(hours=1)).strftime('%a, %d %b %Y %H:%M:%S %z')
+    feed = f"""<rss><channel>
+        <item><title>Old</title><link>https://arxiv.org/abs/2401.00001v1</link>
+            <description>From MIT.</description><pubDate>{pub_date}</pubDate></item>
+        <item><title>New</title><link>https://arxiv.org/abs/2401.00002v1</link>
+            <description>From MIT.</description><pubDate>{pub_date}</pubDate></item>
+    </channel></rss>"""
+    store = SeenStore(str(tmp_path / "seen.db"))
+
+    first = NewsScraper(seen_store=store)
+    articles = first.parse_feed(feed, "nlp")
+    assert len(articles) == 2
+    first.mark_seen([a for a in articles if a.title == "Old"])
+
+    second = NewsScraper(seen_store=store)
+    remaining = second.parse_feed(feed, "nlp")
+    assert [a.title for a in remaining] == ["New"]
@@ -0,0 +1,47 @@
+from src.sms import encoding, normalize_gsm7, pack, segment_count
+
+
+def test_normalize_keeps_text_in_gsm7():
+    text = normalize_gsm7("“Smart” quotes — and an ellipsis… in a naïve café résumé")
+
+    assert text == '"Smart" quotes - and an ellipsis... in a naive café résumé'
+    assert encoding(text) == 'gsm7'
+
+
+def test_unmappable_characters_force_ucs2():
+    text = normalize_gsm7("Launch 🚀")
+
+    assert text == "Launch 🚀"
+    assert encoding(text) == 'ucs2'
+
+
+def test_segment_counts():
+    assert segment_count("a" * 160) == 1
+    assert segment_count("a" * 161) == 2
+    assert segment_count("a" * 306) == 2
+    assert segment_count("a" * 307) == 3
+    # Extension characters take two septets
+    assert segment_count("€" * 80) == 1
+    assert segment_count("€" * 81) == 2
+    # UCS-2 counts UTF-16 code units: 70 single, 67 per part; emoji are surrogate pairs
+    assert segment_count("ж" * 70) == 1
+    assert segment_count("ж" * 71) == 2
+    assert segment_count("🚀" * 35) == 1
+
+
+def test_pack_separates_ucs2_from_gsm7():
+    texts = ["a" * 100, "🚀 launch", "b" * 100]
+
+    assert pack(texts) == [[0, 2], [1]]
+
+
+def test_pack_respects_segment_budget_and_minimizes_messages():
+    # Five 150-septet texts and one 300-septet text with a 3-segment (459 septet) budget
+    texts = ["a" * 150] * 5 + ["b" * 300]
+
+    messages = pack(texts, max_segments=3)
+
+    assert sorted(i for m in messages for i in m) == list(range(6))
+    assert all(sum(len(texts[i]) for i in m) <= 459 for m in messages)
+    assert len(messages) == 3
+    assert sum(segment_count("".join(texts[i] for i in m)) for m in messages) == 7
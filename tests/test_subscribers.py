@@ -0,0 +1,146 @@
+from datetime import datetime, timezone
+
+from src.models import Article
+from src.notifier import DeliveryResult, SMSMessage
+from src.seen_store import SeenStore
+from src.subscribers import DigestFanOut, Subscriber, SubscriberRegistry, load_subscribers
+
+
+class FakeScraper:
+    def __init__(self, ranked):
+        self.ranked = ranked
+        self.calls = []
+
+    def get_articles_for_topics(self, topics):
+        self.calls.append(list(topics))
+        return {t: list(self.ranked.get(t, [])) for t in topics}
+
+
+class FakeSummarizer:
+    def __init__(self):
+        self.summarized = []
+
+    def summarize_many(self, articles):
+        self.summarized.extend(a.url for a in articles)
+        for article in articles:
+            article.summary = f"Summary of {article.title}"
+        return articles
+
+
+class FakeNotifier:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.sent = {}
+        self.formatted = 0
+
+    def pack(self, articles):
+        self.formatted += 1
+        return [SMSMessage("\n".join(a.title for a in articles), list(articles))]
+
+    def deliver_many(self, outbox):
+        results = []
+        for to, message in outbox:
+            if to in self.failing:
+                results.append(DeliveryResult(message, to, attempts=1, error="undeliverable"))
+                continue
+            self.sent.setdefault(to, []).append(message.body)
+            results.append(DeliveryResult(message, to, sid="SM1", attempts=1))
+        return results
+
+
+def ranked_articles(topic, count):
+    return [
+        Article(title=f"{topic} {i}", url=f"https://example.com/{topic}/{i}", topic=topic, content="",
+                published_date=datetime.now(timezone.utc), relevance_score=count - i)
+        for i in range(count)
+    ]
+
+
+def test_registry_round_trip_and_due(tmp_path):
+    registry = SubscriberRegistry(str(tmp_path / "subscribers.db"))
+    registry.upsert_many([
+        Subscriber("alice", "+1", ["NLP", "ml"], 4),
+        Subscriber("bob", "+2", ["robotics"], 2, ["07:30"]),
+        Subscriber("carol", "+3", ["ml"], 1, active=False),
+    ])
+
+    assert [s.id for s in registry.all()] == ["alice", "bob"]
+    assert registry.all()[0].topics == ["nlp", "ml"]
+    assert len(registry) == 3
+    assert registry.schedule_times() == ["07:30"]
+    assert [s.id for s in registry.due("07:30", ["09:00"])] == ["bob"]
+    assert [s.id for s in registry.due("09:00", ["09:00"])] == ["alice"]
+    assert [s.id for s in registry.due()] == ["alice", "bob"]
+    assert registry.remove("bob") and not registry.remove("bob")
+    registry.close()
+
+
+def test_load_subscribers_from_json(tmp_path):
+    path = tmp_path / "subscribers.json"
+    path.write_text('[{"id": "a", "phone": "+1", "topics": ["ml"], "max_articles": 2}]')
+
+    assert load_subscribers(str(path)) == [Subscriber("a", "+1", ["ml"], 2)]
+
+
+def test_topics_are_computed_once_for_many_subscribers():
+    scraper = FakeScraper({"ml": ranked_articles("ml", 5), "nlp": ranked_articles("nlp", 5)})
+    summarizer = FakeSummarizer()
+    notifier = FakeNotifier()
+    subscribers = [Subscriber(f"s{i}", f"+{i}", ["ml", "nlp"] if i % 2 else ["ml"], 2) for i in range(1000)]
+
+    result = DigestFanOut(scraper, summarizer, notifier).run(subscribers)
+
+    assert scraper.calls == [["ml", "nlp"]]
+    # ml subscribers take 2 from ml, ml+nlp subscribers take 1 from each
+    assert sorted(summarizer.summarized) == [
+        "https://example.com/ml/0", "https://example.com/ml/1", "https://example.com/nlp/0"
+    ]
+    assert notifier.formatted == 2
+    assert len(result.delivered) == 1000
+    assert notifier.sent["+1"] == ["ml 0\nnlp 0"]
+    assert notifier.sent["+0"] == ["ml 0\nml 1"]
+
+
+def test_dedup_is_per_subscriber(tmp_path):
+    store = SeenStore(str(tmp_path / "seen.db"))
+    articles = ranked_articles("ml", 3)
+    store.add_many([articles[0].url], namespace="alice")
+    fan_out = DigestFanOut(FakeScraper({"ml": articles}), FakeSummarizer(), FakeNotifier(), seen_store=store)
+
+    fan_out.run([Subscriber("alice", "+1", ["ml"], 1), Subscriber("bob", "+2", ["ml"], 1)])
+
+    assert fan_out.notifier.sent == {"+1": ["ml 1"], "+2": ["ml 0"]}
+    assert store.filter_unseen([a.url for a in articles], namespace="bob") == [articles[1].url, articles[2].url]
+    # The global (single-recipient) namespace is untouched
+    assert len(store.filter_unseen([a.url for a in articles])) == 3
+
+
+def test_failed_delivery_is_not_marked_seen(tmp_path):
+    store = SeenStore(str(tmp_path / "seen.db"))
+    articles = ranked_articles("ml", 2)
+    fan_out = DigestFanOut(FakeScraper({"ml": articles}), FakeSummarizer(), FakeNotifier(failing={"+1"}),
+                           seen_store=store)
+
+    result = fan_out.run([Subscriber("alice", "+1", ["ml"], 1), Subscriber("bob", "+2", ["ml"], 1)])
+
+    assert result.failed == ["alice"]
+    assert result.delivered == {"bob": 1}
+    assert store.filter_unseen([articles[0].url], namespace="alice") == [articles[0].url]
+
+
+def test_fan_out_through_outbox_marks_seen_when_queued(tmp_path):
+    from src.outbox import Outbox, OutboxWorker
+
+    store = SeenStore(str(tmp_path / "seen.db"))
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    articles = ranked_articles("ml", 2)
+    notifier = FakeNotifier()
+    fan_out = DigestFanOut(FakeScraper({"ml": articles}), FakeSummarizer(), notifier, seen_store=store,
+                           outbox_worker=OutboxWorker(outbox, notifier))
+
+    result = fan_out.run([Subscriber("alice", "+1", ["ml"], 1), Subscriber("bob", "+2", ["ml"], 1)])
+
+    assert result.delivered == {"alice": 1, "bob": 1}
+    assert notifier.sent == {"+1": ["ml 0"], "+2": ["ml 0"]}
+    assert outbox.counts() == {"sent": 2}
+    assert store.filter_unseen([articles[0].url], namespace="alice") == []
@@ -1,14 +1,19 @@
 import pytest
+import re
+import threading
+import time
 from unittest.mock import Mock, patch
-from src.summarizer import Summarizer, SummarizerError
+from src.summarizer import Summarizer, SummarizerError, is_retryable
+from src.llm_backends import Completion, OpenAIBackend
 from src.models import Article
 from src.config import Config
+from tests.conftest import make_config
 
 def test_summarize_openai(monkeypatch):
-    def mock_summarize_with_openai(self, article):
-        return "This is a mock OpenAI summary."
+    def mock_complete(self, system, prompt, max_tokens):
+        return Completion("This is a mock OpenAI summary.")
 
-    monkeypatch.setattr(Summarizer, "_summarize_with_openai", mock_summarize_with_openai)
+    monkeypatch.setattr(OpenAIBackend, "complete", mock_complete)
 
     config = Config(
         llm_provider="openai",
@@ -48,4 +53,97 @@ def test_summarize_anthropic(mock_anthropic):
     summarizer = Summarizer(config)
     article = Article(title="Test", url="", topic="", content="Test content")
     summary = summarizer.summarize(article)
-    assert summary == "This is a mock Anthropic summary."
\ No newline at end of file
+    assert summary == "This is a mock Anthropic summary."
+
+class FakeRateLimitError(Exception):
+    status_code = 429
+
+
+class FakeAnthropicClient:
+    """Simulates per-call latency and a 429 on the first call for selected titles."""
+
+    def __init__(self, latency=0.1, rate_limited_titles=()):
+        self.latency = latency
+        self.rate_limited = set(rate_limited_titles)
+        self.calls = []
+        self.messages = self
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def create(self, **kwargs):
+        prompt = kwargs["messages"][0]["content"]
+        with self.lock:
+            self.calls.append(prompt)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.latency)
+        with self.lock:
+            self.active -= 1
+        for title in list(self.rate_limited):
+            if f"Title: {title}\n" in prompt:
+                self.rate_limited.discard(title)
+                raise FakeRateLimitError("rate limited")
+        if prompt.startswith("Summarize each of the following"):
+            indices = re.findall(r"^\[(\d+)\] Title: (.+)$", prompt, re.MULTILINE)
+            text = "\n".join(f"[{i}] Summary of {title}." for i, title in indices)
+        else:
+            title = re.search(r"Title: (.+)", prompt).group(1)
+            text = f"Summary of {title}."
+        return Mock(content=[Mock(text=text)])
+
+
+@patch('anthropic.Anthropic')
+def test_summarize_many_runs_concurrently_and_retries(mock_anthropic):
+    fake = FakeAnthropicClient(latency=0.2, rate_limited_titles=["Article 2"])
+    mock_anthropic.return_value = fake
+    summarizer = Summarizer(make_config(llm_concurrency=8, llm_requests_per_minute=6000))
+    summarizer.retry_base_delay = 0.01
+    articles = [Article(title=f"Article {i}", url=f"u{i}", topic="ml", content="Text") for i in range(8)]
+
+    summarized = summarizer.summarize_many(articles)
+
+    assert [a.summary for a in summarized] == [f"Summary of Article {i}." for i in range(8)]
+    # 9 calls (one retry), overlapping rather than one at a time
+    assert len(fake.calls) == 9
+    assert fake.peak > 1
+
+
+@patch('anthropic.Anthropic')
+def test_summarize_many_packs_short_abstracts(mock_anthropic):
+    fake = FakeAnthropicClient(latency=0)
+    mock_anthropic.return_value = fake
+    summarizer = Summarizer(make_config(llm_pack_size=3, llm_pack_max_chars=100))
+    articles = [Article(title=f"Short {i}", url=f"s{i}", topic="ml", content="Brief") for i in range(5)]
+    articles.append(Article(title="Long", url="long", topic="ml", content="x" * 500))
+
+    summarized = summarizer.summarize_many(articles)
+
+    assert len(summarized) == 6
+    assert articles[4].summary == "Summary of Short 4."
+    assert articles[5].summary == "Summary of Long."
+    # Two packed prompts (3 + 2 articles) plus one for the long article
+    assert len(fake.calls) == 3
+
+
+def test_retryable_errors():
+    try:
+        raise SummarizerError("wrapped") from FakeRateLimitError()
+    except SummarizerError as e:
+        assert is_retryable(e)
+    assert not is_retryable(SummarizerError("bad request"))
+
+
+@patch('anthropic.Anthropic')
+def test_prompt_content_is_stripped_and_budgeted(mock_anthropic):
+    fake = FakeAnthropicClient(latency=0)
+    mock_anthropic.return_value = fake
+    summarizer = Summarizer(make_config(llm_input_token_budget=50))
+    sentences = " ".join(f"<p>Sentence {i} about transformers and other things.</p>" for i in range(100))
+    article = Article(title="Transformers", url="t", topic="ml", content=sentences)
+
+    assert summarizer.summarize(article) == "Summary of Transformers."
+    content = fake.calls[0].split("Content: ", 1)[1]
+    assert "<p>" not in content
+    assert len(content) // 4 + 1 <= 50
+    assert summarizer.prompts.stats.tokens_saved > 0
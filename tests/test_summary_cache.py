@@ -0,0 +1,54 @@
+from unittest.mock import Mock, patch
+
+from src.models import Article
+from src.summarizer import Summarizer
+from src.summary_cache import SummaryCache
+from tests.conftest import make_config
+
+
+@patch('anthropic.Anthropic')
+def test_same_content_under_two_topics_costs_one_call(mock_anthropic, tmp_path):
+    mock_client = Mock()
+    mock_client.messages.create.return_value = Mock(content=[Mock(text="Cached summary.")])
+    mock_anthropic.return_value = mock_client
+
+    cache = SummaryCache(str(tmp_path / "summaries.db"))
+    summarizer = Summarizer(make_config(), cache=cache)
+    llms = Article(title="Paper", url="https://arxiv.org/abs/1", topic="llms", content="Abstract")
+    nlp = Article(title="Paper", url="https://arxiv.org/abs/1", topic="nlp", content="Abstract")
+
+    assert summarizer.summarize(llms) == "Cached summary."
+    assert summarizer.summarize(nlp) == "Cached summary."
+    assert mock_client.messages.create.call_count == 1
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+    # A later run (fresh memory tier) is served from disk
+    cache.close()
+    summarizer = Summarizer(make_config(), cache=SummaryCache(str(tmp_path / "summaries.db")))
+    assert summarizer.summarize(llms) == "Cached summary."
+    assert mock_client.messages.create.call_count == 1
+
+
+def test_key_depends_on_provider_model_and_content():
+    base = SummaryCache.make_key("openai", "m", "t", "title", "content")
+    assert base == SummaryCache.make_key("openai", "m", "t", "title", "content")
+    assert base != SummaryCache.make_key("anthropic", "m", "t", "title", "content")
+    assert base != SummaryCache.make_key("openai", "m2", "t", "title", "content")
+    assert base != SummaryCache.make_key("openai", "m", "t", "titlec", "ontent")
+
+
+def test_memory_lru_and_disk_eviction(tmp_path):
+    cache = SummaryCache(str(tmp_path / "summaries.db"), memory_entries=2, max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, key.upper())
+    assert list(cache._memory) == ["b", "c"]
+
+    cache.evict()
+    count = cache._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+    assert count == 2
+
+    memory_only = SummaryCache(memory_entries=1)
+    memory_only.put("x", "X")
+    assert memory_only.get("x") == "X"
+    assert memory_only.get("y") is None
@@ -0,0 +1,164 @@
+import multiprocessing
+import threading
+from datetime import datetime, timezone
+
+from src.arxiv_oai import ArxivHarvester
+from src.feed_registry import Feed, FeedRegistry, PollSchedule
+from src.metrics import Metrics
+from src.models import Article
+from src.pipeline import Pipeline
+from src.scraper import NewsScraper
+from src.work_queue import ShardCoordinator, ShardWorker, WorkQueue, article_from_dict, article_to_dict
+from tests.test_arxiv_oai import FIRST_PAGE, NOW, SECOND_PAGE, FakeSession, Response, page, record
+from tests.test_pipeline import FakeNotifier, FakeSummarizer
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_expired_lease_is_reclaimed_and_the_old_owner_fenced_off(tmp_path):
+    clock = FakeClock()
+    queue = WorkQueue(str(tmp_path / "work.db"), lease=60, max_attempts=2, clock=clock)
+    assert queue.enqueue("run", {"a": {"n": 1}, "b": {"n": 2}}) == 2
+    assert queue.enqueue("run", {"a": {"n": 1}}) == 0
+
+    crashed = queue.claim("worker-1", "run")
+    assert (crashed.key, crashed.payload, crashed.attempts) == ("a", {"n": 1}, 1)
+    assert queue.claim("worker-2", "run").key == "b"
+    assert queue.claim("worker-2", "run") is None
+
+    clock.now += 61
+    retry = queue.claim("worker-2", "run")
+    assert (retry.key, retry.attempts) == ("a", 2)
+    # The first owner lost the unit with its lease, so its late result is refused
+    assert not queue.complete(crashed, {"from": 1})
+    assert queue.complete(retry, {"from": 2})
+    assert queue.collect("run") == [("a", True, {"from": 2})]
+    assert queue.collect("run") == []
+
+    # A unit whose lease keeps expiring is failed after max_attempts claims
+    clock.now += 61
+    assert queue.claim("worker-3", "run").attempts == 2
+    clock.now += 61
+    assert queue.claim("worker-4", "run") is None
+    assert queue.collect("run") == [("b", False, None)]
+    assert queue.remaining("run") == 0
+
+
+def _drain(path, owner):
+    queue = WorkQueue(path)
+    while True:
+        unit = queue.claim(owner, "run")
+        if unit is None:
+            break
+        queue.complete(unit, {"owner": owner, "n": unit.payload["n"]})
+    queue.close()
+
+
+def test_concurrent_processes_each_claim_a_unit_once(tmp_path):
+    path = str(tmp_path / "work.db")
+    queue = WorkQueue(path)
+    queue.enqueue("run", {str(n): {"n": n} for n in range(60)})
+
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=_drain, args=(path, f"worker-{i}")) for i in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+
+    results = queue.collect("run")
+    assert sorted(result["n"] for _, ok, result in results if ok) == list(range(60))
+    assert queue.counts("run") == {"collected": 60}
+
+
+def test_article_round_trips_through_json():
+    article = Article(title="T", url="https://example.com/t", topic="ml", content="C", relevance_score=2.5,
+                      published_date=datetime(2024, 1, 2, 3, 4, tzinfo=timezone.utc), authors=["Jane Doe"])
+    assert article_from_dict(article_to_dict(article)) == article
+
+
+def make_scraper(urls, metrics=None):
+    scraper = NewsScraper(feeds=FeedRegistry([Feed(url, [topic]) for url, topic in urls.items()]), metrics=metrics)
+    published = datetime(2024, 1, 2, tzinfo=timezone.utc)
+
+    def fetch_feed_articles(url, topic):
+        scraper.metrics.incr('feed_bytes', 100, feed=url)
+        scraper.poll_schedule.observe(url, [published])
+        return [Article(title=f"{topic} {i}", url=f"{url}/{i}", topic=topic, content="",
+                        published_date=published, relevance_score=10 - i) for i in range(2)]
+
+    scraper.fetch_feed_articles = fetch_feed_articles
+    return scraper
+
+
+def test_coordinator_merges_worker_results_after_a_crashed_worker(tmp_path):
+    urls = {"http://a/feed": "a", "http://b/feed": "b", "http://c/feed": "c"}
+    queue = WorkQueue(str(tmp_path / "work.db"), lease=0.3)
+    poll_schedule = PollSchedule()
+    metrics = Metrics()
+    coordinator = ShardCoordinator(queue, FeedRegistry([Feed(url, [t]) for url, t in urls.items()]),
+                                   poll_schedule=poll_schedule, timeout=10, poll_interval=0.02, metrics=metrics)
+    stop = threading.Event()
+
+    def crash_then_work():
+        # Claims the first unit and dies without finishing it; the healthy worker picks it up later
+        while queue.claim("crashed") is None:
+            stop.wait(0.01)
+        ShardWorker(queue, lambda metrics: make_scraper(urls, metrics), owner="healthy", poll_interval=0.02).run(stop=stop)
+
+    worker = threading.Thread(target=crash_then_work)
+    worker.start()
+    try:
+        scraper = make_scraper(urls)
+        notifier = FakeNotifier()
+        pipeline = Pipeline(scraper, FakeSummarizer(latency=0), notifier, list(urls.values()), per_topic=1,
+                            fetcher=coordinator)
+        result = pipeline.run()
+    finally:
+        stop.set()
+        worker.join()
+
+    assert sorted(a.title for a in result.delivered) == ["a 0", "b 0", "c 0"]
+    assert poll_schedule.state("http://a/feed").last_item == datetime(2024, 1, 2, tzinfo=timezone.utc).timestamp()
+    assert queue.counts() == {"collected": 3}
+    # Counters from the worker processes end up in the coordinator's run metrics
+    assert metrics.counter("feed_bytes", feed="http://a/feed") == 100
+
+
+def test_one_worker_harvests_new_arxiv_papers_in_each_run(tmp_path):
+    state = str(tmp_path / "oai.json")
+    feeds = FeedRegistry([Feed("https://arxiv.org/rss/cs.CL", ["nlp"], format="arxiv")])
+    later = page(record("2401.00011", "2024-01-05", "cs.CL", "Catch Up"))
+    session = FakeSession([Response(FIRST_PAGE), Response(SECOND_PAGE), Response(later)])
+    queue = WorkQueue(str(tmp_path / "work.db"))
+    stop = threading.Event()
+
+    def make_arxiv_scraper(metrics):
+        harvester = ArxivHarvester(session, state_path=state, clock=lambda: NOW, metrics=metrics)
+        return NewsScraper(feeds=feeds, arxiv=harvester, metrics=metrics)
+
+    worker = threading.Thread(
+        target=ShardWorker(queue, make_arxiv_scraper, owner="worker", poll_interval=0.02).run, kwargs={"stop": stop}
+    )
+    worker.start()
+    titles = []
+    try:
+        for _ in range(2):
+            # Each run's coordinator side has its own scraper, which commits what the worker harvested
+            scraper = NewsScraper(feeds=feeds, arxiv=ArxivHarvester(state_path=state, clock=lambda: NOW))
+            coordinator = ShardCoordinator(queue, feeds, timeout=10, poll_interval=0.02, scraper=scraper)
+            titles.append(sorted(a.title for _, articles in coordinator.fetch_many({"https://arxiv.org/rss/cs.CL": ["nlp"]})
+                                 for a in articles))
+            scraper.commit()
+    finally:
+        stop.set()
+        worker.join()
+
+    assert titles == [["Sparse Experts", "Tokenizer Scaling"], ["Catch Up"]]
+    assert session.requests[-1]["from"] == "2024-01-02"